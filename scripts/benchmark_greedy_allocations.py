@@ -0,0 +1,88 @@
+import os
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from fair.agent import LegacyStudent
+from fair.allocation import round_robin, serial_dictatorship
+from fair.constraint import CourseTimeConstraint, MutualExclusivityConstraint
+from fair.feature import Course, Section, Slot, Weekday, slots_for_time_range
+from fair.item import ScheduleItem
+from fair.profiling import AllocationProfiler
+from fair.simulation import RenaissanceMan
+
+NUM_STUDENTS = 2000
+MAX_COURSES_PER_TOPIC = 5
+LOWER_MAX_COURSES_TOTAL = 1
+UPPER_MAX_COURSES_TOTAL = 5
+EXCEL_SCHEDULE_PATH = os.path.join(
+    os.path.dirname(__file__), "../resources/fall2023schedule-2-cat.xlsx"
+)
+SPARSE = False
+
+# load schedule as DataFrame
+with open(EXCEL_SCHEDULE_PATH, "rb") as fd:
+    df = pd.read_excel(fd)
+
+# construct features from DataFrame
+course = Course(df["Catalog"].astype(str).unique().tolist())
+
+time_ranges = df["Mtg Time"].dropna().unique()
+slot = Slot.from_time_ranges(time_ranges, "15T")
+weekday = Weekday()
+
+section = Section(df["Section"].dropna().unique().tolist())
+features = [course, slot, weekday, section]
+
+# construct schedule
+schedule = []
+topic_map = defaultdict(set)
+for idx, (_, row) in enumerate(df.iterrows()):
+    crs = str(row["Catalog"])
+    topic_map[row["Categories"]].add(crs)
+    slt = slots_for_time_range(row["Mtg Time"], slot.times)
+    sec = row["Section"]
+    capacity = row["CICScapacity"]
+    dys = tuple([day.strip() for day in row["zc.days"].split(" ")])
+    schedule.append(
+        ScheduleItem(features, [crs, slt, dys, sec], index=idx, capacity=capacity)
+    )
+
+topics = sorted([sorted(list(courses)) for courses in topic_map.values()])
+
+# global constraints
+course_time_constr = CourseTimeConstraint.from_items(schedule, slot, weekday, SPARSE)
+course_sect_constr = MutualExclusivityConstraint.from_items(schedule, course, SPARSE)
+
+# randomly generate students
+students = []
+for i in range(NUM_STUDENTS):
+    student = RenaissanceMan(
+        topics,
+        [min(len(topic), MAX_COURSES_PER_TOPIC) for topic in topics],
+        LOWER_MAX_COURSES_TOTAL,
+        UPPER_MAX_COURSES_TOTAL,
+        course,
+        [course_time_constr, course_sect_constr],
+        schedule,
+        seed=i,
+        sparse=SPARSE,
+    )
+    legacy_student = LegacyStudent(student, student.preferred_courses, course)
+    legacy_student.student.valuation.valuation = (
+        legacy_student.student.valuation.compile()
+    )
+    students.append(legacy_student)
+
+for name, algorithm in [("SD", serial_dictatorship), ("RR", round_robin)]:
+    profiler = AllocationProfiler()
+    start = time.process_time()
+    X = algorithm(profiler.wrap_agents(students), schedule)
+    elapsed = time.process_time() - start
+    profiler.next_iteration()
+    oracle_calls = profiler.summary()["counters"]["oracle_calls"]["total"]
+    print(
+        f"{name}: {elapsed:.2f}s, {oracle_calls} oracle calls, "
+        f"{X[:, :-1].sum()} items allocated"
+    )
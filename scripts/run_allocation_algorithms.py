@@ -89,7 +89,7 @@ for i in range(NUM_STUDENTS):
     )
     students.append(legacy_student)
 
-X_YS, _, _ = general_yankee_swap_E(students, schedule)
+X_YS, _, _ = general_yankee_swap_E(students, schedule, verbose=True)
 print("YS utilitarian welfare: ", utilitarian_welfare(X_YS, students, schedule))
 print("YS nash welfare: ", nash_welfare(X_YS, students, schedule))
 print("YS leximin vector: ", leximin((X_YS), students, schedule))
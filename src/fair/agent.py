@@ -101,6 +101,24 @@ class BaseAgent:
         """
         return self.valuation.value(bundle)
 
+    def type_key(self):
+        """Hashable description of the agent's preferences
+
+        Agents with equal keys value every bundle the same, see deduplicate_agents.
+
+        Returns:
+            tuple: signature of the valuation
+        """
+        return (type(self).__name__, self.valuation.signature())
+
+    def share_valuation(self, other: "BaseAgent"):
+        """Use the valuation, and so the memo, of an agent of the same type
+
+        Args:
+            other (BaseAgent): agent with the same type_key
+        """
+        self.valuation = other.valuation
+
 
 class Student(BaseAgent):
     """A student agent"""
@@ -135,6 +153,29 @@ class LegacyStudent:
         self.preferred_courses = preferred_courses
         self.course = course
 
+    def type_key(self):
+        """Hashable description of the student's preferences
+
+        Students with equal keys desire the same items and value every bundle the same, see deduplicate_agents.
+
+        Returns:
+            tuple: signature of the valuation, preferred courses and course feature
+        """
+        return (
+            type(self).__name__,
+            self.student.valuation.signature(),
+            frozenset(self.preferred_courses),
+            (self.course.name, tuple(self.course.domain)),
+        )
+
+    def share_valuation(self, other: "LegacyStudent"):
+        """Use the valuation, and so the memo, of a student of the same type
+
+        Args:
+            other (LegacyStudent): student with the same type_key
+        """
+        self.student.valuation = other.student.valuation
+
     def valuation(self, bundle: List[BaseItem]):
         """Delegate to value function
         Args:
@@ -177,3 +218,38 @@ class LegacyStudent:
             for item in items
             if item.value(self.course) in self.preferred_courses
         ]
+
+
+def deduplicate_agents(agents: list[BaseAgent], compile: bool = False):
+    """Make agents with identical preferences share one valuation
+
+    Agents are grouped by type_key, and every agent uses the valuation of the first agent of its
+    group, so that bundles valued for one agent are looked up in the memo by the others. Agents
+    without type_key form a group of their own.
+
+    Args:
+        agents (list[BaseAgent]): List of agents, updated in place
+        compile (bool, optional): Should the shared valuations be compiled into a single constraint,
+            see ConstraintSatifactionValuation.compile. Defaults to False.
+
+    Returns:
+        list[int]: type of every agent, the index of the first agent of its group
+    """
+    representatives = {}
+    agent_types = []
+    for agent_index, agent in enumerate(agents):
+        if not hasattr(agent, "type_key"):
+            agent_types.append(agent_index)
+            continue
+        key = agent.type_key()
+        if key not in representatives:
+            representatives[key] = agent_index
+            if compile and isinstance(agent, LegacyStudent):
+                agent.student.valuation.valuation = agent.student.valuation.compile()
+            elif compile:
+                agent.valuation = agent.valuation.compile()
+        else:
+            agent.share_valuation(agents[representatives[key]])
+        agent_types.append(representatives[key])
+
+    return agent_types
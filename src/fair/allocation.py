@@ -1,4 +1,8 @@
+import heapq
 import time
+from concurrent.futures import Executor
+from functools import partial
+from itertools import repeat
 from queue import Queue
 
 import matplotlib.pyplot as plt
@@ -6,7 +10,24 @@ import networkx as nx
 import numpy as np
 
 from .agent import BaseAgent
+from .budget import AllocationBudget
+from .checkpoint import load_checkpoint, save_checkpoint
+from .graph import (
+    ArrayExchangeGraph,
+    BipartiteExchangeGraph,
+    EdgeStore,
+    LazyExchangeGraph,
+)
 from .item import ScheduleItem
+from .priority import AgentPriorityQueue
+from .profiling import AllocationProfiler
+from .state import AllocationState, as_allocation_state
+from .storage import (
+    BaseAllocation,
+    DenseAllocation,
+    MatrixAllocation,
+    SparseAllocation,
+)
 
 """Initializations functions"""
 
@@ -32,7 +53,75 @@ def initialize_allocation_matrix(items: list[ScheduleItem], agents: list[BaseAge
     return X
 
 
-def initialize_exchange_graph(N: int):
+def initialize_allocation_storage(
+    items: list[ScheduleItem], agents: list[BaseAgent], storage: str = "matrix"
+):
+    """Initialize allocation storage.
+
+    Initially, no items are allocated and every item has its full capacity remaining.
+
+    Args:
+        items (list[ScheduleItem]): Items from class BaseItem
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        storage (str, optional): "matrix" for the len(items) x (len(agents)+1) matrix of initialize_allocation_matrix,
+            "dense" for a compact agent-major DenseAllocation, or "sparse" for a SparseAllocation. Defaults to "matrix".
+
+    Raises:
+        ValueError: storage must be "matrix", "dense" or "sparse"
+
+    Returns:
+        X: numpy array or BaseAllocation
+    """
+    if storage == "matrix":
+        return initialize_allocation_matrix(items, agents)
+    capacity = [item.capacity for item in items]
+    if storage == "dense":
+        return DenseAllocation(len(items), len(agents), capacity)
+    if storage == "sparse":
+        return SparseAllocation(len(items), len(agents), capacity)
+    raise ValueError(f"unknown allocation storage: {storage}")
+
+
+def copy_allocation_storage(
+    X: type[np.ndarray],
+    items: list[ScheduleItem],
+    agents: list[BaseAgent],
+    storage: str = "matrix",
+):
+    """Copy an existing allocation into new allocation storage.
+
+    The copy may have more agents than X, in which case the extra agents own nothing. Remaining capacities are those of X.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
+        items (list[ScheduleItem]): Items from class BaseItem
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        storage (str, optional): allocation storage of the copy, see initialize_allocation_storage. Defaults to "matrix".
+
+    Raises:
+        ValueError: X must not have more agents than agents
+
+    Returns:
+        X: numpy array or BaseAllocation
+    """
+    if X.shape[1] - 1 > len(agents):
+        raise ValueError(
+            f"allocation has {X.shape[1] - 1} agents, more than the {len(agents)} given"
+        )
+    source = X if isinstance(X, BaseAllocation) else MatrixAllocation(X)
+    item_idxs, agent_idxs = source.nonzero()
+    X_copy = initialize_allocation_storage(items, agents, storage)
+    if isinstance(X_copy, BaseAllocation):
+        for item_index, agent_index in zip(item_idxs.tolist(), agent_idxs.tolist()):
+            X_copy.set(item_index, agent_index, 1)
+        X_copy.capacity[:] = source.capacity
+    else:
+        X_copy[item_idxs, agent_idxs] = 1
+        X_copy[:, -1] = source.capacity
+    return X_copy
+
+
+def initialize_exchange_graph(N: int, backend: str = "networkx", E: EdgeStore = None):
     """Generate exchange graph.
 
     There is one node for every item and a sink node 't' representing the pile of unnasigned items.
@@ -41,10 +130,33 @@ def initialize_exchange_graph(N: int):
 
     Args:
         N (int): number of items
+        backend (str, optional): graph implementation, "networkx", "array", "incremental", "bipartite" or "lazy".
+            Defaults to "networkx". The "array" backend stores nodes by integer index, with N as source and N+1 as sink.
+            The "incremental" backend additionally maintains distance labels to the sink, and reads shortest paths off
+            those labels, which breaks ties between them differently than the other backends. The "bipartite" backend
+            links items through (item, agent) holdings read from the edge store, see BipartiteExchangeGraph. The "lazy"
+            backend builds the edges leaving an item only when a search expands it, and must be bound to the allocation
+            before searching, see LazyExchangeGraph.
+        E (EdgeStore, optional): edge store of the "bipartite" backend. Defaults to None.
+
+    Raises:
+        ValueError: backend must be "networkx", "array", "incremental", "bipartite" or "lazy", and "bipartite" requires E
 
     Returns:
-        nx.graph: networkx graph object
+        nx.graph | ArrayExchangeGraph | BipartiteExchangeGraph | LazyExchangeGraph: exchange graph object
     """
+    if backend == "array":
+        return ArrayExchangeGraph(N)
+    if backend == "incremental":
+        return ArrayExchangeGraph(N, track_distances=True)
+    if backend == "bipartite":
+        if E is None:
+            raise ValueError("the bipartite backend requires an edge store")
+        return BipartiteExchangeGraph(N, E)
+    if backend == "lazy":
+        return LazyExchangeGraph(N)
+    if backend != "networkx":
+        raise ValueError(f"unknown exchange graph backend: {backend}")
     exchange_graph = nx.DiGraph()
     for i in range(N):
         exchange_graph.add_node(i)
@@ -54,6 +166,65 @@ def initialize_exchange_graph(N: int):
     return exchange_graph
 
 
+def initialize_exchange_graph_E(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    backend: str = "networkx",
+    free_items: set[int] = None,
+):
+    """Generate exchange graph and edge store for an existing allocation.
+
+    Every owner's edges are found from a single valuation of its bundle and one valuation per candidate exchange,
+    and are then added to the graph all at once. Items with no remaining capacity have no edge to the sink. With the
+    "lazy" backend, no edges between items are found here.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+        backend (str, optional): graph implementation, see initialize_exchange_graph. Defaults to "networkx".
+        free_items (set[int], optional): items whose exchanges are skipped, see get_agent_exchanges. Defaults to None.
+
+    Returns:
+        G (nx.graph | ArrayExchangeGraph | BipartiteExchangeGraph | LazyExchangeGraph): exchange graph object
+        E (EdgeStore): agents responsible for each edge of the exchange graph
+    """
+    state = as_allocation_state(X, items)
+    E = EdgeStore()
+    G = initialize_exchange_graph(len(items), backend, E)
+    _, sink = get_exchange_graph_terminals(G)
+    for item_index in range(len(items)):
+        if state.remaining(item_index) == 0:
+            G.remove_edge(item_index, sink)
+    if isinstance(G, LazyExchangeGraph):
+        return G, E
+    edges = []
+    for agent_index, agent in enumerate(agents):
+        bundle = state.bundle_indexes(agent_index)
+        if len(bundle) == 0:
+            continue
+        bundle_items = state.bundle(agent_index)
+        val = agent.valuation(bundle_items)
+        # as in exchange_contribution, items equal to one in the bundle are not wanted
+        desired_items = [
+            i
+            for i in agent.get_desired_items_indexes(items)
+            if items[i] not in bundle_items
+        ]
+        for position, item1_idx in enumerate(bundle):
+            if free_items is not None and item1_idx in free_items:
+                continue
+            rest = bundle_items[:position] + bundle_items[position + 1 :]
+            for item2_idx in desired_items:
+                if agent.valuation(rest + [items[item2_idx]]) == val:
+                    if E.add(item1_idx, item2_idx, agent_index):
+                        edges.append((item1_idx, item2_idx))
+    if len(edges) > 0:
+        G.add_edges_from(edges)
+    return G, E
+
+
 """Retrieve/update information"""
 
 
@@ -72,7 +243,7 @@ def get_gain_function(
     This function is used to update the gain function for the agent that just played, to keep track of priority agents.
 
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         agents (list[BaseAgent]): Agents from class BaseAgent
         items (list[ScheduleItem]): Items from class BaseItem
         agent_picked (int): index of the agent that just played
@@ -85,6 +256,23 @@ def get_gain_function(
     agent = agents[agent_picked]
     bundle = get_bundle_from_allocation_matrix(X, items, agent_picked)
     val = agent.valuation(bundle)
+    return get_gain_from_utility(val, agent_picked, criteria, weights)
+
+
+def get_gain_from_utility(
+    val: float, agent_picked: int, criteria: str, weights: list[float]
+):
+    """Get agent's gain function value from its current utility.
+
+    Args:
+        val (float): current utility of the agent
+        agent_picked (int): index of the agent
+        criteria (str): general yankee swap criteria, see get_gain_function
+        weights (list[float]): list of weights assigned to the agents, if any
+
+    Returns:
+        float: gain function value
+    """
     if criteria == "LorenzDominance":
         return -val
     w_i = weights[agent_picked]
@@ -99,18 +287,122 @@ def get_gain_function(
         return w_i / (val + 1)
 
 
+def get_utility_vector(
+    X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]
+):
+    """Get every agent's utility for its current bundle.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+
+    Returns:
+        np.ndarray: utilities, indexed by agent
+    """
+    utilities = []
+    for agent_index, agent in enumerate(agents):
+        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
+        utilities.append(agent.valuation(bundle))
+    return np.array(utilities)
+
+
+def get_max_utility_vector(agents: list[BaseAgent], items: list[ScheduleItem]):
+    """Get the highest utility every agent can reach.
+
+    This is the rank of the agent's desired items, ignoring capacities: with matroid rank valuations, an agent whose
+    utility reaches it has no addable item left, and can never find a transfer path again.
+
+    Args:
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+
+    Returns:
+        np.ndarray: utilities, indexed by agent
+    """
+    utilities = []
+    for agent in agents:
+        desired = [items[i] for i in agent.get_desired_items_indexes(items)]
+        utilities.append(agent.valuation(desired))
+    return np.array(utilities)
+
+
+def check_utility(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_index: int,
+    utility_vector: type[np.ndarray],
+):
+    """Compare an agent's utility as kept during allocation with a full recomputation.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+        agent_index (int): index of the agent
+        utility_vector (type[np.ndarray]): utilities kept during allocation, indexed by agent
+
+    Raises:
+        RuntimeError: utilities must agree
+    """
+    bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
+    val = agents[agent_index].valuation(bundle)
+    if val != utility_vector[agent_index]:
+        raise RuntimeError(
+            "utility %s of agent %d differs from recomputed utility %s"
+            % (utility_vector[agent_index], agent_index, val)
+        )
+
+
+def get_gain_vector(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    criteria: str,
+    weights: list[float],
+):
+    """Get every agent's gain function value for an existing allocation.
+
+    Agents who own nothing get 0, the gain every agent starts with in a new Yankee swap run.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+        criteria (str): general yankee swap criteria, see get_gain_function
+        weights (list[float]): list of weights assigned to the agents, if any
+
+    Returns:
+        list[float]: gain function values, indexed by agent
+    """
+    state = as_allocation_state(X, items)
+    gains = []
+    for agent_index in range(len(agents)):
+        if len(state.bundle_indexes(agent_index)) > 0:
+            gains.append(
+                get_gain_function(state, agents, items, agent_index, criteria, weights)
+            )
+        else:
+            gains.append(0)
+    return gains
+
+
 def get_owners_list(X: type[np.ndarray], item_index: int):
     """Get list of item's current owners.
 
     From the exchange matrix, list of indices of all agents that currently have certain item.
 
     Args:
-        X (type[np.ndarray]): Allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): Allocation matrix, storage or state
         item_index (int): index of the item for which we want to get the owners
 
     Returns:
-        list[int]: list of item's owners' indices
+        list[int]: list of item's owners' indices. When X is a numpy array, this includes the
+        capacity column if the item has copies left unallocated.
     """
+    if isinstance(X, (AllocationState, BaseAllocation)):
+        return X.owners(item_index)
     item_list = X[item_index]
     owners_list = np.nonzero(item_list)
     return owners_list[0]
@@ -124,12 +416,16 @@ def get_bundle_from_allocation_matrix(
     Get list of all items currently owned by a certain agent (bundle), given the current allocation
 
     Args:
-        X (type[np.ndarray]): Allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): Allocation matrix, storage or state
         items (list[ScheduleItem]): List of items from class BaseItem
         agent_index (int): index of the agent for which we want to get the current bundle
     Returns:
         list[ScheduleItem]: List of items from the BaseItem class currently owned by the agent
     """
+    if isinstance(X, AllocationState):
+        return X.bundle(agent_index)
+    if isinstance(X, BaseAllocation):
+        return [items[i] for i in X.bundle_indexes(agent_index)]
     bundle0 = []
     items_list = X[:, agent_index]
     for i in range(len(items_list)):
@@ -144,11 +440,13 @@ def get_bundle_indexes_from_allocation_matrix(X: type[np.ndarray], agent_index:
     Get list of indices of all items currently owned by a certain agent (bundle), given the current allocation
 
     Args:
-        X (type[np.ndarray]): Allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): Allocation matrix, storage or state
         agent_index (int): index of the agent for which we want to get the current bundle
     Returns:
         list[int]: List of indices of the items from the BaseItem class currently owned by the agent
     """
+    if isinstance(X, (AllocationState, BaseAllocation)):
+        return X.bundle_indexes(agent_index)
     bundle_indexes = []
     items_list = X[:, agent_index]
     for i in range(len(items_list)):
@@ -181,7 +479,7 @@ def get_multiple_agents_bundles(X: type[np.ndarray], agents_indexes: list[int]):
     """Get list of unique items from union of items owned by multiple agents
 
     Args:
-        X (type[np.ndarray]): Allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): Allocation matrix, storage or state
         agents_indexes (list[int]): list of indices of agents
 
     Returns:
@@ -206,7 +504,7 @@ def find_agent(
     This will depend on their current bundle, for which the allocation matrix is needed.
 
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         current_item_index (int): index of the item that we want to exchange
@@ -243,32 +541,35 @@ def update_allocation(
     Execute the transfer path found, updating the allocation of items accordingly
 
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agent_picked (int): index of the agent currently playing
 
     Returns:
-        X (type[np.ndarray]): updated allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): updated allocation matrix, storage or state
         agents_involved (list[int]): indices of the agents involved in the transfer path
     """
+    state = as_allocation_state(X, items)
     path = path_og.copy()
     path = path[1:-1]
     last_item = path[-1]
     agents_involved = [agent_picked]
-    X[last_item, len(agents)] -= 1
+    state.take(last_item)
     while len(path) > 0:
         last_item = path.pop(len(path) - 1)
         # print('last item: ', last_item)
         if len(path) > 0:
             next_to_last_item = path[-1]
-            current_agent = find_agent(X, agents, items, next_to_last_item, last_item)
+            current_agent = find_agent(
+                state, agents, items, next_to_last_item, last_item
+            )
             agents_involved.append(current_agent)
-            X[last_item, current_agent] = 1
-            X[next_to_last_item, current_agent] = 0
+            state.assign(last_item, current_agent)
+            state.release(next_to_last_item, current_agent)
         else:
-            X[last_item, agent_picked] = 1
+            state.assign(last_item, agent_picked)
 
     return X, agents_involved
 
@@ -276,61 +577,97 @@ def update_allocation(
 def update_allocation_E(
     X: type[np.ndarray],
     G: type[nx.Graph],
-    E: list[list],
+    E: EdgeStore,
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     path_og: list[int],
     agent_picked: int,
+    profiler: AllocationProfiler = None,
 ):
-    """Udate allocation matrix, edge matrix, and exchange graph.
+    """Udate allocation matrix, edge store, and exchange graph.
 
-    Execute the transfer path found, updating the allocation of items and edge matrix accordingly.
-    Edge matrix is a list of lists containing the indices of agents responsible for each edge on the exchange graph
+    Execute the transfer path found, updating the allocation of items and edge store accordingly.
+    The edge store records the indices of agents responsible for each edge on the exchange graph
     This function is for the edge_matrix version of yankee swap
 
+    Every item on the path is given up by the first agent recorded on its edge, or, with a BipartiteExchangeGraph, by the
+    lowest index one.
+
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         G (type[nx.Graph]): exchange graph
-        E (list[list]): edge matrix
+        E (EdgeStore): agents responsible for each edge of the exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agent_picked (int): index of the agent currently playing
+        profiler (AllocationProfiler, optional): receives the number of edges removed as "edges_removed". Defaults to None.
 
     Returns:
-        X (type[np.ndarray]): updated allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): updated allocation matrix, storage or state
         G (type[nx.Graph]): updated exchange graph
-        E (list[list]): updated edge matrix
+        E (EdgeStore): updated edge store
         agents_involved (list[int]): indices of the agents involved in the transfer path
     """
+    state = as_allocation_state(X, items)
     path = path_og.copy()
     path = path[1:-1]
     last_item = path[-1]
     agents_involved = [agent_picked]
-    X[last_item, len(agents)] -= 1
+    state.take(last_item)
+    removed = 0
     while len(path) > 0:
         last_item = path.pop(len(path) - 1)
         if len(path) > 0:
             next_to_last_item = path[-1]
-            current_agent = E[next_to_last_item][last_item][0]
+            if isinstance(G, BipartiteExchangeGraph):
+                current_agent = G.giver(next_to_last_item, last_item)
+            else:
+                current_agent = E.agents(next_to_last_item, last_item)[0]
             agents_involved.append(current_agent)
-            X[last_item, current_agent] = 1
-            X[next_to_last_item, current_agent] = 0
-            for item_index in range(len(items)):
-                if current_agent in E[next_to_last_item][item_index]:
-                    E[next_to_last_item][item_index].remove(current_agent)
-                    if len(E[next_to_last_item][item_index]) == 0 and G.has_edge(
-                        next_to_last_item, item_index
-                    ):
-                        G.remove_edge(next_to_last_item, item_index)
+            state.assign(last_item, current_agent)
+            state.release(next_to_last_item, current_agent)
+            for edge in E.remove_agent(current_agent, next_to_last_item):
+                if G.has_edge(*edge):
+                    G.remove_edge(*edge)
+                removed += 1
         else:
-            X[last_item, agent_picked] = 1
+            state.assign(last_item, agent_picked)
+    if profiler is not None:
+        profiler.count("edges_removed", removed)
     return X, G, E, agents_involved
 
 
 """Graph functions for the exchange graph"""
 
 
+def get_exchange_graph_terminals(G: type[nx.Graph]):
+    """Get source and sink nodes of the exchange graph.
+
+    Args:
+        G (type[nx.Graph]): exchange graph
+
+    Returns:
+        source: label of the node representing the agent currently playing
+        sink: label of the node representing the pile of unassigned items
+    """
+    if isinstance(G, (ArrayExchangeGraph, BipartiteExchangeGraph)):
+        return G.source, G.sink
+    return "s", "t"
+
+
+def draw_exchange_graph(G: type[nx.Graph]):
+    """Display exchange graph plot.
+
+    Args:
+        G (type[nx.Graph]): exchange graph
+    """
+    if isinstance(G, (ArrayExchangeGraph, BipartiteExchangeGraph)):
+        G = G.to_networkx()
+    nx.draw(G, with_labels=True)
+    plt.show()
+
+
 def find_shortest_path(G: type[nx.Graph], start: str, end: str):
     """Find shortest path on exchange graph.
 
@@ -345,6 +682,9 @@ def find_shortest_path(G: type[nx.Graph], start: str, end: str):
         list[int]: list of nodes (item indices) on the shortest path
         of False: if there is no such path
     """
+    if isinstance(G, (ArrayExchangeGraph, BipartiteExchangeGraph)):
+        p = G.shortest_path(start, end)
+        return False if p is None else p
     try:
         p = nx.shortest_path(G, source=start, target=end)
         return p
@@ -352,6 +692,39 @@ def find_shortest_path(G: type[nx.Graph], start: str, end: str):
         return False
 
 
+def get_item_exchanges(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    item_index: int,
+):
+    """Find the edges leaving an item of the exchange graph.
+
+    An edge leads to every item that some owner of the item desires and would take in exchange without losing utility.
+    Owners are asked in increasing order, and an edge already found is not evaluated again. These are the edges a
+    LazyExchangeGraph builds.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        item_index (int): index of the item
+
+    Returns:
+        dict[int, int]: lowest index owner willing to give the item up for every head, in increasing head order
+    """
+    state = as_allocation_state(X, items)
+    edges = {}
+    for owner in state.owners(item_index):
+        agent = agents[owner]
+        bundle = state.bundle(owner)
+        for head in agent.get_desired_items_indexes(items):
+            if head != item_index and head not in edges:
+                if agent.exchange_contribution(bundle, items[item_index], items[head]):
+                    edges[head] = owner
+    return dict(sorted(edges.items()))
+
+
 def add_agent_to_exchange_graph(
     X: type[np.ndarray],
     G: type[nx.Graph],
@@ -364,7 +737,7 @@ def add_agent_to_exchange_graph(
     Create node representing the agent currently playing, add edges from the node to items that would increase their utility
 
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         G (type[nx.Graph]): exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
@@ -373,17 +746,121 @@ def add_agent_to_exchange_graph(
     Returns:
         G (type[nx.Graph]): Updated exchange graph
     """
-    G.add_node("s")
-    bundle = get_bundle_from_allocation_matrix(X, items, agent_picked)
-    agent = agents[agent_picked]
+    source, _ = get_exchange_graph_terminals(G)
+    G.add_node(source)
+    for i in get_addable_items(X, agents, items, agent_picked):
+        G.add_edge(source, i)
+    return G
+
+
+def get_addable_items(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_index: int,
+):
+    """Get desired items that would increase an agent's utility.
+
+    These are the items the agent's node is connected to when it is added to the exchange graph.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agent_index (int): index of the agent
+
+    Returns:
+        list[int]: list of items indices
+    """
+    bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
+    agent = agents[agent_index]
+    addable = []
     for i in agent.get_desired_items_indexes(items):
         g = items[i]
-        if (
-            g not in bundle
-            and agents[agent_picked].marginal_contribution(bundle, g) == 1
-        ):
-            G.add_edge("s", i)
-    return G
+        if g not in bundle and agent.marginal_contribution(bundle, g) == 1:
+            addable.append(i)
+    return addable
+
+
+def speculate_transfer_paths(
+    X: type[np.ndarray],
+    G: ArrayExchangeGraph,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agents_indexes: list[int],
+):
+    """Find transfer paths for several agents on the current exchange graph.
+
+    Each agent's node is added, searched from and removed in turn, so every search sees the same graph.
+    A path remains valid for as long as G.is_unchanged holds for its footprint and the agent's bundle
+    has not changed.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        G (ArrayExchangeGraph): exchange graph, without distance tracking
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agents_indexes (list[int]): indices of the agents
+
+    Returns:
+        dict[int, tuple]: shortest path (or False if there is none) and search footprint, by agent index
+    """
+    source, sink = get_exchange_graph_terminals(G)
+    paths = {}
+    for agent_index in agents_indexes:
+        G = add_agent_to_exchange_graph(X, G, agents, items, agent_index)
+        path, footprint = G.shortest_path(source, sink, footprint=True)
+        G.remove_node(source)
+        paths[agent_index] = (False if path is None else path, footprint)
+    return paths
+
+
+def get_items_reaching_sink(G: type[nx.Graph]):
+    """Get items from which there is a path to the sink in the exchange graph.
+
+    Args:
+        G (type[nx.Graph]): exchange graph, without the picked agent's node
+
+    Returns:
+        set[int]: set of items indices
+    """
+    if isinstance(G, ArrayExchangeGraph):
+        return set(np.flatnonzero(G.distances()[: G.N] < G.N + 2).tolist())
+    if isinstance(G, BipartiteExchangeGraph):
+        return G.items_reaching_sink()
+    _, sink = get_exchange_graph_terminals(G)
+    return nx.ancestors(G, sink)
+
+
+def find_stranded_agents(
+    X: type[np.ndarray],
+    G: type[nx.Graph],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    players: list[int],
+):
+    """Find players that can no longer increase their utility.
+
+    A player is stranded if none of its addable items can reach the sink in the exchange graph. Such a player
+    would fail to find a transfer path whenever it is picked, now or in any later iteration.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        G (type[nx.Graph]): exchange graph, without the picked agent's node
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        players (list[int]): indices of the agents still playing
+
+    Returns:
+        list[int]: indices of the stranded players, in increasing order
+    """
+    reaching = get_items_reaching_sink(G)
+    stranded = []
+    for agent_index in sorted(players):
+        addable = get_addable_items(X, agents, items, agent_index)
+        if reaching.isdisjoint(addable):
+            stranded.append(agent_index)
+    return stranded
 
 
 def update_exchange_graph(
@@ -399,7 +876,7 @@ def update_exchange_graph(
     Given the updated allocation, path found and list of involved agents in the transfer path, update the exchange graph
 
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         G (type[nx.Graph]): exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
@@ -409,20 +886,20 @@ def update_exchange_graph(
     Returns:
         G (type[nx.Graph]): updated exchange graph
     """
+    state = as_allocation_state(X, items)
     path = path_og.copy()
     path = path[1:-1]
     last_item = path[-1]
-    if X[last_item, len(agents)] == 0:
-        G.remove_edge(last_item, "t")
+    if state.remaining(last_item) == 0:
+        _, sink = get_exchange_graph_terminals(G)
+        G.remove_edge(last_item, sink)
     agents_involved_desired_items = get_multiple_agents_desired_items(
         agents, items, agents_involved
     )
-    agents_involved_bundles = get_multiple_agents_bundles(X, agents_involved)
+    agents_involved_bundles = get_multiple_agents_bundles(state, agents_involved)
     for item_idx in agents_involved_bundles:
         item_1 = items[item_idx]
-        owners = list(get_owners_list(X, item_idx))
-        if len(agents) in owners:
-            owners.remove(len(agents))
+        owners = state.owners(item_idx)
         owners_desired_items = get_multiple_agents_desired_items(agents, items, owners)
         items_to_loop_over = list(
             set(agents_involved_desired_items + owners_desired_items)
@@ -434,9 +911,7 @@ def update_exchange_graph(
                 for owner in owners:
                     if owner != len(agents):
                         agent = agents[owner]
-                        bundle_owner = get_bundle_from_allocation_matrix(
-                            X, items, owner
-                        )
+                        bundle_owner = state.bundle(owner)
                         willing_owner = agent.exchange_contribution(
                             bundle_owner, item_1, item_2
                         )
@@ -455,128 +930,378 @@ def update_exchange_graph(
 def update_exchange_graph_E(
     X: type[np.ndarray],
     G: type[nx.Graph],
-    E: list[list],
+    E: EdgeStore,
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     path_og: list[int],
     agents_involved: list[int],
+    profiler: AllocationProfiler = None,
+    executor: Executor = None,
+    parallel_threshold: int = 8,
+    agent_types: list[int] = None,
+    free_items: set[int] = None,
 ):
-    """Update the exchange graph and edge matrix after the transfers made.
+    """Update the exchange graph and edge store after the transfers made.
 
-    Given the updated allocation, path found and list of involved agents in the transfer path, update the exchange graph and edge matrix.
+    Given the updated allocation, path found and list of involved agents in the transfer path, update the exchange graph and edge store.
     This function is for the edge_matrix version of yankee swap (general_yankee_swap_E)
 
+    A LazyExchangeGraph only records that the bundles of the involved agents changed, see LazyExchangeGraph.advance.
+
+    The exchanges of an agent depend on its bundle only, so with an executor they are found for every involved agent
+    concurrently, see get_agent_exchanges. They are then applied to G and E one agent at a time, in the order of
+    agents_involved, so the result is the same as without an executor. Valuation memos are filled in place by thread
+    pools; with a process pool, entries computed by the workers are not copied back, and oracle calls are not profiled.
+
     Args:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
         G (type[nx.Graph]): exchange graph
-        E (list[list]): edge matrix
+        E (EdgeStore): agents responsible for each edge of the exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agents_involved (list[int]): list of the indices of the agents invovled in the transfer path
+        profiler (AllocationProfiler, optional): receives the number of edges added and removed as "edges_added"
+            and "edges_removed". Defaults to None.
+        executor (Executor, optional): pool to find the exchanges of the involved agents with, such as a
+            concurrent.futures.ThreadPoolExecutor. Defaults to None, to find them one agent at a time.
+        parallel_threshold (int, optional): smallest number of distinct involved agents for which the executor is used;
+            shorter paths are not worth the overhead. Defaults to 8.
+        agent_types (list[int], optional): type of every agent, see deduplicate_agents. Defaults to None. Involved agents
+            of the same type that own the same items share the exchanges found for the first of them.
+        free_items (set[int], optional): items whose exchanges are skipped, see get_agent_exchanges. Defaults to None.
 
     Returns:
         G (type[nx.Graph]): updated exchange graph
-        E (list[list]): updated edge matrix
+        E (EdgeStore): updated edge store
     """
+    state = as_allocation_state(X, items)
     path = path_og.copy()
     path = path[1:-1]
     last_item = path[-1]
-    if X[last_item, len(agents)] == 0:
-        G.remove_edge(last_item, "t")
+    added = removed = 0
+    if state.remaining(last_item) == 0:
+        _, sink = get_exchange_graph_terminals(G)
+        G.remove_edge(last_item, sink)
+        removed += 1
+    if isinstance(G, LazyExchangeGraph):
+        for agent_index in dict.fromkeys(agents_involved):
+            G.advance(agent_index)
+        if profiler is not None:
+            profiler.count("edges_removed", removed)
+        return G, E
+    exchanges = {}
+    distinct = list(dict.fromkeys(agents_involved))
+    if agent_types is not None:
+        # agents of one type with the same bundle have the same exchanges
+        groups = {}
+        for agent_index in distinct:
+            bundle = state.bundle_indexes(agent_index)
+            groups.setdefault((agent_types[agent_index], tuple(bundle)), []).append(
+                agent_index
+            )
+        distinct = [group[0] for group in groups.values()]
+    if executor is not None and len(distinct) >= parallel_threshold:
+        bundles = [state.bundle_indexes(agent_index) for agent_index in distinct]
+        results = executor.map(
+            get_agent_exchanges,
+            [agents[agent_index] for agent_index in distinct],
+            repeat(items),
+            bundles,
+            repeat(free_items),
+        )
+        exchanges = dict(zip(distinct, results))
+    if agent_types is not None:
+        for group in groups.values():
+            if group[0] not in exchanges:
+                exchanges[group[0]] = get_agent_exchanges(
+                    agents[group[0]],
+                    items,
+                    state.bundle_indexes(group[0]),
+                    free_items,
+                )
+            for agent_index in group[1:]:
+                exchanges[agent_index] = exchanges[group[0]]
     for agent_index in agents_involved:
-        agent = agents[agent_index]
-        agent_bundle = get_bundle_indexes_from_allocation_matrix(X, agent_index)
-        agent_bundle_items = get_bundle_from_allocation_matrix(X, items, agent_index)
-        agent_desired_items = agent.get_desired_items_indexes(items)
-        for item1_idx in agent_bundle:
-            item1 = items[item1_idx]
-            for item2_idx in agent_desired_items:
-                item2 = items[item2_idx]
-                if item1_idx != item2_idx:
-                    if agent_index in E[item1_idx][item2_idx]:
-                        if not agent.exchange_contribution(
-                            agent_bundle_items, item1, item2
-                        ):
-                            E[item1_idx][item2_idx].remove(agent_index)
-                            if len(E[item1_idx][item2_idx]) == 0 and G.has_edge(
-                                item1_idx, item2_idx
-                            ):
-                                G.remove_edge(item1_idx, item2_idx)
-                    else:
-                        if agent.exchange_contribution(
-                            agent_bundle_items, item1, item2
-                        ):
-                            E[item1_idx][item2_idx].append(agent_index)
-                            if not G.has_edge(item1_idx, item2_idx):
-                                G.add_edge(item1_idx, item2_idx)
+        agent_added, agent_removed = update_agent_edges_E(
+            state,
+            G,
+            E,
+            agents,
+            items,
+            agent_index,
+            exchanges.get(agent_index),
+            free_items,
+        )
+        added += agent_added
+        removed += agent_removed
+    if profiler is not None:
+        profiler.count("edges_added", added)
+        profiler.count("edges_removed", removed)
     return G, E
 
 
+def get_agent_exchanges(
+    agent: BaseAgent,
+    items: list[ScheduleItem],
+    bundle_indexes: list[int],
+    free_items: set[int] = None,
+):
+    """Find the exchanges an agent can make without losing utility.
+
+    Only reads the agent and its bundle, so the exchanges of different agents can be found concurrently.
+
+    Args:
+        agent (BaseAgent): the agent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        bundle_indexes (list[int]): indices of the items in the agent's bundle
+        free_items (set[int], optional): items that never run out, whose exchanges are skipped. A shortest path
+            reaching such an item continues to the sink, so edges leaving it are never used. Defaults to None.
+
+    Returns:
+        set[tuple[int, int]]: pairs (item1, item2) such that the agent can replace item1 with item2 and keep the same utility
+    """
+    bundle = [items[item_idx] for item_idx in bundle_indexes]
+    desired = agent.get_desired_items_indexes(items)
+    free_items = free_items or set()
+    return {
+        (item1_idx, item2_idx)
+        for item1_idx in bundle_indexes
+        if item1_idx not in free_items
+        for item2_idx in desired
+        if item1_idx != item2_idx
+        and agent.exchange_contribution(bundle, items[item1_idx], items[item2_idx])
+    }
+
+
+def update_agent_edges_E(
+    X: type[np.ndarray],
+    G: type[nx.Graph],
+    E: EdgeStore,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_index: int,
+    exchanges: set[tuple[int, int]] = None,
+    free_items: set[int] = None,
+):
+    """Update the edges an agent is responsible for after its bundle changed.
+
+    Edges leaving items the agent no longer owns must already have been removed, see EdgeStore.remove_agent. A
+    LazyExchangeGraph only records that the agent's bundle changed.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        G (type[nx.Graph]): exchange graph, updated in place
+        E (EdgeStore): agents responsible for each edge of the exchange graph, updated in place
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agent_index (int): index of the agent
+        exchanges (set[tuple[int, int]], optional): exchanges of the agent for its current bundle, see get_agent_exchanges.
+            Defaults to None, to find them here.
+        free_items (set[int], optional): items whose exchanges are skipped, see get_agent_exchanges. Defaults to None.
+
+    Returns:
+        int: number of edges added to the exchange graph
+        int: number of edges removed from the exchange graph
+    """
+    if isinstance(G, LazyExchangeGraph):
+        G.advance(agent_index)
+        return 0, 0
+    state = as_allocation_state(X, items)
+    agent_bundle = state.bundle_indexes(agent_index)
+    if exchanges is None:
+        exchanges = get_agent_exchanges(
+            agents[agent_index], items, agent_bundle, free_items
+        )
+    added = removed = 0
+    agent_desired_items = agents[agent_index].get_desired_items_indexes(items)
+    for item1_idx in agent_bundle:
+        for item2_idx in agent_desired_items:
+            if item1_idx != item2_idx:
+                exchange = (item1_idx, item2_idx) in exchanges
+                if E.supports(item1_idx, item2_idx, agent_index):
+                    if not exchange and E.remove(item1_idx, item2_idx, agent_index):
+                        if G.has_edge(item1_idx, item2_idx):
+                            G.remove_edge(item1_idx, item2_idx)
+                        removed += 1
+                elif exchange and E.add(item1_idx, item2_idx, agent_index):
+                    G.add_edge(item1_idx, item2_idx)
+                    added += 1
+    return added, removed
+
+
 """Allocation algorithms"""
 
 
-def serial_dictatorship(agents: list[BaseAgent], items: list[ScheduleItem]):
+def serial_dictatorship(
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    storage: str = "matrix",
+    budget: AllocationBudget = None,
+):
     """SPIRE allocation algorithm.
 
-    In each round, give the playing agent all items they can add to their bundle that give them positive utility
+    In each round, give the playing agent all items they can add to their bundle that give them positive utility.
+    The value of the playing agent's bundle is kept between candidates, so every candidate costs one valuation call.
 
     Args:
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        budget (AllocationBudget, optional): see fill_remaining. Defaults to None.
 
     Returns:
-         X (type[np.ndarray]): allocation matrix
+         X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
     """
-    X = initialize_allocation_matrix(items, agents)
-    agent_index = 0
-    for agent_index, agent in enumerate(agents):
-        bundle = []
-        desired_items = agent.get_desired_items_indexes(items)
-        for item in desired_items:
-            if X[item, len(agents)] > 0:
-                current_val = agent.valuation(bundle)
-                new_bundle = bundle.copy()
-                new_bundle.append(items[item])
-                new_valuation = agent.valuation(new_bundle)
-                if new_valuation > current_val:
-                    X[item, agent_index] = 1
-                    X[item, len(agents)] -= 1
-                    bundle = new_bundle.copy()
+    X = initialize_allocation_storage(items, agents, storage)
+    fill_remaining(X, agents, items, budget=budget)
     return X
 
 
-def round_robin(agents: list[BaseAgent], items: list[ScheduleItem]):
+def fill_remaining(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agents_indexes: list[int] = None,
+    budget: AllocationBudget = None,
+):
+    """Give agents, one after the other, all unallocated items that add to their current bundle's utility.
+
+    This is serial dictatorship applied to a partial allocation, in place, and only ever adds items, so a feasible
+    allocation stays feasible. It is a fast way to use up the capacity left by an algorithm stopped early.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state, updated in place
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agents_indexes (list[int], optional): agents to serve, in order. Defaults to None, for all agents.
+        budget (AllocationBudget, optional): Defaults to None. Limits checked before every agent's turn, see
+            general_yankee_swap_events.
+
+    Returns:
+        int: number of items allocated
+    """
+    state = as_allocation_state(X, items)
+    if agents_indexes is None:
+        agents_indexes = list(range(len(agents)))
+    allocated = 0
+    for turn, agent_index in enumerate(agents_indexes):
+        if budget is not None:
+            if budget.exhausted():
+                budget.stop(agents_indexes[turn:])
+                break
+            budget.next_iteration()
+        agent = agents[agent_index]
+        bundle = state.bundle(agent_index)
+        current_val = None
+        for item in agent.get_desired_items_indexes(items):
+            if state.remaining(item) > 0:
+                if current_val is None:
+                    current_val = agent.valuation(bundle)
+                new_valuation = agent.valuation(bundle + [items[item]])
+                if new_valuation > current_val:
+                    state.allocate(item, agent_index)
+                    bundle.append(items[item])
+                    current_val = new_valuation
+                    allocated += 1
+    return allocated
+
+
+def pop_best_candidate(
+    agent: BaseAgent,
+    items: list[ScheduleItem],
+    state: AllocationState,
+    agent_index: int,
+    candidates: list[tuple],
+    current_val: float,
+):
+    """Pop the unallocated candidate item with the highest marginal utility for an agent.
+
+    Candidates are kept in a heap of (-marginal, position, item index, bundle size) entries, where the marginal was
+    computed when the agent's bundle had that size. Since marginals can only go down as the bundle grows, stale
+    entries are upper bounds and only the entry at the top of the heap needs to be brought up to date. Ties are broken
+    in favor of the lowest position. Items without remaining capacity or positive marginal are dropped for good.
+
+    Args:
+        agent (BaseAgent): agent from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        state (AllocationState): allocation state
+        agent_index (int): index of the agent
+        candidates (list[tuple]): heap of candidate entries, updated in place
+        current_val (float): value of the agent's current bundle
+
+    Returns:
+        int: index of the item, or None if no candidate is left
+        float: marginal utility of the item, or 0 if no candidate is left
+    """
+    bundle = state.bundle(agent_index)
+    while candidates:
+        neg_marginal, position, item, size = candidates[0]
+        if state.remaining(item) == 0:
+            heapq.heappop(candidates)
+        elif size == len(bundle):
+            heapq.heappop(candidates)
+            return item, -neg_marginal
+        else:
+            marginal = agent.valuation(bundle + [items[item]]) - current_val
+            if marginal > 0:
+                heapq.heapreplace(candidates, (-marginal, position, item, len(bundle)))
+            else:
+                heapq.heappop(candidates)
+    return None, 0
+
+
+def round_robin(
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    storage: str = "matrix",
+    budget: AllocationBudget = None,
+):
     """Round Robin allocation algorithm.
 
-    In each round, give the playing agent one item they can add to their bundle that give them positive utility, if any
+    In each round, give the playing agent one item they can add to their bundle that give them positive utility, if any.
+    Every agent keeps a lazy-greedy list of candidate items, see pop_best_candidate.
 
     Args:
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        budget (AllocationBudget, optional): Defaults to None. Limits checked before every agent's turn, see
+            general_yankee_swap_events.
 
     Returns:
-         X (type[np.ndarray]): allocation matrix
+         X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
     """
     players = list(range(len(agents)))
-    X = initialize_allocation_matrix(items, agents)
-    while len(players) > 0:
+    X = initialize_allocation_storage(items, agents, storage)
+    state = AllocationState(X, items)
+    candidates = [None] * len(agents)
+    values = [None] * len(agents)
+    stopped = False
+    while len(players) > 0 and not stopped:
         for player in players:
-            val = 0
-            current_item = []
+            if budget is not None:
+                if budget.exhausted():
+                    budget.stop(players)
+                    stopped = True
+                    break
+                budget.next_iteration()
             agent = agents[player]
-            desired_items = agent.get_desired_items_indexes(items)
-            bundle = get_bundle_from_allocation_matrix(X, items, player)
-            for item in desired_items:
-                if X[item, len(agents)] > 0:
-                    current_val = agent.marginal_contribution(bundle, items[item])
-                    if current_val > val:
-                        current_item.clear()
-                        current_item.append(item)
-                        val = current_val
-            if len(current_item) > 0:
-                X[current_item[0], player] = 1
-                X[current_item[0], len(agents)] -= 1
+            if candidates[player] is None:
+                # unknown marginals sort first, in order of preference
+                candidates[player] = [
+                    (float("-inf"), position, item, -1)
+                    for position, item in enumerate(
+                        agent.get_desired_items_indexes(items)
+                    )
+                ]
+                values[player] = agent.valuation(state.bundle(player))
+            item, marginal = pop_best_candidate(
+                agent, items, state, player, candidates[player], values[player]
+            )
+            if item is not None:
+                state.allocate(item, player)
+                values[player] += marginal
             else:
                 players.remove(player)
     return X
@@ -625,12 +1350,251 @@ def round_robin_weights(
     return X
 
 
+class YankeeSwapEvent:
+    """Record of one Yankee swap iteration, as yielded by general_yankee_swap_events"""
+
+    def __init__(
+        self,
+        iteration: int,
+        agent: int,
+        path_length: int,
+        agents_involved: int,
+        elapsed: float,
+        gain: float,
+        selection_time: float,
+        X,
+    ):
+        """
+        Args:
+            iteration (int): number of the iteration, starting at 0. Players retired in bulk share the iteration that retired them.
+            agent (int): index of the agent picked, or retired
+            path_length (int): number of items on the transfer path, 0 if no path was found
+            agents_involved (int): number of agents involved in the transfer path, 0 if no path was found
+            elapsed (float): time elapsed since the start of the run, excluding time spent outside the generator
+            gain (float): gain function value of the agent after the iteration, -inf if the agent was retired
+            selection_time (float): time spent picking the agent
+            X (type[np.ndarray] | BaseAllocation): allocation matrix or storage, updated in place as the run continues
+        """
+        self.iteration = iteration
+        self.agent = agent
+        self.path_length = path_length
+        self.agents_involved = agents_involved
+        self.elapsed = elapsed
+        self.gain = gain
+        self.selection_time = selection_time
+        self.X = X
+
+    def __repr__(self):
+        return (
+            f"YankeeSwapEvent(iteration={self.iteration}, agent={self.agent}, "
+            f"path_length={self.path_length}, agents_involved={self.agents_involved}, "
+            f"elapsed={self.elapsed}, gain={self.gain})"
+        )
+
+
+def collect_yankee_swap_events(
+    events,
+    return_selection_times: bool = False,
+    verbose: bool = False,
+    return_utilities: bool = False,
+):
+    """Run a Yankee swap event generator to completion.
+
+    Args:
+        events (Generator): generator returned by general_yankee_swap_events or general_yankee_swap_E_events
+        return_selection_times (bool, optional): Defaults to False. Change to True to also return the time spent picking the agent in every iteration.
+        verbose (bool, optional): Defaults to False. Change to True to print the iteration number as the run progresses.
+        return_utilities (bool, optional): Defaults to False. Change to True to also return the final utility of every agent.
+
+    Returns:
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
+        time_steps (list[float]): time elapsed until the end of every iteration
+        agents_involved_arr (list[int]): nuber of agents involved in every iteration
+        selection_times (list[float]): time spent picking the agent in every iteration, only if return_selection_times is True
+        utility_vector (np.ndarray): utility of every agent, only if return_utilities is True
+    """
+    while True:
+        try:
+            event = next(events)
+        except StopIteration as stop:
+            X, time_steps, agents_involved_arr, selection_times, utility_vector = (
+                stop.value
+            )
+            break
+        if verbose:
+            print("Iteration: %d" % event.iteration, end="\r")
+    result = (X, time_steps, agents_involved_arr)
+    if return_selection_times:
+        result += (selection_times,)
+    if return_utilities:
+        result += (utility_vector,)
+    return result
+
+
+def search_transfer_path(
+    X: type[np.ndarray],
+    G: type[nx.Graph],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_picked: int,
+    profiler: AllocationProfiler = None,
+    plot_exchange_graph: bool = False,
+):
+    """Find a shortest transfer path for the picked agent.
+
+    The agent's node is added to the exchange graph, searched from and removed again.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        G (type[nx.Graph]): exchange graph
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agent_picked (int): index of the agent currently playing
+        profiler (AllocationProfiler, optional): receives the time spent in the "add_agent" and "search" phases.
+            Defaults to None.
+        plot_exchange_graph (bool, optional): Defaults to False. Change to True to display the exchange graph plot once
+            the agent's node is added.
+
+    Returns:
+        G (type[nx.Graph]): exchange graph, without the agent's node
+        list[int] | bool: shortest path, see find_shortest_path, or False if there is none
+    """
+    if profiler is None:
+        profiler = AllocationProfiler(enabled=False)
+    source, sink = get_exchange_graph_terminals(G)
+    with profiler.phase("add_agent"):
+        G = add_agent_to_exchange_graph(X, G, agents, items, agent_picked)
+    if plot_exchange_graph:
+        draw_exchange_graph(G)
+    with profiler.phase("search"):
+        path = find_shortest_path(G, source, sink)
+        G.remove_node(source)
+    return G, path
+
+
+def yankee_swap_step(
+    X: type[np.ndarray],
+    G: type[nx.Graph],
+    E: EdgeStore,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_picked: int,
+    players: AgentPriorityQueue,
+    gain_vector: list[float],
+    utility_vector: list[int],
+    criteria: str = "LorenzDominance",
+    weights: list[float] = [],
+    path: list[int] = None,
+    plot_exchange_graph: bool = False,
+    verify_utilities: bool = False,
+    profiler: AllocationProfiler = None,
+    executor: Executor = None,
+    parallel_threshold: int = 8,
+    agent_types: list[int] = None,
+    free_items: set[int] = None,
+):
+    """Play one Yankee swap iteration for the picked agent.
+
+    Unless a path is given, one is searched for, see search_transfer_path. Without a path, the agent stops playing.
+    Otherwise the transfers are made and the exchange graph updated, and the agent's utility is raised by one and its
+    gain updated. This is the iteration of general_yankee_swap_events when E is None, with the exchange graph updated
+    from bundles, see update_exchange_graph, and that of general_yankee_swap_E_events and OnlineYankeeSwap otherwise,
+    with the edge store kept up to date, see update_exchange_graph_E.
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state, updated in place
+        G (type[nx.Graph]): exchange graph
+        E (EdgeStore): agents responsible for each edge of the exchange graph, or None
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        agent_picked (int): index of the agent currently playing
+        players (AgentPriorityQueue): agents still playing, updated in place
+        gain_vector (list[float]): gain of every agent, updated in place
+        utility_vector (list[int]): utility of every agent, updated in place
+        criteria (str, optional): gain function criteria, see get_gain_function. Defaults to "LorenzDominance".
+        weights (list[float], optional): list of agents assigned weights. Defaults to [].
+        path (list[int], optional): transfer path found beforehand, or False if there is none. Defaults to None, to
+            search for it.
+        plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after
+            every modification to it.
+        verify_utilities (bool, optional): Defaults to False. Change to True to recompute the picked agent's utility
+            after the transfer, and fail if it differs from the one kept.
+        profiler (AllocationProfiler, optional): receives the time spent in the "add_agent", "search",
+            "update_allocation", "update_exchange_graph" and "gain" phases, and the counters of update_allocation_E and
+            update_exchange_graph_E. Defaults to None.
+        executor (Executor, optional): see update_exchange_graph_E. Defaults to None.
+        parallel_threshold (int, optional): see update_exchange_graph_E. Defaults to 8.
+        agent_types (list[int], optional): see update_exchange_graph_E. Defaults to None.
+        free_items (set[int], optional): see update_exchange_graph_E. Defaults to None.
+
+    Raises:
+        RuntimeError: a utility differs from its recomputation, only if verify_utilities is True
+
+    Returns:
+        G (type[nx.Graph]): updated exchange graph
+        E (EdgeStore): updated edge store, or None
+        list[int] | bool: transfer path, or False if there is none
+        list[int]: indices of the agents involved in the transfer path, empty if there is none
+    """
+    if profiler is None:
+        profiler = AllocationProfiler(enabled=False)
+    if path is None:
+        G, path = search_transfer_path(
+            X, G, agents, items, agent_picked, profiler, plot_exchange_graph
+        )
+    if path == False:
+        players.remove(agent_picked)
+        gain_vector[agent_picked] = float("-inf")
+        return G, E, path, []
+
+    if E is None:
+        X, agents_involved = update_allocation(X, agents, items, path, agent_picked)
+        G = update_exchange_graph(X, G, agents, items, path, agents_involved)
+    else:
+        with profiler.phase("update_allocation"):
+            X, G, E, agents_involved = update_allocation_E(
+                X, G, E, agents, items, path, agent_picked, profiler
+            )
+        with profiler.phase("update_exchange_graph"):
+            G, E = update_exchange_graph_E(
+                X,
+                G,
+                E,
+                agents,
+                items,
+                path,
+                agents_involved,
+                profiler=profiler,
+                executor=executor,
+                parallel_threshold=parallel_threshold,
+                agent_types=agent_types,
+                free_items=free_items,
+            )
+    with profiler.phase("gain"):
+        utility_vector[agent_picked] += 1
+        if verify_utilities:
+            check_utility(X, agents, items, agent_picked, utility_vector)
+        gain_vector[agent_picked] = get_gain_from_utility(
+            utility_vector[agent_picked], agent_picked, criteria, weights
+        )
+        players.update(agent_picked, gain_vector[agent_picked])
+    if plot_exchange_graph:
+        draw_exchange_graph(G)
+    return G, E, path, agents_involved
+
+
 def general_yankee_swap(
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     criteria: str = "LorenzDominance",
     weights: list[float] = [],
     plot_exchange_graph: bool = False,
+    storage: str = "matrix",
+    return_selection_times: bool = False,
+    verbose: bool = False,
+    return_utilities: bool = False,
+    verify_utilities: bool = False,
+    budget: AllocationBudget = None,
 ):
     """General Yankee swap allocation algorithm.
 
@@ -640,51 +1604,134 @@ def general_yankee_swap(
         criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
         weights (list[float]): list of agents assigned weights
         plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        return_selection_times (bool, optional): Defaults to False. Change to True to also return the time spent picking the agent in every iteration.
+        verbose (bool, optional): Defaults to False. Change to True to print the iteration number as the run progresses.
+        return_utilities (bool, optional): Defaults to False. Change to True to also return the final utility of every agent.
+        verify_utilities (bool, optional): see general_yankee_swap_events. Defaults to False.
+        budget (AllocationBudget, optional): see general_yankee_swap_events. Defaults to None.
+
+    Raises:
+        RuntimeError: a utility differs from its recomputation, only if verify_utilities is True
 
     Returns:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
         time_steps (list[float]): time elapsed until the end of every iteration
         agents_involved_arr (list[int]): nuber of agents involved in every iteration
+        selection_times (list[float]): time spent picking the agent in every iteration, only if return_selection_times is True
+        utility_vector (np.ndarray): utility of every agent, only if return_utilities is True
+    """
+    events = general_yankee_swap_events(
+        agents,
+        items,
+        criteria=criteria,
+        weights=weights,
+        plot_exchange_graph=plot_exchange_graph,
+        storage=storage,
+        verify_utilities=verify_utilities,
+        budget=budget,
+    )
+    return collect_yankee_swap_events(
+        events,
+        return_selection_times=return_selection_times,
+        verbose=verbose,
+        return_utilities=return_utilities,
+    )
+
+
+def general_yankee_swap_events(
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    criteria: str = "LorenzDominance",
+    weights: list[float] = [],
+    plot_exchange_graph: bool = False,
+    storage: str = "matrix",
+    verify_utilities: bool = False,
+    budget: AllocationBudget = None,
+):
+    """General Yankee swap allocation algorithm, one event per iteration.
+
+    The run advances only as events are consumed, so it can be monitored or stopped at any point.
+    Valuations are assumed to be matroid rank functions, so that every transfer path raises the picked agent's
+    utility by exactly one and leaves everyone else's unchanged. Utilities are kept up to date this way rather than
+    recomputed from bundles.
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
+        weights (list[float]): list of agents assigned weights
+        plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        verify_utilities (bool, optional): Defaults to False. Change to True to recompute the picked agent's utility
+            after every transfer, and fail if it differs from the one kept.
+        budget (AllocationBudget, optional): Defaults to None. Wall-clock and iteration limits, checked before every
+            iteration. Once exhausted, the run stops with the allocation and utilities reached so far, and the players
+            left are recorded in the budget, see AllocationBudget.stop.
+
+    Raises:
+        RuntimeError: a utility differs from its recomputation, only if verify_utilities is True
+
+    Yields:
+        YankeeSwapEvent: record of the iteration
+
+    Returns:
+        tuple: X, time_steps, agents_involved_arr, selection_times and utility_vector as returned by general_yankee_swap
     """
     N = len(items)
     M = len(agents)
-    players = list(range(M))
-    X = initialize_allocation_matrix(items, agents)
+    X = initialize_allocation_storage(items, agents, storage)
+    state = AllocationState(X, items)
     G = initialize_exchange_graph(N)
     gain_vector = np.zeros([M])
+    utility_vector = np.zeros([M], dtype=int)
+    players = AgentPriorityQueue(gain_vector)
     count = 0
     time_steps = []
     agents_involved_arr = []
+    selection_times = []
     start = time.process_time()
     while len(players) > 0:
-        print("Iteration: %d" % count, end="\r")
+        if budget is not None:
+            if budget.exhausted():
+                budget.stop(list(players))
+                break
+            budget.next_iteration()
         count += 1
-        agent_picked = np.argmax(gain_vector)
-        G = add_agent_to_exchange_graph(X, G, agents, items, agent_picked)
-        if plot_exchange_graph:
-            nx.draw(G, with_labels=True)
-            plt.show()
-
-        path = find_shortest_path(G, "s", "t")
-        G.remove_node("s")
-
-        if path == False:
-            players.remove(agent_picked)
-            gain_vector[agent_picked] = float("-inf")
-            time_steps.append(time.process_time() - start)
-            agents_involved_arr.append(0)
-        else:
-            X, agents_involved = update_allocation(X, agents, items, path, agent_picked)
-            G = update_exchange_graph(X, G, agents, items, path, agents_involved)
-            gain_vector[agent_picked] = get_gain_function(
-                X, agents, items, agent_picked, criteria, weights
-            )
-            if plot_exchange_graph:
-                nx.draw(G, with_labels=True)
-                plt.show()
-            time_steps.append(time.process_time() - start)
-            agents_involved_arr.append(len(agents_involved))
-    return X, time_steps, agents_involved_arr
+        selection_start = time.process_time()
+        agent_picked = players.peek()
+        selection_times.append(time.process_time() - selection_start)
+        G, _, path, agents_involved = yankee_swap_step(
+            state,
+            G,
+            None,
+            agents,
+            items,
+            agent_picked,
+            players,
+            gain_vector,
+            utility_vector,
+            criteria=criteria,
+            weights=weights,
+            plot_exchange_graph=plot_exchange_graph,
+            verify_utilities=verify_utilities,
+        )
+        time_steps.append(time.process_time() - start)
+        agents_involved_arr.append(len(agents_involved))
+
+        pause = time.process_time()
+        yield YankeeSwapEvent(
+            count - 1,
+            agent_picked,
+            len(path) - 2 if path else 0,
+            agents_involved_arr[-1],
+            time_steps[-1],
+            gain_vector[agent_picked],
+            selection_times[-1],
+            X,
+        )
+        start += time.process_time() - pause
+    return X, time_steps, agents_involved_arr, selection_times, utility_vector
 
 
 def general_yankee_swap_E(
@@ -693,6 +1740,28 @@ def general_yankee_swap_E(
     criteria: str = "LorenzDominance",
     weights: list = [],
     plot_exchange_graph: bool = False,
+    backend: str = "networkx",
+    storage: str = "matrix",
+    return_selection_times: bool = False,
+    bulk_retire: bool = False,
+    batch_size: int = 1,
+    verify_batches: bool = False,
+    checkpoint_path: str = None,
+    checkpoint_every: int = 0,
+    resume_from: str = None,
+    verbose: bool = False,
+    profiler: AllocationProfiler = None,
+    return_utilities: bool = False,
+    verify_utilities: bool = False,
+    initial_allocation: type[np.ndarray] = None,
+    initial_players: list[int] = None,
+    initial_gains: list[float] = None,
+    executor: Executor = None,
+    parallel_threshold: int = 8,
+    agent_types: list[int] = None,
+    free_items: set[int] = None,
+    retire_saturated: bool = False,
+    budget: AllocationBudget = None,
 ):
     """General Yankee swap allocation algorithm, edge matrix version.
 
@@ -704,53 +1773,377 @@ def general_yankee_swap_E(
         criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
         weights (list[float]): list of agents assigned weights
         plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        backend (str, optional): exchange graph implementation, see general_yankee_swap_E_events. Defaults to "networkx".
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        return_selection_times (bool, optional): Defaults to False. Change to True to also return the time spent picking the agent in every iteration.
+        bulk_retire (bool, optional): see general_yankee_swap_E_events. Defaults to False.
+        batch_size (int, optional): see general_yankee_swap_E_events. Defaults to 1.
+        verify_batches (bool, optional): see general_yankee_swap_E_events. Defaults to False.
+        checkpoint_path (str, optional): see general_yankee_swap_E_events. Defaults to None.
+        checkpoint_every (int, optional): see general_yankee_swap_E_events. Defaults to 0.
+        resume_from (str, optional): see general_yankee_swap_E_events. Defaults to None.
+        verbose (bool, optional): Defaults to False. Change to True to print the iteration number as the run progresses.
+        profiler (AllocationProfiler, optional): see general_yankee_swap_E_events. Defaults to None.
+        return_utilities (bool, optional): Defaults to False. Change to True to also return the final utility of every agent.
+        verify_utilities (bool, optional): see general_yankee_swap_E_events. Defaults to False.
+        initial_allocation (type[np.ndarray] | BaseAllocation, optional): see general_yankee_swap_E_events. Defaults to None.
+        initial_players (list[int], optional): see general_yankee_swap_E_events. Defaults to None.
+        initial_gains (list[float], optional): see general_yankee_swap_E_events. Defaults to None.
+        executor (Executor, optional): see general_yankee_swap_E_events. Defaults to None.
+        parallel_threshold (int, optional): see general_yankee_swap_E_events. Defaults to 8.
+        agent_types (list[int], optional): see general_yankee_swap_E_events. Defaults to None.
+        free_items (set[int], optional): see general_yankee_swap_E_events. Defaults to None.
+        retire_saturated (bool, optional): see general_yankee_swap_E_events. Defaults to False.
+        budget (AllocationBudget, optional): see general_yankee_swap_events. Defaults to None.
+
+    Raises:
+        ValueError: batch_size larger than 1 requires the "array" backend
+        ValueError: a run cannot both resume from a checkpoint and start from an initial allocation
+        RuntimeError: a pending path differs from the sequential one, only if verify_batches is True
+        RuntimeError: a utility differs from its recomputation, only if verify_utilities is True
 
     Returns:
-        X (type[np.ndarray]): allocation matrix
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
         time_steps (list[float]): time elapsed until the end of every iteration
         agents_involved_arr (list[int]): nuber of agents involved in every iteration
+        selection_times (list[float]): time spent picking the agent in every iteration, only if return_selection_times is True
+        utility_vector (np.ndarray): utility of every agent, only if return_utilities is True
     """
-    N = len(items)
-    M = len(agents)
-    players = list(range(M))
-    X = initialize_allocation_matrix(items, agents)
-    G = initialize_exchange_graph(N)
-    E = [[[] for i in range(N)] for j in range(N)]
-    gain_vector = np.zeros([M])
-    count = 0
-    time_steps = []
-    agents_involved_arr = []
-    start = time.process_time()
-    while len(players) > 0:
-        print("Iteration: %d" % count, end="\r")
-        count += 1
-        agent_picked = np.argmax(gain_vector)
-        G = add_agent_to_exchange_graph(X, G, agents, items, agent_picked)
-        if plot_exchange_graph:
-            nx.draw(G, with_labels=True)
-            plt.show()
+    events = general_yankee_swap_E_events(
+        agents,
+        items,
+        criteria=criteria,
+        weights=weights,
+        plot_exchange_graph=plot_exchange_graph,
+        backend=backend,
+        storage=storage,
+        bulk_retire=bulk_retire,
+        batch_size=batch_size,
+        verify_batches=verify_batches,
+        checkpoint_path=checkpoint_path,
+        checkpoint_every=checkpoint_every,
+        resume_from=resume_from,
+        profiler=profiler,
+        verify_utilities=verify_utilities,
+        initial_allocation=initial_allocation,
+        initial_players=initial_players,
+        initial_gains=initial_gains,
+        executor=executor,
+        parallel_threshold=parallel_threshold,
+        agent_types=agent_types,
+        free_items=free_items,
+        retire_saturated=retire_saturated,
+        budget=budget,
+    )
+    return collect_yankee_swap_events(
+        events,
+        return_selection_times=return_selection_times,
+        verbose=verbose,
+        return_utilities=return_utilities,
+    )
 
-        path = find_shortest_path(G, "s", "t")
-        G.remove_node("s")
 
+def general_yankee_swap_E_events(
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    criteria: str = "LorenzDominance",
+    weights: list = [],
+    plot_exchange_graph: bool = False,
+    backend: str = "networkx",
+    storage: str = "matrix",
+    bulk_retire: bool = False,
+    batch_size: int = 1,
+    verify_batches: bool = False,
+    checkpoint_path: str = None,
+    checkpoint_every: int = 0,
+    resume_from: str = None,
+    profiler: AllocationProfiler = None,
+    verify_utilities: bool = False,
+    initial_allocation: type[np.ndarray] = None,
+    initial_players: list[int] = None,
+    initial_gains: list[float] = None,
+    executor: Executor = None,
+    parallel_threshold: int = 8,
+    agent_types: list[int] = None,
+    free_items: set[int] = None,
+    retire_saturated: bool = False,
+    budget: AllocationBudget = None,
+):
+    """General Yankee swap allocation algorithm, edge matrix version, one event per iteration.
+
+    The run advances only as events are consumed, so it can be monitored or stopped at any point.
+    As in general_yankee_swap_events, utilities are kept up to date rather than recomputed from bundles.
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
+        weights (list[float]): list of agents assigned weights
+        plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        backend (str, optional): exchange graph implementation, "networkx", "array", "incremental", "bipartite" or
+            "lazy". Defaults to "networkx". The "networkx" and "array" backends produce the same allocation; "array" is
+            faster for large instances. The "incremental" backend finds transfer paths of the same length, but breaks
+            ties between them differently, so only the utility of every agent is the same as with "networkx", not the
+            allocation itself: whether a player can gain depends only on the current utilities, not on the bundles that
+            realize them. The "bipartite" backend links items through the agents holding them, see
+            BipartiteExchangeGraph. The "lazy" backend builds the edges leaving an item only when a search expands it,
+            and builds them again only once the bundle of one of the item's owners has changed, see LazyExchangeGraph,
+            so items no search reaches are never evaluated. The "bipartite" and "lazy" backends produce the same
+            allocation, with a forward search that visits items in increasing order; as with "incremental", only the
+            utilities are the same as with "networkx".
+        storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+        bulk_retire (bool, optional): Defaults to False. Change to True to retire, after every failed search, all players that can
+            no longer reach the sink. Each retired player is recorded as a failed iteration, so only the order of time_steps changes.
+        batch_size (int, optional): Defaults to 1. With a larger value and the "array" backend, whenever a player without a
+            pending path is picked, paths are searched speculatively for up to batch_size players tied at the highest gain on
+            the same graph. Tied players are still picked and their transfers applied one per iteration, and a pending path
+            is executed without a new search as long as no earlier transfer touched the part of the graph its search
+            explored or the player's bundle. The allocation and the number of iterations are the same as with batch_size 1;
+            only sequential searches are saved, while every speculative path invalidated by an earlier transfer is a wasted
+            search, so larger batches are not always faster. The profiler counts "speculative_searches" and
+            "speculative_paths_used".
+        verify_batches (bool, optional): Defaults to False. Change to True to also search again before executing every
+            pending path, and fail if the paths differ. Meant for checking small instances.
+        checkpoint_path (str, optional): file to write the complete state of the run to, see save_checkpoint. Defaults to None.
+        checkpoint_every (int, optional): number of iterations between checkpoints. Defaults to 0, for no checkpoints.
+            Time spent writing checkpoints is left out of time_steps.
+        resume_from (str, optional): checkpoint file to continue a run from instead of starting a new one. Defaults to None.
+            The agents, items, criteria and weights must be those of the original run; backend and storage are taken from
+            the checkpoint. The allocation is the same as that of an uninterrupted run.
+        profiler (AllocationProfiler, optional): Defaults to None. An enabled profiler records, for every iteration, the time
+            spent in the "selection", "speculation", "add_agent", "search", "update_allocation", "update_exchange_graph",
+            "gain", "retire" and "checkpoint" phases and in valuation "oracle" calls, and counts "edges_added",
+            "edges_removed", "oracle_calls", one "<method>_calls" counter per valuation method, see
+            AllocationProfiler.wrap_agents, and, with the "array", "incremental", "bipartite" and "lazy" backends,
+            "nodes_expanded". With the "lazy" backend, it also counts expanded items whose edges were built as
+            "edge_cache_misses" and those whose edges were still valid as "edge_cache_hits".
+        verify_utilities (bool, optional): Defaults to False. Change to True to recompute the picked agent's utility
+            after every transfer, and fail if it differs from the one kept.
+        initial_allocation (type[np.ndarray] | BaseAllocation, optional): Defaults to None. Allocation to continue from
+            instead of an empty one, for instance that of an earlier registration wave. It may cover fewer agents than
+            agents, in which case the extra agents own nothing. It is copied into the given storage, and the exchange
+            graph and edge store are built for it at once, see initialize_exchange_graph_E.
+        initial_players (list[int], optional): Defaults to None, for all agents. Indices of the agents that play when
+            starting from initial_allocation. Passing only the agents that joined since the earlier wave keeps the cost
+            of the run to what they require.
+        initial_gains (list[float], optional): Defaults to None. Gain of every agent when starting from
+            initial_allocation. By default, the gain is derived from the agent's utility as in get_gain_function, except
+            that agents who own nothing start at 0 as they would in a new run.
+        executor (Executor, optional): Defaults to None. Pool to find the exchanges of the agents involved in a transfer
+            with, see update_exchange_graph_E. The allocation is the same as without one.
+        parallel_threshold (int, optional): smallest number of agents involved in a transfer for which the executor is
+            used. Defaults to 8.
+        agent_types (list[int], optional): Defaults to None. Type of every agent, as returned by deduplicate_agents,
+            letting agents of the same type share exchanges, see update_exchange_graph_E. The allocation is the same as
+            without them.
+        free_items (set[int], optional): Defaults to None. Items that never run out, for instance with at least as many
+            copies as agents desiring them, see presolve. Their exchanges are skipped, see get_agent_exchanges, and the
+            allocation is the same as without them with the "networkx" and "array" backends.
+        retire_saturated (bool, optional): Defaults to False. Change to True to find every agent's highest utility once,
+            see get_max_utility_vector, and retire a player as soon as its utility reaches it, without searching for a
+            transfer path it cannot have. Each retired player is recorded as a failed iteration, so the allocation is
+            the same and only the order of time_steps changes. Retired players are counted as "saturated" by the profiler.
+        budget (AllocationBudget, optional): see general_yankee_swap_events. Defaults to None.
+
+    Raises:
+        ValueError: batch_size larger than 1 requires the "array" backend
+        ValueError: a run cannot both resume from a checkpoint and start from an initial allocation
+        RuntimeError: a pending path differs from the sequential one, only if verify_batches is True
+        RuntimeError: a utility differs from its recomputation, only if verify_utilities is True
+
+    Yields:
+        YankeeSwapEvent: record of the iteration, or of a player retired in bulk
+
+    Returns:
+        tuple: X, time_steps, agents_involved_arr, selection_times and utility_vector as returned by general_yankee_swap_E
+    """
+    if resume_from is not None and initial_allocation is not None:
+        raise ValueError("cannot resume from a checkpoint and an initial allocation")
+    if resume_from is None and initial_allocation is None:
+        N = len(items)
+        M = len(agents)
+        X = initialize_allocation_storage(items, agents, storage)
+        E = EdgeStore()
+        G = initialize_exchange_graph(N, backend, E)
+        gain_vector = np.zeros([M])
+        players = AgentPriorityQueue(gain_vector)
+        count = 0
+        time_steps = []
+        agents_involved_arr = []
+        selection_times = []
+    elif resume_from is None:
+        M = len(agents)
+        X = copy_allocation_storage(initial_allocation, items, agents, storage)
+        G, E = initialize_exchange_graph_E(X, agents, items, backend, free_items)
+        if initial_gains is None:
+            initial_gains = get_gain_vector(X, agents, items, criteria, weights)
+        gain_vector = np.array(initial_gains, dtype=float)
+        players = AgentPriorityQueue(gain_vector)
+        if initial_players is not None:
+            for agent_index in set(range(M)).difference(initial_players):
+                players.remove(agent_index)
+                gain_vector[agent_index] = float("-inf")
+        count = 0
+        time_steps = []
+        agents_involved_arr = []
+        selection_times = []
+    else:
+        checkpoint = load_checkpoint(resume_from)
+        X, G, E = checkpoint["X"], checkpoint["G"], checkpoint["E"]
+        gain_vector, players = checkpoint["gain_vector"], checkpoint["players"]
+        utility_vector = checkpoint["utility_vector"]
+        count = checkpoint["count"]
+        time_steps = checkpoint["time_steps"]
+        agents_involved_arr = checkpoint["agents_involved_arr"]
+        selection_times = checkpoint["selection_times"]
+        backend = checkpoint["backend"]
+    if batch_size > 1 and backend != "array":
+        raise ValueError("batch_size larger than 1 requires the array backend")
+    if profiler is None:
+        profiler = AllocationProfiler(enabled=False)
+    agents = profiler.wrap_agents(agents)
+    if isinstance(G, (ArrayExchangeGraph, BipartiteExchangeGraph)):
+        expanded = G.nodes_expanded
+    else:
+        expanded = None
+    state = AllocationState(X, items)
+    if isinstance(G, LazyExchangeGraph):
+        G.bind(
+            state.owners, partial(get_item_exchanges, state, agents, items), profiler
+        )
+    if resume_from is None and initial_allocation is None:
+        utility_vector = np.zeros([M], dtype=int)
+    elif resume_from is None:
+        utility_vector = get_utility_vector(state, agents, items)
+    if retire_saturated:
+        max_utilities = get_max_utility_vector(agents, items)
+    pending = {}
+    start = time.process_time() - (time_steps[-1] if time_steps else 0)
+    while len(players) > 0:
+        if budget is not None:
+            if budget.exhausted():
+                budget.stop(list(players))
+                break
+            budget.next_iteration()
+        count += 1
+        selection_start = time.process_time()
+        agent_picked = players.peek()
+        selection_times.append(time.process_time() - selection_start)
+        profiler.add_time("selection", selection_times[-1])
+        # agents that start saturated, with nothing to gain or a full initial bundle
+        saturated = (
+            retire_saturated
+            and utility_vector[agent_picked] >= max_utilities[agent_picked]
+        )
+        if saturated:
+            profiler.count("saturated")
+        if not saturated and batch_size > 1 and agent_picked not in pending:
+            with profiler.phase("speculation"):
+                pending = speculate_transfer_paths(
+                    state, G, agents, items, players.peek_ties(batch_size)
+                )
+            profiler.count("speculative_searches", len(pending))
+        path, footprint = pending.pop(agent_picked, (False, None))
+        reused = not saturated and footprint is not None and G.is_unchanged(footprint)
+        if reused:
+            profiler.count("speculative_paths_used")
+            if verify_batches:
+                G, sequential_path = search_transfer_path(
+                    state, G, agents, items, agent_picked, profiler, plot_exchange_graph
+                )
+                if sequential_path != path:
+                    raise RuntimeError(
+                        "pending path %s of agent %d differs from sequential path %s"
+                        % (path, agent_picked, sequential_path)
+                    )
+        elif not saturated:
+            path = None
+
+        retired = []
+        G, E, path, agents_involved = yankee_swap_step(
+            state,
+            G,
+            E,
+            agents,
+            items,
+            agent_picked,
+            players,
+            gain_vector,
+            utility_vector,
+            criteria=criteria,
+            weights=weights,
+            path=path,
+            plot_exchange_graph=plot_exchange_graph,
+            verify_utilities=verify_utilities,
+            profiler=profiler,
+            executor=executor,
+            parallel_threshold=parallel_threshold,
+            agent_types=agent_types,
+            free_items=free_items,
+        )
+        time_steps.append(time.process_time() - start)
+        agents_involved_arr.append(len(agents_involved))
         if path == False:
-            players.remove(agent_picked)
-            gain_vector[agent_picked] = float("-inf")
-            time_steps.append(time.process_time() - start)
-            agents_involved_arr.append(0)
+            if bulk_retire:
+                with profiler.phase("retire"):
+                    retired = find_stranded_agents(state, G, agents, items, players)
+                for agent_index in retired:
+                    players.remove(agent_index)
+                    gain_vector[agent_index] = float("-inf")
+                    time_steps.append(time.process_time() - start)
+                    agents_involved_arr.append(0)
         else:
-            X, G, E, agents_involved = update_allocation_E(
-                X, G, E, agents, items, path, agent_picked
-            )
-            G, E = update_exchange_graph_E(
-                X, G, E, agents, items, path, agents_involved
-            )
-            gain_vector[agent_picked] = get_gain_function(
-                X, agents, items, agent_picked, criteria, weights
+            for agent_index in agents_involved:
+                pending.pop(agent_index, None)
+            if (
+                retire_saturated
+                and utility_vector[agent_picked] >= max_utilities[agent_picked]
+            ):
+                profiler.count("saturated")
+                players.remove(agent_picked)
+                gain_vector[agent_picked] = float("-inf")
+                pending.pop(agent_picked, None)
+                time_steps.append(time.process_time() - start)
+                agents_involved_arr.append(0)
+                retired = [agent_picked]
+        if checkpoint_path is not None and checkpoint_every > 0:
+            if count % checkpoint_every == 0:
+                checkpoint_start = time.process_time()
+                save_checkpoint(
+                    checkpoint_path,
+                    X,
+                    G,
+                    E,
+                    gain_vector,
+                    utility_vector,
+                    players,
+                    time_steps,
+                    agents_involved_arr,
+                    selection_times,
+                    count,
+                )
+                start += time.process_time() - checkpoint_start
+                profiler.add_time("checkpoint", time.process_time() - checkpoint_start)
+        if expanded is not None:
+            profiler.count("nodes_expanded", G.nodes_expanded - expanded)
+            expanded = G.nodes_expanded
+        profiler.next_iteration()
+
+        pause = time.process_time()
+        steps = len(retired) + 1
+        yield YankeeSwapEvent(
+            count - 1,
+            agent_picked,
+            len(path) - 2 if path else 0,
+            agents_involved_arr[-steps],
+            time_steps[-steps],
+            gain_vector[agent_picked],
+            selection_times[-1],
+            X,
+        )
+        for agent_index, elapsed in zip(retired, time_steps[-len(retired) :]):
+            yield YankeeSwapEvent(
+                count - 1, agent_index, 0, 0, elapsed, float("-inf"), 0, X
             )
-            if plot_exchange_graph:
-                nx.draw(G, with_labels=True)
-                plt.show()
-            time_steps.append(time.process_time() - start)
-            agents_involved_arr.append(len(agents_involved))
-    return X, time_steps, agents_involved_arr
+        start += time.process_time() - pause
+    return X, time_steps, agents_involved_arr, selection_times, utility_vector
@@ -0,0 +1,58 @@
+from .agent import BaseAgent
+from .allocation import fill_remaining, get_utility_vector
+from .budget import AllocationBudget
+from .item import ScheduleItem
+
+
+def solve_anytime(
+    algorithm,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    time_limit: float = None,
+    max_iterations: int = None,
+    fallback: bool = False,
+    **kwargs,
+):
+    """Run an allocation algorithm within a wall-clock or iteration budget
+
+    The algorithm stops at the first iteration past the budget, and the allocation reached so far is
+    returned. With fallback, the capacity left is then filled by serial dictatorship over the agents
+    still playing, see fill_remaining. Agents that stopped playing before the budget ran out cannot
+    gain from any unallocated item, so only those still playing are served.
+
+    Args:
+        algorithm (Callable): allocation algorithm taking agents, items and a budget, such as
+            general_yankee_swap_E, round_robin or serial_dictatorship
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        time_limit (float, optional): wall-clock seconds, see AllocationBudget. Defaults to None, for no limit.
+        max_iterations (int, optional): number of iterations, see AllocationBudget. Defaults to None, for no limit.
+        fallback (bool, optional): Should the capacity left be filled when the budget runs out. Defaults to False.
+        **kwargs: passed on to the algorithm
+
+    Returns:
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
+        dict: "completed", whether the algorithm ran to the end; "iterations", the number of iterations run;
+            "elapsed", the wall-clock seconds spent; "active_fraction", the fraction of agents still playing when
+            the algorithm stopped; "fallback_items", the number of items allocated by the fallback; and
+            "utility_vector", the utility of every agent
+    """
+    budget = AllocationBudget(time_limit, max_iterations)
+    result = algorithm(agents, items, budget=budget, **kwargs)
+    X = result[0] if isinstance(result, tuple) else result
+    iterations = budget.iterations
+
+    fallback_items = 0
+    if fallback and budget.stopped:
+        fallback_items = fill_remaining(X, agents, items, budget.active)
+
+    stats = {
+        "completed": not budget.stopped,
+        "iterations": iterations,
+        "elapsed": budget.elapsed(),
+        "active_fraction": len(budget.active) / len(agents) if agents else 0.0,
+        "fallback_items": fallback_items,
+        "utility_vector": get_utility_vector(X, agents, items),
+    }
+
+    return X, stats
@@ -0,0 +1,58 @@
+import time
+
+
+class AllocationBudget:
+    """Wall-clock and iteration limits for an allocation run
+
+    Allocation algorithms check the budget at the start of every iteration, and stop there
+    once it is exhausted, so the allocation they return is feasible but may be incomplete.
+    The agents still playing at that point are recorded with stop.
+    """
+
+    def __init__(self, time_limit: float = None, max_iterations: int = None):
+        """
+        Args:
+            time_limit (float, optional): wall-clock seconds from start. Defaults to None, for no limit.
+            max_iterations (int, optional): number of iterations. Defaults to None, for no limit.
+        """
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations
+        self.start()
+
+    def start(self):
+        """Start the clock and the iteration count again"""
+        self._start = time.perf_counter()
+        self.iterations = 0
+        self.stopped = False
+        self.active = []
+
+    def elapsed(self):
+        """Wall-clock seconds since start
+
+        Returns:
+            float: elapsed time
+        """
+        return time.perf_counter() - self._start
+
+    def exhausted(self):
+        """Has either limit been reached
+
+        Returns:
+            bool: True if the run should stop; False otherwise
+        """
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return self.time_limit is not None and self.elapsed() >= self.time_limit
+
+    def next_iteration(self):
+        """Count an iteration"""
+        self.iterations += 1
+
+    def stop(self, active: list[int]):
+        """Record that the run stopped before every agent was done
+
+        Args:
+            active (list[int]): indices of the agents still playing
+        """
+        self.stopped = True
+        self.active = sorted(active)
@@ -0,0 +1,248 @@
+import os
+from graphlib import TopologicalSorter
+
+import networkx as nx
+import numpy as np
+
+from .graph import (
+    ArrayExchangeGraph,
+    BipartiteExchangeGraph,
+    EdgeStore,
+    LazyExchangeGraph,
+)
+from .priority import AgentPriorityQueue
+from .storage import BaseAllocation, DenseAllocation, SparseAllocation
+
+
+def save_checkpoint(
+    path: str,
+    X,
+    G,
+    E: EdgeStore,
+    gain_vector: type[np.ndarray],
+    utility_vector: type[np.ndarray],
+    players: AgentPriorityQueue,
+    time_steps: list[float],
+    agents_involved_arr: list[int],
+    selection_times: list[float],
+    count: int,
+):
+    """Write the complete state of a Yankee swap run to disk
+
+    Everything is stored as plain arrays in a single uncompressed .npz file. The file is
+    written next to path and then moved into place, so an interrupted write leaves the
+    previous checkpoint intact.
+
+    Args:
+        path (str): checkpoint file
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
+        G (nx.DiGraph | ArrayExchangeGraph | BipartiteExchangeGraph | LazyExchangeGraph): exchange graph, without the
+            source node
+        E (EdgeStore): agents responsible for each edge of the exchange graph
+        gain_vector (type[np.ndarray]): gain of every agent, -inf for retired agents
+        utility_vector (type[np.ndarray]): utility of every agent, so that resuming does not value every bundle again
+        players (AgentPriorityQueue): agents still playing
+        time_steps (list[float]): time elapsed until the end of every iteration
+        agents_involved_arr (list[int]): number of agents involved in every iteration
+        selection_times (list[float]): time spent picking the agent in every iteration
+        count (int): number of iterations run
+    """
+    arrays = {
+        "gain_vector": np.asarray(gain_vector, dtype=float),
+        "utility_vector": np.asarray(utility_vector, dtype=np.int64),
+        "players": np.array(list(players), dtype=np.int64),
+        "time_steps": np.array(time_steps, dtype=float),
+        "agents_involved": np.array(agents_involved_arr, dtype=np.int64),
+        "selection_times": np.array(selection_times, dtype=float),
+        "count": np.array(count),
+    }
+    arrays.update(_allocation_to_arrays(X))
+    arrays.update(_graph_to_arrays(G))
+    arrays.update({"edges_" + name: array for name, array in E.to_arrays().items()})
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fd:
+        np.savez(fd, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str):
+    """Read the state of a Yankee swap run written by save_checkpoint
+
+    Args:
+        path (str): checkpoint file
+
+    Returns:
+        dict: "X", "G", "E", "gain_vector", "utility_vector", "players", "time_steps", "agents_involved_arr",
+            "selection_times" and "count" as passed to save_checkpoint, together with the
+            "storage" and "backend" names they were created with
+    """
+    with np.load(path) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+
+    gain_vector = arrays["gain_vector"]
+    players = AgentPriorityQueue(gain_vector)
+    active = set(arrays["players"].tolist())
+    for agent_index in range(len(gain_vector)):
+        if agent_index not in active:
+            players.remove(agent_index)
+
+    E = EdgeStore.from_arrays(
+        {
+            name[len("edges_") :]: array
+            for name, array in arrays.items()
+            if name.startswith("edges_")
+        }
+    )
+
+    return {
+        "X": _allocation_from_arrays(arrays),
+        "G": _graph_from_arrays(arrays, E),
+        "E": E,
+        "gain_vector": gain_vector,
+        "utility_vector": arrays["utility_vector"],
+        "players": players,
+        "time_steps": arrays["time_steps"].tolist(),
+        "agents_involved_arr": arrays["agents_involved"].tolist(),
+        "selection_times": arrays["selection_times"].tolist(),
+        "count": int(arrays["count"]),
+        "storage": str(arrays["storage"]),
+        "backend": str(arrays["backend"]),
+    }
+
+
+def _allocation_to_arrays(X):
+    """Allocated (item, agent) pairs and remaining capacities
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation): allocation matrix or storage
+
+    Returns:
+        dict[str, np.ndarray]: named arrays
+    """
+    if isinstance(X, DenseAllocation):
+        storage = "dense"
+    elif isinstance(X, SparseAllocation):
+        storage = "sparse"
+    else:
+        storage = "matrix"
+    if isinstance(X, BaseAllocation):
+        item_idxs, agent_idxs = X.nonzero()
+        capacity = X.capacity
+    else:
+        item_idxs, agent_idxs = np.nonzero(X[:, :-1])
+        capacity = X[:, -1]
+    return {
+        "storage": np.array(storage),
+        "num_agents": np.array(X.shape[1] - 1),
+        "allocated_items": np.asarray(item_idxs, dtype=np.int64),
+        "allocated_agents": np.asarray(agent_idxs, dtype=np.int64),
+        "capacity": np.array(capacity, dtype=np.int64),
+    }
+
+
+def _allocation_from_arrays(arrays: dict):
+    """Rebuild allocation storage from the arrays of _allocation_to_arrays
+
+    Args:
+        arrays (dict[str, np.ndarray]): named arrays
+
+    Returns:
+        type[np.ndarray] | BaseAllocation: allocation matrix or storage
+    """
+    storage = str(arrays["storage"])
+    capacity = arrays["capacity"]
+    num_items = len(capacity)
+    num_agents = int(arrays["num_agents"])
+    if storage == "matrix":
+        X = np.zeros([num_items, num_agents + 1], dtype=int)
+        X[arrays["allocated_items"], arrays["allocated_agents"]] = 1
+        X[:, -1] = capacity
+        return X
+    if storage == "dense":
+        X = DenseAllocation(num_items, num_agents, capacity)
+    else:
+        X = SparseAllocation(num_items, num_agents, capacity)
+    for item_index, agent_index in zip(
+        arrays["allocated_items"].tolist(), arrays["allocated_agents"].tolist()
+    ):
+        X.set(item_index, agent_index, 1)
+    return X
+
+
+def _graph_to_arrays(G):
+    """Exchange graph edges, in an order that reproduces every node's neighbor order
+
+    Args:
+        G (nx.DiGraph | ArrayExchangeGraph | BipartiteExchangeGraph | LazyExchangeGraph): exchange graph, without the
+            source node
+
+    Returns:
+        dict[str, np.ndarray]: named arrays
+    """
+    if isinstance(G, BipartiteExchangeGraph):
+        backend = "lazy" if isinstance(G, LazyExchangeGraph) else "bipartite"
+        arrays = {"graph_" + name: array for name, array in G.to_arrays().items()}
+        arrays["backend"] = np.array(backend)
+        return arrays
+    if isinstance(G, ArrayExchangeGraph):
+        backend = "incremental" if G.track_distances else "array"
+        arrays = {"graph_" + name: array for name, array in G.to_arrays().items()}
+        arrays["backend"] = np.array(backend)
+        return arrays
+
+    # networkx keeps neighbors in insertion order, so edges must be re-added in an
+    # order consistent with every successor and predecessor list
+    N = G.number_of_nodes() - 1
+    order = TopologicalSorter()
+    for node in G:
+        for edges in [
+            [(node, nbr) for nbr in G.succ[node]],
+            [(nbr, node) for nbr in G.pred[node]],
+        ]:
+            for edge in edges:
+                order.add(edge)
+            for before, after in zip(edges, edges[1:]):
+                order.add(after, before)
+    edges = [
+        (N + 1 if u == "t" else u, N + 1 if v == "t" else v)
+        for u, v in order.static_order()
+    ]
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    return {
+        "backend": np.array("networkx"),
+        "graph_N": np.array(N),
+        "graph_tails": edges[:, 0],
+        "graph_heads": edges[:, 1],
+    }
+
+
+def _graph_from_arrays(arrays: dict, E: EdgeStore):
+    """Rebuild the exchange graph from the arrays of _graph_to_arrays
+
+    Args:
+        arrays (dict[str, np.ndarray]): named arrays
+        E (EdgeStore): edge store of the run, read by the "bipartite" backend
+
+    Returns:
+        nx.DiGraph | ArrayExchangeGraph | BipartiteExchangeGraph | LazyExchangeGraph: exchange graph
+    """
+    graph_arrays = {
+        name[len("graph_") :]: array
+        for name, array in arrays.items()
+        if name.startswith("graph_")
+    }
+    if str(arrays["backend"]) == "bipartite":
+        return BipartiteExchangeGraph.from_arrays(graph_arrays, E)
+    if str(arrays["backend"]) == "lazy":
+        return LazyExchangeGraph.from_arrays(graph_arrays)
+    if str(arrays["backend"]) != "networkx":
+        return ArrayExchangeGraph.from_arrays(graph_arrays)
+
+    N = int(graph_arrays["N"])
+    G = nx.DiGraph()
+    G.add_nodes_from(range(N))
+    G.add_node("t")
+    for u, v in zip(graph_arrays["tails"].tolist(), graph_arrays["heads"].tolist()):
+        G.add_edge("t" if u == N + 1 else u, "t" if v == N + 1 else v)
+    return G
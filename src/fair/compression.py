@@ -0,0 +1,273 @@
+import copy
+
+import numpy as np
+import scipy
+
+from .agent import BaseAgent, LegacyStudent
+from .item import BaseItem, ScheduleItem
+from .storage import BaseAllocation
+
+
+def _agent_constraints(agent: BaseAgent):
+    """Constraints of an agent's valuation, or None if they cannot be read
+
+    Args:
+        agent (BaseAgent): the agent
+
+    Returns:
+        list[LinearConstraint]: constraints of the valuation
+    """
+    if isinstance(agent, LegacyStudent):
+        return getattr(agent.student.valuation, "constraints", None)
+    return getattr(getattr(agent, "valuation", None), "constraints", None)
+
+
+def _column_keys(constraint, num_items: int):
+    """Hashable contents of the first columns of a constraint matrix
+
+    Args:
+        constraint (LinearConstraint): the constraint
+        num_items (int): number of columns, columns past the matrix are empty
+
+    Returns:
+        list[tuple]: row indices and entries of every column
+    """
+    A = scipy.sparse.csc_matrix(constraint.A)
+    A.sum_duplicates()
+    A.sort_indices()
+    keys = []
+    for item_index in range(num_items):
+        if item_index >= A.shape[1]:
+            keys.append(())
+            continue
+        span = slice(A.indptr[item_index], A.indptr[item_index + 1])
+        keys.append((A.indices[span].tobytes(), A.data[span].tobytes()))
+    return keys
+
+
+def _refine(labels: list, keys: list):
+    """Split classes of items by a key
+
+    Args:
+        labels (list[int]): class of every item
+        keys (list): key of every item
+
+    Returns:
+        list[int]: class of every item, items in the same class having had the same class and key
+    """
+    classes = {}
+    return [
+        classes.setdefault((label, key), len(classes))
+        for label, key in zip(labels, keys)
+    ]
+
+
+def find_item_classes(agents: list[BaseAgent], items: list[ScheduleItem]):
+    """Group items that no agent can tell apart
+
+    Two items are in the same class when every agent desires both or neither, every constraint of every agent
+    has the same column for both, and no agent desiring them values a bundle of two of them more than one of them.
+    Every agent then values a bundle the same after replacing items by others of their class, and holds at most one
+    item of every class in any bundle of full value. Items of agents whose constraints cannot be read are left in a
+    class of their own.
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+
+    Returns:
+        list[list[int]]: item indices of every class, in increasing order, classes sorted by their first item
+    """
+    labels = [0] * len(items)
+    desired = []
+    seen = {}
+    for agent in agents:
+        desired.append(set(agent.get_desired_items_indexes(items)))
+        labels = _refine(labels, [i in desired[-1] for i in range(len(items))])
+        constraints = _agent_constraints(agent)
+        if constraints is None:
+            return [[item_index] for item_index in range(len(items))]
+        for constraint in constraints:
+            # global constraints are shared among agents
+            if id(constraint) not in seen:
+                seen[id(constraint)] = _column_keys(constraint, len(items))
+                labels = _refine(labels, seen[id(constraint)])
+
+    members = {}
+    for item_index, label in enumerate(labels):
+        members.setdefault(label, []).append(item_index)
+
+    classes = []
+    for member_indexes in members.values():
+        pair = [items[member_indexes[0]], items[member_indexes[-1]]]
+        if len(member_indexes) > 1 and any(
+            member_indexes[0] in desired[agent_index] and agent.valuation(pair) > 1
+            for agent_index, agent in enumerate(agents)
+        ):
+            classes += [[item_index] for item_index in member_indexes]
+        else:
+            classes.append(member_indexes)
+
+    return sorted(classes)
+
+
+class CompressedAgent:
+    """An agent over the classes of items, delegating value queries to an agent over the original items"""
+
+    def __init__(self, agent: BaseAgent, representatives: list[BaseItem]):
+        """
+        Args:
+            agent (BaseAgent): agent over the original items
+            representatives (list[BaseItem]): original item standing for every class, by class index
+        """
+        self.agent = agent
+        self.representatives = representatives
+        self._desired = None
+
+    def _originals(self, bundle: list[BaseItem]):
+        return [self.representatives[item.index] for item in bundle]
+
+    def valuation(self, bundle: list[BaseItem]):
+        """Delegate to the valuation of the original agent
+
+        Args:
+            bundle (list[BaseItem]): Items to evaluate, from the compressed items
+        """
+        return self.agent.valuation(self._originals(bundle))
+
+    def marginal_contribution(self, bundle: list[BaseItem], item: BaseItem):
+        """Delegate to the marginal_contribution of the original agent
+
+        Args:
+            bundle (list[BaseItem]): Initial set of items, from the compressed items
+            item (BaseItem): Item to be added, from the compressed items
+        """
+        return self.agent.marginal_contribution(
+            self._originals(bundle), self.representatives[item.index]
+        )
+
+    def exchange_contribution(
+        self, bundle: list[BaseItem], og_item: BaseItem, new_item: BaseItem
+    ):
+        """Delegate to the exchange_contribution of the original agent
+
+        Args:
+            bundle (list[BaseItem]): Initial set of items, from the compressed items
+            og_item (BaseItem): Item to be removed, from the compressed items
+            new_item (BaseItem): Item to be added, from the compressed items
+        """
+        return self.agent.exchange_contribution(
+            self._originals(bundle),
+            self.representatives[og_item.index],
+            self.representatives[new_item.index],
+        )
+
+    def get_desired_items_indexes(self, items: list[BaseItem]):
+        """Return the classes whose representative the original agent desires
+
+        Args:
+            items (list[BaseItem]): Candidate items list, the compressed items
+
+        Returns:
+            list[int]: Indices of desired items in list
+        """
+        if self._desired is None:
+            self._desired = set(
+                self.agent.get_desired_items_indexes(self.representatives)
+            )
+        return [
+            item.index
+            for item in items
+            if self.representatives[item.index].index in self._desired
+        ]
+
+
+def compress_items(agents: list[BaseAgent], items: list[ScheduleItem]):
+    """Replace every class of items by a single item with the pooled capacity
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+
+    Returns:
+        list[CompressedAgent]: agents over the compressed items
+        list[ScheduleItem]: one item per class, a copy of its first member indexed by class
+        list[list[int]]: item indices of every class, see find_item_classes
+    """
+    classes = find_item_classes(agents, items)
+    representatives = [items[members[0]] for members in classes]
+    compressed_items = []
+    for class_index, members in enumerate(classes):
+        item = copy.copy(representatives[class_index])
+        item.index = class_index
+        item.capacity = sum(items[item_index].capacity for item_index in members)
+        compressed_items.append(item)
+    compressed_agents = [CompressedAgent(agent, representatives) for agent in agents]
+
+    return compressed_agents, compressed_items, classes
+
+
+def expand_allocation(
+    X_compressed: type[np.ndarray],
+    items: list[ScheduleItem],
+    classes: list[list[int]],
+):
+    """Hand out the copies of every class allocated to an agent as concrete items
+
+    The owners of a class, in increasing order, are given its items in increasing order, moving on to
+    the next item once the copies of one are used up.
+
+    Args:
+        X_compressed (type[np.ndarray] | BaseAllocation): allocation matrix or storage over the classes
+        items (list[ScheduleItem]): List of items from class BaseItem, the original items
+        classes (list[list[int]]): item indices of every class, see find_item_classes
+
+    Returns:
+        X (type[np.ndarray]): allocation matrix over the original items
+    """
+    if isinstance(X_compressed, BaseAllocation):
+        X_compressed = X_compressed.to_matrix()
+    num_agents = X_compressed.shape[1] - 1
+    X = np.zeros([len(items), num_agents + 1], dtype=X_compressed.dtype)
+    X[:, -1] = [item.capacity for item in items]
+    for class_index, members in enumerate(classes):
+        members = iter(members)
+        item_index = next(members)
+        for agent_index in np.flatnonzero(X_compressed[class_index, :-1]):
+            for _ in range(X_compressed[class_index, agent_index]):
+                while X[item_index, -1] == 0:
+                    item_index = next(members)
+                X[item_index, agent_index] += 1
+                X[item_index, -1] -= 1
+
+    return X
+
+
+def solve_compressed(
+    algorithm,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    **kwargs,
+):
+    """Run an allocation algorithm on the classes of items and expand the allocation back to the items
+
+    The allocation gives every agent the same value as the compressed one, see find_item_classes, but
+    ties may be broken differently than in a run on the original items.
+
+    Args:
+        algorithm (Callable): allocation algorithm taking agents and items, such as general_yankee_swap_E,
+            round_robin or serial_dictatorship
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        **kwargs: passed on to the algorithm
+
+    Returns:
+        X (type[np.ndarray]): allocation matrix of the original instance
+        dict: compression statistics, "items" and "classes"
+    """
+    compressed_agents, compressed_items, classes = compress_items(agents, items)
+    result = algorithm(compressed_agents, compressed_items, **kwargs)
+    X_compressed = result[0] if isinstance(result, tuple) else result
+    stats = {"items": len(items), "classes": len(classes)}
+
+    return expand_allocation(X_compressed, items, classes), stats
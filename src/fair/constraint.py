@@ -109,6 +109,40 @@ class LinearConstraint(BaseConstraint):
 
         return LinearConstraint(self.A.to_dense(), self.b.to_dense(), self.extent)
 
+    def signature(self):
+        """Hashable description of the constraint
+
+        Constraints with equal signatures have the same A, b and extent, and so are satisfied by the same bundles.
+
+        Returns:
+            tuple: extent, sparsity, shapes and contents of A and b
+        """
+        if self._sparse:
+            parts = []
+            for matrix in [self.A, self.b]:
+                matrix = matrix.tocsr(copy=True)
+                matrix.sum_duplicates()
+                matrix.sort_indices()
+                parts.append(
+                    (
+                        matrix.shape,
+                        matrix.data.tobytes(),
+                        matrix.indices.tobytes(),
+                        matrix.indptr.tobytes(),
+                    )
+                )
+        else:
+            parts = [
+                (
+                    matrix.shape,
+                    str(matrix.dtype),
+                    np.ascontiguousarray(matrix).tobytes(),
+                )
+                for matrix in [self.A, self.b]
+            ]
+
+        return (self.extent, self._sparse, *parts)
+
     def satisfies(self, bundle: List[BaseItem]):
         """Determine if bundle satisfies this constraint
 
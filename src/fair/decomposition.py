@@ -0,0 +1,121 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import numpy as np
+
+from .agent import BaseAgent
+from .item import ScheduleItem
+from .storage import BaseAllocation
+
+
+def find_components(agents: list[BaseAgent], items: list[ScheduleItem]):
+    """Split agents into groups that compete for disjoint sets of items
+
+    Two agents are in the same component if they desire a common item, or are linked through
+    a chain of such agents. An agent only ever receives items it desires, and its constraints
+    only restrict its own bundle, so no item or constraint row is shared between components.
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+
+    Returns:
+        list[list[int]]: agent indices of every component, in increasing order, components sorted by their first agent
+    """
+    parent = list(range(len(agents)))
+
+    def find(agent_index: int):
+        while parent[agent_index] != agent_index:
+            parent[agent_index] = parent[parent[agent_index]]
+            agent_index = parent[agent_index]
+        return agent_index
+
+    first_agent = {}
+    for agent_index, agent in enumerate(agents):
+        for item_index in agent.get_desired_items_indexes(items):
+            if item_index not in first_agent:
+                first_agent[item_index] = agent_index
+                continue
+            root1, root2 = find(agent_index), find(first_agent[item_index])
+            if root1 != root2:
+                parent[max(root1, root2)] = min(root1, root2)
+
+    components = {}
+    for agent_index in range(len(agents)):
+        components.setdefault(find(agent_index), []).append(agent_index)
+
+    return list(components.values())
+
+
+def _allocate_component(algorithm, agents, items, kwargs):
+    """Run an allocation algorithm and return its allocation matrix"""
+    result = algorithm(agents, items, **kwargs)
+    X = result[0] if isinstance(result, tuple) else result
+    if isinstance(X, BaseAllocation):
+        X = X.to_matrix()
+    return X
+
+
+def allocate_by_components(
+    algorithm,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    weights: list[float] = None,
+    executor: Executor = None,
+    max_workers: int = None,
+    **kwargs,
+):
+    """Run an allocation algorithm separately on every component and stitch the results
+
+    Every component, see find_components, is allocated by its own run of the algorithm on all items,
+    so item indices are unchanged, and only the items its agents desire are ever touched. The
+    allocation matrices of the runs are then combined column by column.
+
+    The result equals that of a single run when the algorithm treats components independently:
+
+    * serial_dictatorship, as every agent's picks only depend on earlier agents of its component;
+    * general_yankee_swap and general_yankee_swap_E with the "networkx" or "array" backend, as the
+      order in which the agents of a component are picked only depends on their own gains.
+
+    round_robin may differ: when an agent drops out of a round, the next agent in the round is
+    skipped, and that agent can belong to another component.
+
+    Args:
+        algorithm (Callable): allocation algorithm taking agents and items, such as general_yankee_swap_E,
+            round_robin or serial_dictatorship. It must be defined at module level to be sent to other processes.
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        weights (list[float], optional): weight of every agent, split among the components and passed to the
+            algorithm as weights. Defaults to None, for none.
+        executor (Executor, optional): pool to run the components in. Defaults to None, for a new
+            concurrent.futures.ProcessPoolExecutor with max_workers processes, used only if there are several components.
+        max_workers (int, optional): number of processes of the default pool. Defaults to None, for the number of CPUs.
+        **kwargs: passed on to the algorithm
+
+    Returns:
+        X (type[np.ndarray]): allocation matrix
+    """
+    components = find_components(agents, items)
+    tasks = []
+    for component in components:
+        component_kwargs = dict(kwargs)
+        if weights is not None:
+            component_kwargs["weights"] = [weights[i] for i in component]
+        tasks.append(
+            (algorithm, [agents[i] for i in component], items, component_kwargs)
+        )
+
+    if len(tasks) == 1:
+        results = [_allocate_component(*tasks[0])]
+    elif executor is not None:
+        results = list(executor.map(_allocate_component, *zip(*tasks)))
+    else:
+        with ProcessPoolExecutor(max_workers) as pool:
+            results = list(pool.map(_allocate_component, *zip(*tasks)))
+
+    capacity = np.array([item.capacity for item in items])
+    X = np.zeros([len(items), len(agents) + 1], dtype=int)
+    for component, X_component in zip(components, results):
+        X[:, component] = X_component[:, :-1]
+    X[:, -1] = capacity - X[:, :-1].sum(axis=1)
+
+    return X
@@ -0,0 +1,1266 @@
+import heapq
+
+import networkx as nx
+import numpy as np
+
+
+class ArrayExchangeGraph:
+    """Exchange graph over item indices with NumPy search labels
+
+    Item nodes are the integers 0..N-1, the source is the integer N and the sink is the
+    integer N+1. Every node keeps its successors and predecessors in insertion order, and
+    every edge carries an insertion stamp, so that neighbors are visited in the same order
+    as they would be in a networkx.DiGraph built by the same sequence of operations. This
+    makes shortest paths (and therefore allocations) identical to the networkx backend.
+    Memory grows with the number of edges, and expanding a node costs its degree.
+
+    Optionally, the graph maintains the distance from every item to the sink. Edge
+    changes are queued and the distance labels are repaired incrementally before the
+    next query, touching only nodes whose distance may have changed. Shortest paths
+    from the source to the sink are then read off the labels without a search; they
+    have the same length as those of the bidirectional search, but ties between equally
+    short paths are broken differently, so allocations built on them differ from those of
+    the networkx backend while giving every agent the same utility.
+
+    Every change to an edge between items or into the sink advances a version counter
+    and stamps the tail's outgoing and the head's incoming adjacency with it. A search
+    can return the neighbors it read at every node it expanded, so that callers can
+    later check whether the same search would still return the same path without
+    running it again.
+
+    The number of nodes expanded by all searches so far is kept in nodes_expanded.
+    """
+
+    def __init__(self, N: int, track_distances: bool = False):
+        """
+        Args:
+            N (int): number of items
+            track_distances (bool, optional): Should distance labels to the sink be maintained. Defaults to False.
+        """
+        self.N = N
+        self.source = N
+        self.sink = N + 1
+        self._succ = [{} for _ in range(N + 2)]
+        self._pred = [{} for _ in range(N + 2)]
+        self._clock = 0
+        self._version = 0
+        self._out_changed = np.zeros(N + 2, dtype=np.int64)
+        self._in_changed = np.zeros(N + 2, dtype=np.int64)
+        self.track_distances = track_distances
+        self.repair_touched = []
+        self.nodes_expanded = 0
+        self._inserted = []
+        self._deleted = []
+        for i in range(N):
+            self.add_edge(i, self.sink)
+        self._inserted = []
+        self._inf = N + 2
+        self._dist = self._reverse_bfs()
+
+    def __len__(self):
+        return self.N + 2
+
+    def __contains__(self, node: int):
+        return 0 <= node < self.N + 2
+
+    def add_node(self, node: int):
+        """Nodes are fixed at construction, so this is only a membership check
+
+        Args:
+            node (int): node index
+
+        Raises:
+            KeyError: node must be an item, the source or the sink
+        """
+        if node not in self:
+            raise KeyError(f"node {node} is not in the exchange graph")
+
+    def remove_node(self, node: int):
+        """Remove all edges incident to node
+
+        Args:
+            node (int): node index
+        """
+        if node != self.source:
+            heads = list(self._succ[node])
+            tails = [u for u in self._pred[node] if u != self.source]
+            self._version += 1
+            self._out_changed[node] = self._version
+            self._in_changed[node] = self._version
+            self._out_changed[tails] = self._version
+            self._in_changed[heads] = self._version
+            if self.track_distances:
+                self._deleted += [(node, v) for v in heads]
+                self._deleted += [(u, node) for u in tails]
+        for v in self._succ[node]:
+            del self._pred[v][node]
+        for u in self._pred[node]:
+            del self._succ[u][node]
+        self._succ[node] = {}
+        self._pred[node] = {}
+
+    def has_edge(self, u: int, v: int):
+        """Determine whether edge (u, v) is present
+
+        Args:
+            u (int): tail node
+            v (int): head node
+
+        Returns:
+            bool: True if the edge is present; False otherwise
+        """
+        return v in self._succ[u]
+
+    def add_edge(self, u: int, v: int):
+        """Add edge (u, v), keeping its original stamp if already present
+
+        Args:
+            u (int): tail node
+            v (int): head node
+        """
+        if v not in self._succ[u]:
+            self._clock += 1
+            self._succ[u][v] = self._clock
+            self._pred[v][u] = self._clock
+            if u != self.source:
+                self._touch(u, v)
+                if self.track_distances:
+                    self._inserted.append((u, v))
+
+    def add_edges_from(self, edges: list[tuple[int, int]]):
+        """Add several distinct edges at once, stamped in the order given, see add_edge
+
+        Args:
+            edges (list[tuple[int, int]]): (tail, head) pairs
+        """
+        added = []
+        for u, v in edges:
+            u, v = int(u), int(v)
+            if v not in self._succ[u]:
+                self._clock += 1
+                self._succ[u][v] = self._clock
+                self._pred[v][u] = self._clock
+                if u != self.source:
+                    added.append((u, v))
+        if len(added) > 0:
+            tails, heads = zip(*added)
+            self._version += 1
+            self._out_changed[list(tails)] = self._version
+            self._in_changed[list(heads)] = self._version
+            if self.track_distances:
+                self._inserted += added
+
+    def remove_edge(self, u: int, v: int):
+        """Remove edge (u, v)
+
+        Args:
+            u (int): tail node
+            v (int): head node
+
+        Raises:
+            KeyError: edge must be present
+        """
+        if v not in self._succ[u]:
+            raise KeyError(f"edge ({u}, {v}) is not in the exchange graph")
+        del self._succ[u][v]
+        del self._pred[v][u]
+        if u != self.source:
+            self._touch(u, v)
+            if self.track_distances:
+                self._deleted.append((u, v))
+
+    def _touch(self, u: int, v: int):
+        """Record that the adjacency of u and v changed
+
+        Args:
+            u (int): tail node
+            v (int): head node
+        """
+        self._version += 1
+        self._out_changed[u] = self._version
+        self._in_changed[v] = self._version
+
+    def number_of_edges(self):
+        """Number of edges in the graph
+
+        Returns:
+            int: edge count
+        """
+        return sum(len(heads) for heads in self._succ)
+
+    def successors(self, u: int):
+        """Heads of all edges leaving u, in insertion order
+
+        Args:
+            u (int): tail node
+
+        Returns:
+            np.ndarray: node indices
+        """
+        return np.fromiter(self._succ[u], dtype=np.int64, count=len(self._succ[u]))
+
+    def predecessors(self, v: int):
+        """Tails of all edges entering v, in insertion order
+
+        Args:
+            v (int): head node
+
+        Returns:
+            np.ndarray: node indices
+        """
+        return np.fromiter(self._pred[v], dtype=np.int64, count=len(self._pred[v]))
+
+    def shortest_path(self, source: int, target: int, footprint: bool = False):
+        """Bidirectional breadth first search from source to target
+
+        The search visits nodes in the same order as networkx.bidirectional_shortest_path.
+
+        Args:
+            source (int): start node
+            target (int): end node
+            footprint (bool, optional): Should the nodes expanded by the search also be returned. Defaults to False.
+                Not available when distance labels are tracked.
+
+        Raises:
+            ValueError: footprint requires a graph without distance tracking
+
+        Returns:
+            list[int]: nodes on the shortest path, or None if there is no path
+            tuple: search footprint to pass to is_unchanged, only if footprint is True
+        """
+        if footprint:
+            if self.track_distances:
+                raise ValueError("search footprints require track_distances=False")
+            forward, reverse = [], []
+            path = self._search(source, target, forward, reverse)
+            return path, (self._version, forward, reverse)
+        if source == target:
+            return [source]
+        if self.track_distances and target == self.sink:
+            return self._label_path(source)
+        return self._search(source, target, [], [])
+
+    def is_unchanged(self, footprint: tuple):
+        """Would a search with this footprint still return the same result
+
+        Every node the search expanded must still list the neighbors it read, in the
+        same order, ahead of any others; a node whose neighbors were all read must have
+        no others. Only nodes whose adjacency changed since the search ran are compared.
+        Edges leaving the source are not tracked, so they must be the same as well.
+
+        Args:
+            footprint (tuple): footprint returned by shortest_path
+
+        Returns:
+            bool: True if the result still holds; False otherwise
+        """
+        version, forward, reverse = footprint
+        for expanded, changed, neighbors in [
+            (forward, self._out_changed, self.successors),
+            (reverse, self._in_changed, self.predecessors),
+        ]:
+            for v, read, complete in expanded:
+                if changed[v] <= version:
+                    continue
+                nbrs = neighbors(v)
+                if len(nbrs) < len(read) or (complete and len(nbrs) > len(read)):
+                    return False
+                if (nbrs[: len(read)] != read).any():
+                    return False
+        return True
+
+    def _search(self, source: int, target: int, forward: list, reverse: list):
+        """Bidirectional breadth first search, recording the nodes it expands
+
+        Args:
+            source (int): start node
+            target (int): end node
+            forward (list): receives (node, neighbors read, all neighbors read) for every node expanded towards the target
+            reverse (list): receives the same for every node expanded towards the source
+
+        Returns:
+            list[int]: nodes on the shortest path, or None if there is no path
+        """
+        if source == target:
+            return [source]
+
+        n = self.N + 2
+        pred = np.full(n, -1, dtype=np.int64)
+        succ = np.full(n, -1, dtype=np.int64)
+        pred_seen = np.zeros(n, dtype=bool)
+        succ_seen = np.zeros(n, dtype=bool)
+        pred_seen[source] = True
+        succ_seen[target] = True
+        forward_fringe = [source]
+        reverse_fringe = [target]
+
+        while forward_fringe and reverse_fringe:
+            if len(forward_fringe) <= len(reverse_fringe):
+                this_level = forward_fringe
+                forward_fringe = []
+                for v in this_level:
+                    self.nodes_expanded += 1
+                    nbrs = self.successors(v)
+                    new, w = self._expand(v, nbrs, pred, pred_seen, succ_seen)
+                    forward.append(self._read(v, nbrs, w))
+                    forward_fringe.extend(new)
+                    if w is not None:
+                        return self._join(pred, succ, w)
+            else:
+                this_level = reverse_fringe
+                reverse_fringe = []
+                for v in this_level:
+                    self.nodes_expanded += 1
+                    nbrs = self.predecessors(v)
+                    new, w = self._expand(v, nbrs, succ, succ_seen, pred_seen)
+                    reverse.append(self._read(v, nbrs, w))
+                    reverse_fringe.extend(new)
+                    if w is not None:
+                        return self._join(pred, succ, w)
+
+        return None
+
+    def _expand(
+        self,
+        v: int,
+        nbrs: np.ndarray,
+        parent: np.ndarray,
+        seen: np.ndarray,
+        other_seen: np.ndarray,
+    ):
+        """Label the unseen neighbors of v, stopping at the first one reached from the other side
+
+        Args:
+            v (int): node being expanded
+            nbrs (np.ndarray): neighbors of v in visiting order
+            parent (np.ndarray): parent labels of this side of the search
+            seen (np.ndarray): nodes labelled by this side of the search
+            other_seen (np.ndarray): nodes labelled by the other side of the search
+
+        Returns:
+            list[int]: newly labelled nodes, in visiting order
+            int: meeting node, or None if the sides have not met
+        """
+        hits = np.flatnonzero(other_seen[nbrs])
+        stop = hits[0] + 1 if len(hits) > 0 else len(nbrs)
+        candidates = nbrs[:stop]
+        new = candidates[~seen[candidates]]
+        parent[new] = v
+        seen[new] = True
+        if len(hits) > 0:
+            return new.tolist(), int(nbrs[hits[0]])
+        return new.tolist(), None
+
+    def _read(self, v: int, nbrs: np.ndarray, w: int):
+        """Neighbors of v read by _expand
+
+        Args:
+            v (int): node expanded
+            nbrs (np.ndarray): neighbors of v in visiting order
+            w (int): meeting node, or None if the sides have not met
+
+        Returns:
+            tuple: v, neighbors read, and whether they are all the neighbors of v
+        """
+        if w is None:
+            return v, nbrs, True
+        return v, nbrs[: np.flatnonzero(nbrs == w)[0] + 1], False
+
+    def _join(self, pred: np.ndarray, succ: np.ndarray, w: int):
+        """Build path through meeting node w from the two sets of parent labels
+
+        Args:
+            pred (np.ndarray): parents towards the source
+            succ (np.ndarray): parents towards the target
+            w (int): meeting node
+
+        Returns:
+            list[int]: nodes on the path
+        """
+        path = []
+        node = w
+        while node != -1:
+            path.append(int(node))
+            node = pred[node]
+        path.reverse()
+        node = succ[w]
+        while node != -1:
+            path.append(int(node))
+            node = succ[node]
+        return path
+
+    def distances(self):
+        """Distance from every node to the sink, repairing labels first if needed
+
+        Unreachable nodes (and the source) have distance N+2.
+
+        Returns:
+            np.ndarray: distance labels, indexed by node
+        """
+        if self.track_distances:
+            self._repair()
+            return self._dist.copy()
+        return self._reverse_bfs()
+
+    def _reverse_bfs(self):
+        """Distance labels from a full breadth first search backwards from the sink
+
+        Returns:
+            np.ndarray: distance labels, indexed by node
+        """
+        dist = np.full(self.N + 2, self._inf, dtype=np.int64)
+        dist[self.sink] = 0
+        fringe = [self.sink]
+        d = 0
+        while len(fringe) > 0:
+            d += 1
+            next_fringe = []
+            for v in fringe:
+                for u in self._pred[v]:
+                    if u != self.source and dist[u] == self._inf:
+                        dist[u] = d
+                        next_fringe.append(u)
+            fringe = next_fringe
+        return dist
+
+    def _repair(self):
+        """Bring distance labels up to date with the queued edge changes
+
+        Nodes that lost every shortest route to the sink are relabelled from their
+        remaining successors, after which shorter routes created by new edges are
+        propagated backwards. The number of relabelled nodes is appended to
+        repair_touched.
+        """
+        if not self._inserted and not self._deleted:
+            return
+        dist = self._dist
+        inf = self._inf
+        touched = set()
+
+        # nodes at distance d whose every successor at distance d-1 is affected
+        affected = np.zeros(self.N + 2, dtype=bool)
+        heap = [
+            (dist[u], u)
+            for u, v in self._deleted
+            if dist[u] < inf and dist[u] == dist[v] + 1
+        ]
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if affected[u]:
+                continue
+            succ = self.successors(u)
+            if ((dist[succ] == d - 1) & ~affected[succ]).any():
+                continue
+            affected[u] = True
+            for x in self._pred[u]:
+                if x != self.source and dist[x] == d + 1 and not affected[x]:
+                    heapq.heappush(heap, (d + 1, x))
+
+        # relabel affected nodes from their unaffected successors
+        heap = []
+        for u in np.flatnonzero(affected):
+            succ = self.successors(u)
+            succ = succ[~affected[succ]]
+            dist[u] = min(inf, dist[succ].min() + 1) if len(succ) > 0 else inf
+            heapq.heappush(heap, (dist[u], u))
+            touched.add(u)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d != dist[u] or not affected[u]:
+                continue
+            affected[u] = False
+            for x in self._pred[u]:
+                if affected[x] and d + 1 < dist[x]:
+                    dist[x] = d + 1
+                    heapq.heappush(heap, (d + 1, x))
+
+        # propagate shortcuts from new edges and relabelled nodes
+        heap = [(dist[u], u) for u in touched if dist[u] < inf]
+        for u, v in self._inserted:
+            if self.has_edge(u, v) and dist[v] + 1 < dist[u]:
+                dist[u] = dist[v] + 1
+                heap.append((dist[u], u))
+                touched.add(u)
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d != dist[u]:
+                continue
+            for x in self._pred[u]:
+                if x != self.source and d + 1 < dist[x]:
+                    dist[x] = d + 1
+                    heapq.heappush(heap, (d + 1, x))
+                    touched.add(x)
+
+        self._inserted = []
+        self._deleted = []
+        self.repair_touched.append(len(touched))
+
+    def _label_path(self, source: int):
+        """Shortest path from source to the sink read off the distance labels
+
+        The first hop goes to the closest successor of source; every later hop goes to
+        the first successor, in insertion order, that is one step closer to the sink.
+
+        Args:
+            source (int): start node
+
+        Returns:
+            list[int]: nodes on the shortest path, or None if there is no path
+        """
+        self._repair()
+        dist = self._dist
+        self.nodes_expanded += 1
+        nbrs = self.successors(source)
+        if len(nbrs) == 0 or dist[nbrs].min() >= self._inf:
+            return None
+        node = int(nbrs[np.argmin(dist[nbrs])])
+        path = [source, node]
+        while node != self.sink:
+            self.nodes_expanded += 1
+            nbrs = self.successors(node)
+            node = int(nbrs[np.flatnonzero(dist[nbrs] == dist[node] - 1)[0]])
+            path.append(node)
+        return path
+
+    def to_arrays(self):
+        """Complete graph state as a dictionary of arrays, see from_arrays
+
+        Returns:
+            dict[str, np.ndarray]: named arrays
+        """
+        tails, heads, stamps = self._edges_in_order()
+        return {
+            "N": np.array(self.N),
+            "track_distances": np.array(self.track_distances),
+            "tails": tails,
+            "heads": heads,
+            "stamps": stamps,
+            "clock": np.array(self._clock),
+            "version": np.array(self._version),
+            "out_changed": self._out_changed,
+            "in_changed": self._in_changed,
+            "dist": self._dist,
+            "inserted": np.array(self._inserted, dtype=np.int64).reshape(-1, 2),
+            "deleted": np.array(self._deleted, dtype=np.int64).reshape(-1, 2),
+            "repair_touched": np.array(self.repair_touched, dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """Rebuild a graph from the arrays returned by to_arrays
+
+        Args:
+            arrays (dict[str, np.ndarray]): named arrays
+
+        Returns:
+            ArrayExchangeGraph: graph in the same state, including insertion order and distance labels
+        """
+        G = cls(int(arrays["N"]), track_distances=bool(arrays["track_distances"]))
+        G._succ = [{} for _ in range(len(G))]
+        G._pred = [{} for _ in range(len(G))]
+        order = np.argsort(arrays["stamps"], kind="stable")
+        for u, v, stamp in zip(
+            arrays["tails"][order].tolist(),
+            arrays["heads"][order].tolist(),
+            arrays["stamps"][order].tolist(),
+        ):
+            G._succ[u][v] = stamp
+            G._pred[v][u] = stamp
+        G._clock = int(arrays["clock"])
+        G._version = int(arrays["version"])
+        G._out_changed = np.array(arrays["out_changed"], dtype=np.int64)
+        G._in_changed = np.array(arrays["in_changed"], dtype=np.int64)
+        G._dist = np.array(arrays["dist"], dtype=np.int64)
+        G._inserted = [tuple(edge) for edge in arrays["inserted"].tolist()]
+        G._deleted = [tuple(edge) for edge in arrays["deleted"].tolist()]
+        G.repair_touched = arrays["repair_touched"].tolist()
+        return G
+
+    def to_networkx(self):
+        """Equivalent networkx graph, with "s" and "t" labelling source and sink
+
+        Returns:
+            nx.DiGraph: networkx graph object
+        """
+        labels = {self.source: "s", self.sink: "t"}
+        G = nx.DiGraph()
+        G.add_nodes_from(range(self.N))
+        G.add_node("t")
+        tails, heads, _ = self._edges_in_order()
+        for u, v in zip(tails.tolist(), heads.tolist()):
+            G.add_edge(labels.get(u, u), labels.get(v, v))
+        return G
+
+    def _edges_in_order(self):
+        """Every edge with its stamp, in insertion order
+
+        Returns:
+            np.ndarray: tails
+            np.ndarray: heads
+            np.ndarray: stamps
+        """
+        edges = sorted(
+            (stamp, u, v)
+            for u, heads in enumerate(self._succ)
+            for v, stamp in heads.items()
+        )
+        edges = np.array(edges, dtype=np.int64).reshape(-1, 3)
+        return edges[:, 1], edges[:, 2], edges[:, 0]
+
+
+class EdgeStore:
+    """Sparse record of the agents responsible for each exchange graph edge
+
+    An edge (item_from, item_to) is live while at least one owner of item_from would
+    exchange it for item_to. Agents are kept per edge in the order they were added, and
+    a reverse index maps every agent to the edges they support, grouped by item_from.
+    Memory grows with the number of live (edge, agent) pairs.
+    """
+
+    def __init__(self):
+        self._edges = {}
+        self._agent_edges = {}
+        self._holders = {}
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __contains__(self, edge: tuple[int, int]):
+        return edge in self._edges
+
+    def count(self, item_from: int, item_to: int):
+        """Number of agents supporting an edge
+
+        Args:
+            item_from (int): index of the item given up
+            item_to (int): index of the item received
+
+        Returns:
+            int: number of agents
+        """
+        return len(self._edges.get((item_from, item_to), ()))
+
+    def agents(self, item_from: int, item_to: int):
+        """Agents supporting an edge, in the order they were added
+
+        Args:
+            item_from (int): index of the item given up
+            item_to (int): index of the item received
+
+        Returns:
+            list[int]: agent indices
+        """
+        return list(self._edges.get((item_from, item_to), ()))
+
+    def supports(self, item_from: int, item_to: int, agent_index: int):
+        """Does agent support an edge
+
+        Args:
+            item_from (int): index of the item given up
+            item_to (int): index of the item received
+            agent_index (int): index of the agent
+
+        Returns:
+            bool: True if agent supports the edge; False otherwise
+        """
+        return agent_index in self._edges.get((item_from, item_to), ())
+
+    def add(self, item_from: int, item_to: int, agent_index: int):
+        """Record agent as supporting an edge
+
+        Args:
+            item_from (int): index of the item given up
+            item_to (int): index of the item received
+            agent_index (int): index of the agent
+
+        Returns:
+            bool: True if the edge was not live before; False otherwise
+        """
+        edge = (item_from, item_to)
+        supporters = self._edges.setdefault(edge, {})
+        supporters[agent_index] = None
+        self._agent_edges.setdefault(agent_index, {}).setdefault(item_from, set()).add(
+            item_to
+        )
+        self._holders.setdefault(item_from, {})[agent_index] = None
+        return len(supporters) == 1
+
+    def remove(self, item_from: int, item_to: int, agent_index: int):
+        """Stop recording agent as supporting an edge
+
+        Args:
+            item_from (int): index of the item given up
+            item_to (int): index of the item received
+            agent_index (int): index of the agent
+
+        Returns:
+            bool: True if the edge is no longer live; False otherwise
+        """
+        edge = (item_from, item_to)
+        supporters = self._edges[edge]
+        del supporters[agent_index]
+        heads = self._agent_edges[agent_index][item_from]
+        heads.discard(item_to)
+        if len(heads) == 0:
+            del self._agent_edges[agent_index][item_from]
+            if len(self._agent_edges[agent_index]) == 0:
+                del self._agent_edges[agent_index]
+            del self._holders[item_from][agent_index]
+            if len(self._holders[item_from]) == 0:
+                del self._holders[item_from]
+        if len(supporters) == 0:
+            del self._edges[edge]
+            return True
+        return False
+
+    def edges(self):
+        """Live edges, in the order they became live
+
+        Returns:
+            Iterator[tuple[int, int]]: (item_from, item_to) pairs
+        """
+        return iter(self._edges)
+
+    def holders(self, item_from: int):
+        """Agents supporting at least one edge leaving an item
+
+        Args:
+            item_from (int): index of the item given up
+
+        Returns:
+            list[int]: agent indices, sorted
+        """
+        return sorted(self._holders.get(item_from, ()))
+
+    def heads(self, item_from: int, agent_index: int):
+        """Items an agent would take in exchange for an item
+
+        Args:
+            item_from (int): index of the item given up
+            agent_index (int): index of the agent
+
+        Returns:
+            set[int]: item indices
+        """
+        return self._agent_edges.get(agent_index, {}).get(item_from, set())
+
+    def edges_of(self, agent_index: int, item_from: int = None):
+        """Edges supported by an agent
+
+        Args:
+            agent_index (int): index of the agent
+            item_from (int, optional): only edges leaving this item. Defaults to None.
+
+        Returns:
+            list[tuple[int, int]]: edges, sorted
+        """
+        tails = self._agent_edges.get(agent_index, {})
+        if item_from is not None:
+            tails = {item_from: tails.get(item_from, set())}
+        return sorted((tail, head) for tail, heads in tails.items() for head in heads)
+
+    def to_arrays(self):
+        """Every (edge, agent) pair as a dictionary of arrays, see from_arrays
+
+        Returns:
+            dict[str, np.ndarray]: named arrays, in the order agents were added to each edge
+        """
+        pairs = [
+            (item_from, item_to, agent_index)
+            for (item_from, item_to), supporters in self._edges.items()
+            for agent_index in supporters
+        ]
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 3)
+        return {"tails": pairs[:, 0], "heads": pairs[:, 1], "agents": pairs[:, 2]}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """Rebuild an edge store from the arrays returned by to_arrays
+
+        Args:
+            arrays (dict[str, np.ndarray]): named arrays
+
+        Returns:
+            EdgeStore: edge store with the same agents, in the same order, on every edge
+        """
+        E = cls()
+        for item_from, item_to, agent_index in zip(
+            arrays["tails"].tolist(),
+            arrays["heads"].tolist(),
+            arrays["agents"].tolist(),
+        ):
+            E.add(item_from, item_to, agent_index)
+        return E
+
+    def remove_agent(self, agent_index: int, item_from: int = None):
+        """Stop recording agent as supporting any edge
+
+        Args:
+            agent_index (int): index of the agent
+            item_from (int, optional): only edges leaving this item. Defaults to None.
+
+        Returns:
+            list[tuple[int, int]]: edges that are no longer live
+        """
+        dead = []
+        for tail, head in self.edges_of(agent_index, item_from):
+            if self.remove(tail, head, agent_index):
+                dead.append((tail, head))
+        return dead
+
+
+class BipartiteExchangeGraph:
+    """Layered view of the edge store, with edges from items to holdings and from holdings to items
+
+    A holding is a copy of an item together with the agent owning it. There is an edge from
+    every item to its holdings, and from a holding to every item its agent would take in
+    exchange for the item. Both layers are read from the edge store, whose (item, agent)
+    entries are exactly the holdings with exchanges. The graph only keeps the edges from the
+    source and into the sink, so memory is that of the edge store, which all backends of
+    general_yankee_swap_E maintain anyway.
+
+    Item nodes are the integers 0..N-1, the source is the integer N and the sink is the
+    integer N+1. Searches run breadth first from the source, collapsing each item's holdings:
+    the items reached through them are visited in increasing order, and an item on the path
+    is given up by its lowest index holder, see giver. Ties between shortest paths are thus
+    broken by item index, as in LazyExchangeGraph, and not in the edge insertion order
+    networkx follows, so the paths may differ from those of the "networkx" backend.
+    """
+
+    def __init__(self, N: int, E: EdgeStore):
+        """
+        Args:
+            N (int): number of items
+            E (EdgeStore): edge store providing the holdings and their exchanges
+        """
+        self.N = N
+        self.source = N
+        self.sink = N + 1
+        self.E = E
+        self.nodes_expanded = 0
+        self._source_heads = []
+        self._sink_tails = set(range(N))
+
+    def __len__(self):
+        return self.N + 2
+
+    def __contains__(self, node: int):
+        return 0 <= node < self.N + 2
+
+    def add_node(self, node: int):
+        """Nodes are fixed at construction, so this is only a membership check
+
+        Args:
+            node (int): node index
+
+        Raises:
+            KeyError: node must be an item, the source or the sink
+        """
+        if node not in self:
+            raise KeyError(f"node {node} is not in the exchange graph")
+
+    def remove_node(self, node: int):
+        """Remove the edges of the source, or of an item into the sink
+
+        Args:
+            node (int): node index
+        """
+        if node == self.source:
+            self._source_heads = []
+        else:
+            self._sink_tails.discard(node)
+
+    def has_edge(self, u: int, v: int):
+        """Determine whether edge (u, v) is present
+
+        Args:
+            u (int): tail node
+            v (int): head node
+
+        Returns:
+            bool: True if the edge is present; False otherwise
+        """
+        if u == self.source:
+            return v in self._source_heads
+        if v == self.sink:
+            return u in self._sink_tails
+        return (u, v) in self.E
+
+    def add_edge(self, u: int, v: int):
+        """Add an edge from the source or into the sink; edges between items follow the edge store
+
+        Args:
+            u (int): tail node
+            v (int): head node
+        """
+        if u == self.source:
+            if v not in self._source_heads:
+                self._source_heads.append(v)
+        elif v == self.sink:
+            self._sink_tails.add(u)
+
+    def add_edges_from(self, edges: list[tuple[int, int]]):
+        """Add several edges, see add_edge
+
+        Args:
+            edges (list[tuple[int, int]]): (tail, head) pairs
+        """
+        for u, v in edges:
+            self.add_edge(u, v)
+
+    def remove_edge(self, u: int, v: int):
+        """Remove an edge from the source or into the sink; edges between items follow the edge store
+
+        Args:
+            u (int): tail node
+            v (int): head node
+
+        Raises:
+            KeyError: edges from the source and into the sink must be present
+        """
+        if u == self.source or v == self.sink:
+            if not self.has_edge(u, v):
+                raise KeyError(f"edge ({u}, {v}) is not in the exchange graph")
+            if u == self.source:
+                self._source_heads.remove(v)
+            else:
+                self._sink_tails.discard(u)
+
+    def number_of_nodes(self):
+        """Number of item, holding, source and sink nodes
+
+        Returns:
+            int: node count
+        """
+        return self.N + 2 + sum(len(self.E.holders(i)) for i in range(self.N))
+
+    def number_of_edges(self):
+        """Number of edges in the layered graph
+
+        Returns:
+            int: edge count, counting every item to holding and holding to item edge
+        """
+        holdings = 0
+        for item_index in range(self.N):
+            for agent_index in self.E.holders(item_index):
+                holdings += 1 + len(self.E.heads(item_index, agent_index))
+        return len(self._source_heads) + len(self._sink_tails) + holdings
+
+    def successors(self, u: int):
+        """Items reached from an item through its holdings, or from the source
+
+        Args:
+            u (int): tail node
+
+        Returns:
+            list[int]: node indices, in increasing order, with the sink first if linked
+        """
+        if u == self.source:
+            return list(self._source_heads)
+        sink = [self.sink] if u in self._sink_tails else []
+        return sink + self._item_heads(u)
+
+    def _item_heads(self, u: int):
+        """Items reached from an item through its holdings
+
+        Args:
+            u (int): tail item
+
+        Returns:
+            list[int]: item indices, in increasing order
+        """
+        heads = set()
+        for agent_index in self.E.holders(u):
+            heads.update(self.E.heads(u, agent_index))
+        return sorted(heads)
+
+    def giver(self, u: int, v: int):
+        """Holder giving up an item for another on a transfer path
+
+        Args:
+            u (int): item given up
+            v (int): item received
+
+        Returns:
+            int: lowest index agent willing to make the exchange
+        """
+        return min(self.E.agents(u, v))
+
+    def shortest_path(self, source: int, target: int):
+        """Breadth first search from the source to the sink
+
+        Items linked to the source are visited in increasing order, and an item's successors
+        in the order of successors, so the sink is found as soon as a linked item is expanded,
+        before the item's other successors are read.
+
+        Args:
+            source (int): start node, the source
+            target (int): end node, the sink
+
+        Returns:
+            list[int]: nodes on the shortest path, or None if there is no path
+        """
+        parent = {item_index: None for item_index in sorted(self._source_heads)}
+        queue = list(parent)
+        position = 0
+        while position < len(queue):
+            item_index = queue[position]
+            position += 1
+            self.nodes_expanded += 1
+            if item_index in self._sink_tails:
+                path = [target]
+                while item_index is not None:
+                    path.append(item_index)
+                    item_index = parent[item_index]
+                path.append(source)
+                return path[::-1]
+            for head in self._item_heads(item_index):
+                if head not in parent:
+                    parent[head] = item_index
+                    queue.append(head)
+        return None
+
+    def items_reaching_sink(self):
+        """Items from which there is a path to the sink
+
+        Returns:
+            set[int]: item indices
+        """
+        predecessors = {}
+        for item_from, item_to in self.E.edges():
+            predecessors.setdefault(item_to, []).append(item_from)
+        return self._ancestors(predecessors)
+
+    def _ancestors(self, predecessors: dict):
+        """Items from which there is a path to the sink, given the tails of the edges entering every item
+
+        Args:
+            predecessors (dict[int, list[int]]): tails of the edges entering every item
+
+        Returns:
+            set[int]: item indices
+        """
+        reaching = set(self._sink_tails)
+        fringe = list(reaching)
+        while len(fringe) > 0:
+            item_index = fringe.pop()
+            for tail in predecessors.get(item_index, ()):
+                if tail not in reaching:
+                    reaching.add(tail)
+                    fringe.append(tail)
+        return reaching
+
+    def to_networkx(self):
+        """Equivalent networkx graph with holdings as (item, agent) nodes, and "s" and "t" labelling source and sink
+
+        Returns:
+            nx.DiGraph: networkx graph object
+        """
+        G = nx.DiGraph()
+        G.add_nodes_from(range(self.N))
+        G.add_nodes_from(["s", "t"])
+        for item_index in self._source_heads:
+            G.add_edge("s", item_index)
+        for item_index in sorted(self._sink_tails):
+            G.add_edge(item_index, "t")
+        for item_index in range(self.N):
+            for agent_index in self.E.holders(item_index):
+                G.add_edge(item_index, (item_index, agent_index))
+                for head in sorted(self.E.heads(item_index, agent_index)):
+                    G.add_edge((item_index, agent_index), head)
+        return G
+
+    def to_arrays(self):
+        """Edges into the sink as a dictionary of arrays, see from_arrays
+
+        Returns:
+            dict[str, np.ndarray]: named arrays
+        """
+        return {
+            "N": np.array(self.N),
+            "sink_tails": np.array(sorted(self._sink_tails), dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, E: EdgeStore):
+        """Rebuild a graph from the arrays returned by to_arrays
+
+        Args:
+            arrays (dict[str, np.ndarray]): named arrays
+            E (EdgeStore): edge store of the graph
+
+        Returns:
+            BipartiteExchangeGraph: graph in the same state
+        """
+        G = cls(int(arrays["N"]), E)
+        G._sink_tails = set(arrays["sink_tails"].tolist())
+        return G
+
+
+class LazyExchangeGraph(BipartiteExchangeGraph):
+    """Exchange graph whose edges between items are built only when a search expands their tail
+
+    The edges leaving an item are found by an exchanges function, see bind, and kept with a
+    stamp made of the item's owners and their bundle versions. Whenever an agent's bundle
+    changes, its version is advanced, see advance, so the edges of an item are only built
+    again once the bundle of one of its owners has changed, and items that searches never
+    expand cost nothing. No edge store is needed.
+
+    Edges from the source and into the sink, and the search, are those of
+    BipartiteExchangeGraph, with an item on a path given up by its lowest index willing
+    owner, so the paths are those of the "bipartite" backend.
+    """
+
+    def __init__(self, N: int):
+        """
+        Args:
+            N (int): number of items
+        """
+        super().__init__(N, None)
+        self.versions = {}
+        self.owners = None
+        self.exchanges = None
+        self.profiler = None
+        self._entries = {}
+
+    def bind(self, owners, exchanges, profiler=None):
+        """Set the functions the edges between items are built with
+
+        Args:
+            owners (Callable): indices of the owners of an item, in increasing order, given the item index
+            exchanges (Callable): lowest index owner willing to give the item up for every head, in increasing head
+                order, given the item index, see get_item_exchanges
+            profiler (AllocationProfiler, optional): counts items whose edges were built as "edge_cache_misses" and
+                those read from the cache as "edge_cache_hits". Defaults to None.
+        """
+        self.owners = owners
+        self.exchanges = exchanges
+        self.profiler = profiler
+        self._entries = {}
+
+    def advance(self, agent_index: int):
+        """Record that an agent's bundle changed
+
+        Args:
+            agent_index (int): index of the agent
+        """
+        self.versions[agent_index] = self.versions.get(agent_index, 0) + 1
+
+    def _item_edges(self, u: int):
+        """Edges leaving an item, built again only if they are stale
+
+        Args:
+            u (int): tail item
+
+        Returns:
+            dict[int, int]: agent giving the item up for every head, in increasing head order
+        """
+        stamp = tuple(
+            (agent_index, self.versions.get(agent_index, 0))
+            for agent_index in self.owners(u)
+        )
+        entry = self._entries.get(u)
+        if entry is not None and entry[0] == stamp:
+            if self.profiler is not None:
+                self.profiler.count("edge_cache_hits")
+            return entry[1]
+        edges = self.exchanges(u)
+        self._entries[u] = (stamp, edges)
+        if self.profiler is not None:
+            self.profiler.count("edge_cache_misses")
+        return edges
+
+    def _item_heads(self, u: int):
+        return list(self._item_edges(u))
+
+    def has_edge(self, u: int, v: int):
+        """Determine whether edge (u, v) is present, building the edges leaving u if needed
+
+        Args:
+            u (int): tail node
+            v (int): head node
+
+        Returns:
+            bool: True if the edge is present; False otherwise
+        """
+        if u == self.source or v == self.sink:
+            return super().has_edge(u, v)
+        return v in self._item_edges(u)
+
+    def giver(self, u: int, v: int):
+        """Owner giving up an item for another on a transfer path
+
+        Args:
+            u (int): item given up
+            v (int): item received
+
+        Returns:
+            int: lowest index agent willing to make the exchange
+        """
+        return self._item_edges(u)[v]
+
+    def number_of_nodes(self):
+        """Number of item, source and sink nodes
+
+        Returns:
+            int: node count
+        """
+        return self.N + 2
+
+    def number_of_edges(self):
+        """Number of edges, building every stale one
+
+        Returns:
+            int: edge count
+        """
+        items = sum(len(self._item_edges(i)) for i in range(self.N))
+        return len(self._source_heads) + len(self._sink_tails) + items
+
+    def items_reaching_sink(self):
+        """Items from which there is a path to the sink, building every stale edge
+
+        Returns:
+            set[int]: item indices
+        """
+        predecessors = {}
+        for item_from in range(self.N):
+            for item_to in self._item_edges(item_from):
+                predecessors.setdefault(item_to, []).append(item_from)
+        return self._ancestors(predecessors)
+
+    def to_networkx(self):
+        """Equivalent networkx graph, building every stale edge, with "s" and "t" labelling source and sink
+
+        Returns:
+            nx.DiGraph: networkx graph object
+        """
+        G = nx.DiGraph()
+        G.add_nodes_from(range(self.N))
+        G.add_nodes_from(["s", "t"])
+        for item_index in self._source_heads:
+            G.add_edge("s", item_index)
+        for item_index in sorted(self._sink_tails):
+            G.add_edge(item_index, "t")
+        for item_index in range(self.N):
+            for head in self._item_edges(item_index):
+                G.add_edge(item_index, head)
+        return G
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """Rebuild a graph from the arrays returned by to_arrays
+
+        Edges between items are not saved; they are built again as searches need them, once
+        the graph is bound.
+
+        Args:
+            arrays (dict[str, np.ndarray]): named arrays
+
+        Returns:
+            LazyExchangeGraph: graph with the same edges into the sink
+        """
+        G = cls(int(arrays["N"]))
+        G._sink_tails = set(arrays["sink_tails"].tolist())
+        return G
@@ -2,14 +2,21 @@ import numpy as np
 import copy
 
 from .agent import BaseAgent, LegacyStudent
-from .allocation import get_bundle_from_allocation_matrix, general_yankee_swap_E
+from .allocation import (
+    get_bundle_from_allocation_matrix,
+    get_utility_vector,
+    general_yankee_swap_E,
+)
 from .constraint import CourseTimeConstraint, MutualExclusivityConstraint
 from .item import ScheduleItem, sub_schedule
 from .simulation import SubStudent
 
 
 def utilitarian_welfare(
-    X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    utilities: list[float] = None,
 ):
     """Compute utilitarian social welfare (USW)
 
@@ -19,20 +26,24 @@ def utilitarian_welfare(
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        utilities (list[float], optional): utility of every agent, as returned by general_yankee_swap_E. Defaults to None, to compute them from X.
 
     Returns:
         float: USW / len(agents)
     """
+    if utilities is None:
+        utilities = get_utility_vector(X, agents, items)
     util = 0
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
+    for val in utilities:
         util += val
     return util / (len(agents))
 
 
 def nash_welfare(
-    X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    utilities: list[float] = None,
 ):
     """Compute Nash social welfare (NSW)
 
@@ -43,16 +54,17 @@ def nash_welfare(
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        utilities (list[float], optional): utility of every agent, as returned by general_yankee_swap_E. Defaults to None, to compute them from X.
 
     Returns:
         int: number of agents with utility 0
         float: n-root of NSW
     """
+    if utilities is None:
+        utilities = get_utility_vector(X, agents, items)
     util = 0
     num_zeros = 0
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
+    for val in utilities:
         if val == 0:
             num_zeros += 1
         else:
@@ -60,22 +72,26 @@ def nash_welfare(
     return num_zeros, np.exp(util / (len(agents) - num_zeros))
 
 
-def leximin(X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]):
+def leximin(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    utilities: list[float] = None,
+):
     """Compute Leximin vector, i.e. vector with agents utilities, sorted in decreasing order
 
     Args:
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        utilities (list[float], optional): utility of every agent, as returned by general_yankee_swap_E. Defaults to None, to compute them from X.
 
     Returns:
         list[int]: utilities for all agents
     """
-    valuations = []
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
-        valuations.append(val)
+    if utilities is None:
+        utilities = get_utility_vector(X, agents, items)
+    valuations = np.asarray(utilities).tolist()
     valuations.sort()
     valuations.reverse()
     return valuations
@@ -165,7 +181,11 @@ def pairwise_maximin_share(
     course_strings = sorted([item.values[0] for item in new_schedule])
 
     PMMS[agent1] = yankee_swap_sub_problem(agent1, new_schedule, course_strings)
-    PMMS[agent2] = yankee_swap_sub_problem(agent2, new_schedule, course_strings)
+    if agent1.type_key() == agent2.type_key():
+        # identical agents have the same share of the subproblem
+        PMMS[agent2] = PMMS[agent1]
+    else:
+        PMMS[agent2] = yankee_swap_sub_problem(agent2, new_schedule, course_strings)
 
     return PMMS
 
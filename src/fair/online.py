@@ -0,0 +1,366 @@
+import time
+from functools import partial
+
+from .agent import BaseAgent
+from .allocation import (
+    copy_allocation_storage,
+    find_stranded_agents,
+    get_exchange_graph_terminals,
+    get_gain_from_utility,
+    get_gain_vector,
+    get_item_exchanges,
+    get_items_reaching_sink,
+    get_utility_vector,
+    initialize_allocation_storage,
+    initialize_exchange_graph,
+    initialize_exchange_graph_E,
+    update_agent_edges_E,
+    yankee_swap_step,
+)
+from .graph import EdgeStore, LazyExchangeGraph
+from .item import ScheduleItem
+from .priority import AgentPriorityQueue
+from .state import AllocationState
+
+
+class CapacityChange:
+    """The number of seats of an item changes"""
+
+    def __init__(self, item_index: int, capacity: int):
+        """
+        Args:
+            item_index (int): index of the item
+            capacity (int): new total number of copies of the item, allocated or not
+        """
+        self.item_index = item_index
+        self.capacity = capacity
+
+
+class ItemRemoved:
+    """An item is withdrawn, for instance a cancelled section"""
+
+    def __init__(self, item_index: int):
+        """
+        Args:
+            item_index (int): index of the item
+        """
+        self.item_index = item_index
+
+
+class AgentAdded:
+    """A new agent joins"""
+
+    def __init__(self, agent: BaseAgent, weight: float = None):
+        """
+        Args:
+            agent (BaseAgent): the agent, which receives the next free index
+            weight (float, optional): weight of the agent, see OnlineYankeeSwap.add_agent. Defaults to None.
+        """
+        self.agent = agent
+        self.weight = weight
+
+
+class AgentWithdrawn:
+    """An agent leaves and gives up its bundle"""
+
+    def __init__(self, agent_index: int):
+        """
+        Args:
+            agent_index (int): index of the agent
+        """
+        self.agent_index = agent_index
+
+
+class OnlineYankeeSwap:
+    """Yankee swap allocation kept up to date through a stream of add/drop events
+
+    The allocation, exchange graph and edge store of a general_yankee_swap_E run are kept
+    between events. Each event changes only the bundles, capacities and edges it touches,
+    after which the agents that may now improve are put back in play and Yankee swap
+    continues until every player is done again:
+
+    * agents who lose an item play again;
+    * agents who had stopped play again if one of their desired items can newly reach
+      the sink, unless they still cannot add any item that reaches it;
+    * new agents play from an empty bundle.
+
+    When a capacity drops below the number of owners, the owners with the highest
+    utility lose the item first, latest agents first among ties. Agent indices never
+    change; a withdrawn agent keeps an empty bundle and never plays again.
+    """
+
+    def __init__(
+        self,
+        agents: list[BaseAgent],
+        items: list[ScheduleItem],
+        criteria: str = "LorenzDominance",
+        weights: list[float] = [],
+        backend: str = "networkx",
+        storage: str = "matrix",
+        initial_allocation=None,
+    ):
+        """
+        Args:
+            agents (list[BaseAgent]): List of agents from class BaseAgent
+            items (list[ScheduleItem]): List of items from class BaseItem
+            criteria (str, optional): gain function criteria, see get_gain_function. Defaults to "LorenzDominance".
+            weights (list[float], optional): list of agents assigned weights, extended with a weight for every added agent. Defaults to [].
+            backend (str, optional): exchange graph implementation, see initialize_exchange_graph. Defaults to "networkx".
+            storage (str, optional): allocation storage, see initialize_allocation_storage. Defaults to "matrix".
+            initial_allocation (type[np.ndarray] | BaseAllocation, optional): allocation to start from instead of running
+                Yankee swap from an empty one, see general_yankee_swap_E. Defaults to None.
+        """
+        self.agents = list(agents)
+        self.items = items
+        self.criteria = criteria
+        self.weights = list(weights)
+        if initial_allocation is None:
+            X = initialize_allocation_storage(items, self.agents, storage)
+            self.E = EdgeStore()
+            self.G = initialize_exchange_graph(len(items), backend, self.E)
+        else:
+            X = copy_allocation_storage(initial_allocation, items, self.agents, storage)
+            self.G, self.E = initialize_exchange_graph_E(X, self.agents, items, backend)
+        self.state = AllocationState(X, items)
+        if isinstance(self.G, LazyExchangeGraph):
+            self.G.bind(
+                self.state.owners,
+                partial(get_item_exchanges, self.state, self.agents, items),
+            )
+        self.source, self.sink = get_exchange_graph_terminals(self.G)
+        self.utility_vector = get_utility_vector(
+            self.state, self.agents, items
+        ).tolist()
+        self.gain_vector = get_gain_vector(
+            self.state, self.agents, items, criteria, self.weights
+        )
+        self.players = AgentPriorityQueue(self.gain_vector)
+        self.withdrawn = set()
+        self.removed_items = set()
+        self.latencies = []
+        self.iterations = 0
+        self._desired = [
+            set(agent.get_desired_items_indexes(items)) for agent in self.agents
+        ]
+        self._run()
+
+    @property
+    def X(self):
+        """Current allocation matrix or storage"""
+        return self.state.X
+
+    def process(self, event):
+        """Apply an event and repair the allocation
+
+        Args:
+            event (CapacityChange | ItemRemoved | AgentAdded | AgentWithdrawn): the event
+
+        Raises:
+            ValueError: event must be one of the supported types
+
+        Returns:
+            float: wall-clock time taken to apply the event and repair the allocation
+        """
+        start = time.perf_counter()
+        if isinstance(event, CapacityChange):
+            self.change_capacity(event.item_index, event.capacity)
+        elif isinstance(event, ItemRemoved):
+            self.remove_item(event.item_index)
+        elif isinstance(event, AgentAdded):
+            self.add_agent(event.agent, event.weight)
+        elif isinstance(event, AgentWithdrawn):
+            self.withdraw_agent(event.agent_index)
+        else:
+            raise ValueError(f"unknown add/drop event: {event}")
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        return latency
+
+    def process_events(self, events):
+        """Apply a stream of events, one at a time
+
+        Args:
+            events (Iterable): events, see process
+
+        Yields:
+            float: wall-clock time taken by each event
+        """
+        for event in events:
+            yield self.process(event)
+
+    def change_capacity(self, item_index: int, capacity: int):
+        """Set the total number of copies of an item and repair the allocation
+
+        Args:
+            item_index (int): index of the item
+            capacity (int): new total number of copies, allocated or not
+
+        Raises:
+            ValueError: removed items cannot change capacity, and capacity cannot be negative
+        """
+        if item_index in self.removed_items:
+            raise ValueError(f"item {item_index} has been removed")
+        if capacity < 0:
+            raise ValueError(f"capacity of item {item_index} cannot be negative")
+        self._set_capacity(item_index, capacity)
+        self._run()
+
+    def remove_item(self, item_index: int):
+        """Remove every copy of an item and repair the allocation
+
+        Args:
+            item_index (int): index of the item
+        """
+        self._set_capacity(item_index, 0)
+        self.removed_items.add(item_index)
+        self._run()
+
+    def add_agent(self, agent: BaseAgent, weight: float = None):
+        """Add an agent with an empty bundle and let it play
+
+        Args:
+            agent (BaseAgent): the agent
+            weight (float, optional): weight of the agent, for weighted criteria. Defaults to None.
+
+        Raises:
+            ValueError: no weight is given, while the agents already playing have weights
+
+        Returns:
+            int: index of the agent
+        """
+        if weight is None and len(self.weights) > 0:
+            raise ValueError(
+                "agents have weights, a weight is needed for the new agent"
+            )
+        agent_index = self.state.add_agent()
+        self.agents.append(agent)
+        if weight is not None:
+            self.weights.append(weight)
+        self._desired.append(set(agent.get_desired_items_indexes(self.items)))
+        self.utility_vector.append(0)
+        self.gain_vector.append(0)
+        self.players.update(agent_index, 0)
+        self._run()
+        return agent_index
+
+    def withdraw_agent(self, agent_index: int):
+        """Return an agent's bundle to the pile and repair the allocation
+
+        Args:
+            agent_index (int): index of the agent
+        """
+        reaching = get_items_reaching_sink(self.G)
+        for item_index in self.state.bundle_indexes(agent_index):
+            self.state.release(item_index, agent_index)
+            self.state.set_remaining(item_index, self.state.remaining(item_index) + 1)
+            self._update_sink_edge(item_index)
+        for edge in self.E.remove_agent(agent_index):
+            if self.G.has_edge(*edge):
+                self.G.remove_edge(*edge)
+        if agent_index in self.players:
+            self.players.remove(agent_index)
+        self.withdrawn.add(agent_index)
+        self.utility_vector[agent_index] = 0
+        self.gain_vector[agent_index] = float("-inf")
+        self._reactivate(reaching)
+        self._run()
+
+    def _set_capacity(self, item_index: int, capacity: int):
+        """Set the total number of copies of an item, taking it away from owners if needed
+
+        Args:
+            item_index (int): index of the item
+            capacity (int): new total number of copies, allocated or not
+        """
+        reaching = get_items_reaching_sink(self.G)
+        owners = self.state.owners(item_index)
+        evicted = sorted(owners, key=lambda a: (self.utility_vector[a], a))
+        evicted = evicted[len(evicted) - max(0, len(owners) - capacity) :]
+        for agent_index in evicted:
+            self.state.release(item_index, agent_index)
+            for edge in self.E.remove_agent(agent_index, item_index):
+                if self.G.has_edge(*edge):
+                    self.G.remove_edge(*edge)
+            update_agent_edges_E(
+                self.state, self.G, self.E, self.agents, self.items, agent_index
+            )
+            self.utility_vector[agent_index] -= 1
+        self.state.set_remaining(item_index, capacity - len(owners) + len(evicted))
+        self._update_sink_edge(item_index)
+        for agent_index in evicted:
+            self._play(agent_index)
+        self._reactivate(reaching)
+
+    def _update_sink_edge(self, item_index: int):
+        """Link an item to the sink exactly when it has copies left
+
+        Args:
+            item_index (int): index of the item
+        """
+        linked = self.G.has_edge(item_index, self.sink)
+        if self.state.remaining(item_index) > 0 and not linked:
+            self.G.add_edge(item_index, self.sink)
+        elif self.state.remaining(item_index) == 0 and linked:
+            self.G.remove_edge(item_index, self.sink)
+
+    def _reactivate(self, reaching: set[int]):
+        """Put back in play the agents that may improve since items started reaching the sink
+
+        Args:
+            reaching (set[int]): items that reached the sink before the event
+        """
+        new = get_items_reaching_sink(self.G).difference(reaching)
+        if len(new) == 0:
+            return
+        candidates = [
+            agent_index
+            for agent_index in range(len(self.agents))
+            if agent_index not in self.players
+            and agent_index not in self.withdrawn
+            and not self._desired[agent_index].isdisjoint(new)
+        ]
+        stranded = set(
+            find_stranded_agents(
+                self.state, self.G, self.agents, self.items, candidates
+            )
+        )
+        for agent_index in candidates:
+            if agent_index not in stranded:
+                self._play(agent_index)
+
+    def _play(self, agent_index: int):
+        """Put an agent in play with the gain of its current utility
+
+        Args:
+            agent_index (int): index of the agent
+        """
+        if self.utility_vector[agent_index] == 0:
+            gain = 0
+        else:
+            gain = get_gain_from_utility(
+                self.utility_vector[agent_index],
+                agent_index,
+                self.criteria,
+                self.weights,
+            )
+        self.gain_vector[agent_index] = gain
+        self.players.update(agent_index, gain)
+
+    def _run(self):
+        """Run Yankee swap until every player is done"""
+        while len(self.players) > 0:
+            self.iterations += 1
+            agent_picked = self.players.peek()
+            self.G, self.E, _, _ = yankee_swap_step(
+                self.state,
+                self.G,
+                self.E,
+                self.agents,
+                self.items,
+                agent_picked,
+                self.players,
+                self.gain_vector,
+                self.utility_vector,
+                criteria=self.criteria,
+                weights=self.weights,
+            )
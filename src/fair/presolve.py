@@ -0,0 +1,97 @@
+import inspect
+
+import numpy as np
+
+from .agent import BaseAgent
+from .item import ScheduleItem
+from .storage import BaseAllocation
+
+
+def presolve(agents: list[BaseAgent], items: list[ScheduleItem]):
+    """Find the safe reductions of an allocation instance
+
+    * agents that desire no item never receive one, and can be left out;
+    * items that no agent desires are never allocated;
+    * items with at least as many copies as agents desiring them never run out, so a
+      shortest path in the exchange graph that reaches them goes straight to the sink,
+      and the exchange edges leaving them need not be built.
+
+    Items keep their indices, since the agents' constraints are indexed by them.
+
+    Args:
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+
+    Returns:
+        list[int]: indices of the agents that desire some item
+        set[int]: indices of the items that never run out, among those desired
+        dict: reduction statistics, "agents", "agents_dropped", "items", "items_undesired" and "items_free"
+    """
+    demand = np.zeros(len(items), dtype=int)
+    kept = []
+    for agent_index, agent in enumerate(agents):
+        desired = agent.get_desired_items_indexes(items)
+        if len(desired) > 0:
+            kept.append(agent_index)
+            demand[desired] += 1
+
+    free_items = {
+        item_index
+        for item_index, item in enumerate(items)
+        if demand[item_index] > 0 and item.capacity >= demand[item_index]
+    }
+    stats = {
+        "agents": len(agents),
+        "agents_dropped": len(agents) - len(kept),
+        "items": len(items),
+        "items_undesired": int(np.sum(demand == 0)),
+        "items_free": len(free_items),
+    }
+
+    return kept, free_items, stats
+
+
+def solve_presolved(
+    algorithm,
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    weights: list[float] = None,
+    **kwargs,
+):
+    """Run an allocation algorithm on the reduced instance and map the allocation back
+
+    Agents that desire no item are left out of the run, and algorithms accepting free_items, such as
+    general_yankee_swap_E, are told which items never run out, see presolve. The allocation is the
+    same as that of a run on the original instance, except with round_robin: an agent dropping out
+    of a round makes it skip the next agent, so leaving out agents that desire nothing changes
+    which agents are skipped.
+
+    Args:
+        algorithm (Callable): allocation algorithm taking agents and items, such as general_yankee_swap_E,
+            round_robin or serial_dictatorship
+        agents (list[BaseAgent]): List of agents from class BaseAgent
+        items (list[ScheduleItem]): List of items from class BaseItem
+        weights (list[float], optional): weight of every agent, restricted to the agents kept and passed to the
+            algorithm as weights. Defaults to None, for none.
+        **kwargs: passed on to the algorithm
+
+    Returns:
+        X (type[np.ndarray]): allocation matrix of the original instance
+        dict: reduction statistics, see presolve
+    """
+    kept, free_items, stats = presolve(agents, items)
+    if weights is not None:
+        kwargs["weights"] = [weights[i] for i in kept]
+    if "free_items" in inspect.signature(algorithm).parameters:
+        kwargs["free_items"] = free_items
+
+    result = algorithm([agents[i] for i in kept], items, **kwargs)
+    X_reduced = result[0] if isinstance(result, tuple) else result
+    if isinstance(X_reduced, BaseAllocation):
+        X_reduced = X_reduced.to_matrix()
+
+    X = np.zeros([len(items), len(agents) + 1], dtype=X_reduced.dtype)
+    X[:, kept] = X_reduced[:, :-1]
+    X[:, -1] = X_reduced[:, -1]
+
+    return X, stats
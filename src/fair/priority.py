@@ -0,0 +1,107 @@
+import heapq
+
+
+class AgentPriorityQueue:
+    """Indexed max-priority queue of agents keyed by gain function value
+
+    Ties are broken in favor of the lowest agent index, which matches the order of
+    np.argmax over a gain vector. Updating an agent's gain pushes a new heap entry and
+    leaves the old one in place; stale entries are discarded lazily when they reach the
+    top of the heap, so every operation costs O(log M) amortized.
+    """
+
+    def __init__(self, gains: list[float]):
+        """
+        Args:
+            gains (list[float]): initial gain of every agent, indexed by agent
+        """
+        self._gains = {agent_index: gain for agent_index, gain in enumerate(gains)}
+        self._heap = [(-gain, agent_index) for agent_index, gain in enumerate(gains)]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._gains)
+
+    def __contains__(self, agent_index: int):
+        return agent_index in self._gains
+
+    def __iter__(self):
+        return iter(sorted(self._gains))
+
+    def gain(self, agent_index: int):
+        """Current gain of an agent in the queue
+
+        Args:
+            agent_index (int): index of the agent
+
+        Returns:
+            float: gain function value
+        """
+        return self._gains[agent_index]
+
+    def update(self, agent_index: int, gain: float):
+        """Set the gain of an agent in the queue
+
+        Args:
+            agent_index (int): index of the agent
+            gain (float): new gain function value
+        """
+        self._gains[agent_index] = gain
+        heapq.heappush(self._heap, (-gain, agent_index))
+        if len(self._heap) > 2 * len(self._gains) + 16:
+            self._compact()
+
+    def remove(self, agent_index: int):
+        """Remove an agent from the queue
+
+        Args:
+            agent_index (int): index of the agent
+        """
+        del self._gains[agent_index]
+
+    def peek(self):
+        """Agent with the highest gain, lowest index first among ties
+
+        Raises:
+            IndexError: queue must not be empty
+
+        Returns:
+            int: index of the agent
+        """
+        while self._heap:
+            neg_gain, agent_index = self._heap[0]
+            if self._gains.get(agent_index) == -neg_gain:
+                return agent_index
+            heapq.heappop(self._heap)
+        raise IndexError("peek from an empty agent queue")
+
+    def peek_ties(self, k: int):
+        """Up to k agents sharing the highest gain, in the order they would be picked
+
+        Args:
+            k (int): maximum number of agents
+
+        Returns:
+            list[int]: indices of the agents, in increasing order
+        """
+        top = self.peek()
+        ties = []
+        popped = []
+        while self._heap and len(ties) < k:
+            entry = heapq.heappop(self._heap)
+            popped.append(entry)
+            neg_gain, agent_index = entry
+            if self._gains.get(agent_index) != -neg_gain:
+                continue
+            if -neg_gain != self._gains[top]:
+                break
+            if agent_index not in ties:
+                ties.append(agent_index)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return ties
+
+    def _compact(self):
+        """Rebuild the heap without stale entries"""
+        self._heap = [(-gain, agent_index) for agent_index, gain in self._gains.items()]
+        heapq.heapify(self._heap)
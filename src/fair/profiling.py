@@ -0,0 +1,151 @@
+import time
+from contextlib import nullcontext
+
+
+class AllocationProfiler:
+    """Per-phase timings and event counters for an allocation run
+
+    Time spent in each named phase and increments of each named counter are recorded
+    for the current iteration and folded into the totals when next_iteration is called.
+    Phases may be nested, in which case the inner phase's time is also included in the
+    outer one. A disabled profiler records nothing and its methods return immediately,
+    so it can be passed through the allocation loop at no measurable cost.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled (bool, optional): Should anything be recorded. Defaults to True.
+        """
+        self.enabled = enabled
+        self._phases = {}
+        self._counters = {}
+        self._iterations = []
+
+    def phase(self, name: str):
+        """Context manager timing a phase of the current iteration
+
+        Args:
+            name (str): name of the phase
+
+        Returns:
+            context manager: adds the time spent inside it to the phase
+        """
+        if not self.enabled:
+            return nullcontext()
+        return _Phase(self, name)
+
+    def add_time(self, name: str, elapsed: float):
+        """Add time to a phase of the current iteration
+
+        Args:
+            name (str): name of the phase
+            elapsed (float): time spent in the phase
+        """
+        if self.enabled:
+            self._phases[name] = self._phases.get(name, 0.0) + elapsed
+
+    def count(self, name: str, n: int = 1):
+        """Increment a counter of the current iteration
+
+        Args:
+            name (str): name of the counter
+            n (int, optional): increment. Defaults to 1.
+        """
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def next_iteration(self):
+        """Close the current iteration and start a new one"""
+        if self.enabled:
+            self._iterations.append((self._phases, self._counters))
+            self._phases = {}
+            self._counters = {}
+
+    def wrap_agents(self, agents: list):
+        """Count and time the valuation oracle calls made through agents
+
+        Calls to valuation, marginal_contribution and exchange_contribution increment the
+        "oracle_calls" counter and a counter named after the method, such as
+        "exchange_contribution_calls", and are timed as the "oracle" phase.
+
+        Args:
+            agents (list[BaseAgent]): List of agents from class BaseAgent
+
+        Returns:
+            list[BaseAgent]: proxies delegating to agents, or agents itself if the profiler is disabled
+        """
+        if not self.enabled:
+            return agents
+        return [_OracleProxy(agent, self) for agent in agents]
+
+    def summary(self):
+        """Totals and per-iteration values of every phase and counter
+
+        Only closed iterations are included. Per-iteration lists hold 0 for iterations in
+        which a phase or counter was not recorded.
+
+        Returns:
+            dict: "iterations" (int), "phases" and "counters", the latter two mapping every
+                name to a dictionary with its "total" and its "per_iteration" list
+        """
+        summary = {"iterations": len(self._iterations), "phases": {}, "counters": {}}
+        for position, key, zero in [(0, "phases", 0.0), (1, "counters", 0)]:
+            names = sorted(
+                {name for record in self._iterations for name in record[position]}
+            )
+            for name in names:
+                per_iteration = [
+                    record[position].get(name, zero) for record in self._iterations
+                ]
+                summary[key][name] = {
+                    "total": sum(per_iteration),
+                    "per_iteration": per_iteration,
+                }
+        return summary
+
+
+class _Phase:
+    """Context manager adding the time spent inside it to a profiler phase"""
+
+    def __init__(self, profiler: AllocationProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, time.process_time() - self.start)
+        return False
+
+
+class _OracleProxy:
+    """Agent wrapper counting and timing valuation oracle calls"""
+
+    def __init__(self, agent, profiler: AllocationProfiler):
+        self._agent = agent
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        if name == "_agent":
+            raise AttributeError(name)
+        return getattr(self._agent, name)
+
+    def _call(self, method: str, *args):
+        self._profiler.count("oracle_calls")
+        self._profiler.count(method + "_calls")
+        start = time.process_time()
+        result = getattr(self._agent, method)(*args)
+        self._profiler.add_time("oracle", time.process_time() - start)
+        return result
+
+    def valuation(self, bundle: list):
+        return self._call("valuation", bundle)
+
+    def marginal_contribution(self, bundle: list, item):
+        return self._call("marginal_contribution", bundle, item)
+
+    def exchange_contribution(self, bundle: list, og_item, new_item):
+        return self._call("exchange_contribution", bundle, og_item, new_item)
@@ -0,0 +1,158 @@
+from bisect import insort
+
+import numpy as np
+
+from .item import ScheduleItem
+from .storage import BaseAllocation, MatrixAllocation
+
+
+class AllocationState:
+    """Allocation storage together with per-agent bundle and per-item owner indexes
+
+    The indexes are kept in sync with the storage as items are assigned and released,
+    so that bundles and owners can be read without scanning rows or columns of the
+    allocation. All writes go through to the wrapped storage.
+    """
+
+    def __init__(self, X, items: list[ScheduleItem]):
+        """
+        Args:
+            X (type[np.ndarray] | BaseAllocation): allocation storage, or len(items) x (num agents + 1) allocation matrix whose last column holds capacities
+            items (list[ScheduleItem]): Items from class BaseItem
+        """
+        self.X = X
+        self.storage = X if isinstance(X, BaseAllocation) else MatrixAllocation(X)
+        self.items = items
+        self._bundles = [[] for _ in range(self.storage.num_agents)]
+        self._owners = [[] for _ in range(self.storage.num_items)]
+        item_idxs, agent_idxs = self.storage.nonzero()
+        for item_index, agent_index in sorted(
+            zip(item_idxs.tolist(), agent_idxs.tolist())
+        ):
+            self._owners[item_index].append(agent_index)
+        for agent_index, item_index in sorted(
+            zip(agent_idxs.tolist(), item_idxs.tolist())
+        ):
+            self._bundles[agent_index].append(item_index)
+
+    def bundle_indexes(self, agent_index: int):
+        """Indices of the items currently owned by an agent
+
+        Args:
+            agent_index (int): index of the agent
+
+        Returns:
+            list[int]: item indices, in increasing order
+        """
+        return list(self._bundles[agent_index])
+
+    def bundle(self, agent_index: int):
+        """Items currently owned by an agent
+
+        Args:
+            agent_index (int): index of the agent
+
+        Returns:
+            list[ScheduleItem]: items, in increasing order of index
+        """
+        return [self.items[i] for i in self._bundles[agent_index]]
+
+    def owners(self, item_index: int):
+        """Indices of the agents currently owning an item
+
+        Args:
+            item_index (int): index of the item
+
+        Returns:
+            list[int]: agent indices, in increasing order
+        """
+        return list(self._owners[item_index])
+
+    def remaining(self, item_index: int):
+        """Number of unallocated copies of an item
+
+        Args:
+            item_index (int): index of the item
+
+        Returns:
+            int: remaining capacity
+        """
+        return self.storage.capacity[item_index]
+
+    def assign(self, item_index: int, agent_index: int):
+        """Add item to agent's bundle, without touching the pile
+
+        Args:
+            item_index (int): index of the item
+            agent_index (int): index of the agent
+        """
+        self.storage.set(item_index, agent_index, 1)
+        insort(self._bundles[agent_index], item_index)
+        insort(self._owners[item_index], agent_index)
+
+    def release(self, item_index: int, agent_index: int):
+        """Remove item from agent's bundle, without touching the pile
+
+        Args:
+            item_index (int): index of the item
+            agent_index (int): index of the agent
+        """
+        self.storage.set(item_index, agent_index, 0)
+        self._bundles[agent_index].remove(item_index)
+        self._owners[item_index].remove(agent_index)
+
+    def take(self, item_index: int):
+        """Remove one copy of an item from the pile of unallocated items
+
+        Args:
+            item_index (int): index of the item
+        """
+        self.storage.capacity[item_index] -= 1
+
+    def set_remaining(self, item_index: int, remaining: int):
+        """Set the number of unallocated copies of an item
+
+        Args:
+            item_index (int): index of the item
+            remaining (int): remaining capacity
+        """
+        self.storage.capacity[item_index] = remaining
+
+    def add_agent(self):
+        """Add an agent that owns nothing
+
+        An allocation matrix cannot grow in place, so X is then replaced by a copy with an extra column.
+
+        Returns:
+            int: index of the agent
+        """
+        self.storage.add_agent()
+        if not isinstance(self.X, BaseAllocation):
+            self.X = self.storage.X
+        self._bundles.append([])
+        return len(self._bundles) - 1
+
+    def allocate(self, item_index: int, agent_index: int):
+        """Move one copy of an item from the pile to agent's bundle
+
+        Args:
+            item_index (int): index of the item
+            agent_index (int): index of the agent
+        """
+        self.take(item_index)
+        self.assign(item_index, agent_index)
+
+
+def as_allocation_state(X, items: list[ScheduleItem]):
+    """Wrap allocation storage in an AllocationState, unless it already is one
+
+    Args:
+        X (type[np.ndarray] | BaseAllocation | AllocationState): allocation matrix, storage or state
+        items (list[ScheduleItem]): Items from class BaseItem
+
+    Returns:
+        AllocationState: allocation state writing through to X
+    """
+    if isinstance(X, AllocationState):
+        return X
+    return AllocationState(X, items)
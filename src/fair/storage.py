@@ -0,0 +1,225 @@
+import numpy as np
+
+
+class BaseAllocation:
+    """Storage for an allocation of items to agents
+
+    Remaining capacities are kept in a separate vector, indexed by item.
+    """
+
+    def __init__(self, num_items: int, num_agents: int, capacity: np.ndarray):
+        """
+        Args:
+            num_items (int): number of items
+            num_agents (int): number of agents
+            capacity (np.ndarray): remaining capacity of every item
+        """
+        self.num_items = num_items
+        self.num_agents = num_agents
+        self.capacity = capacity
+
+    @property
+    def shape(self):
+        """Shape of the equivalent allocation matrix, including the capacity column"""
+        return (self.num_items, self.num_agents + 1)
+
+    def get(self, item_index: int, agent_index: int):
+        """Is item allocated to agent
+
+        Args:
+            item_index (int): index of the item
+            agent_index (int): index of the agent
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def set(self, item_index: int, agent_index: int, value: int):
+        """Allocate (value 1) or deallocate (value 0) item to agent
+
+        Args:
+            item_index (int): index of the item
+            agent_index (int): index of the agent
+            value (int): 1 if allocated, 0 otherwise
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def bundle_indexes(self, agent_index: int):
+        """Indices of the items allocated to agent
+
+        Args:
+            agent_index (int): index of the agent
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def owners(self, item_index: int):
+        """Indices of the agents that item is allocated to
+
+        Args:
+            item_index (int): index of the item
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def nonzero(self):
+        """All allocated (item, agent) pairs
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def add_agent(self):
+        """Add an agent that owns nothing, with index num_agents
+
+        Raises:
+            NotImplementedError: Must be implemented by child class
+        """
+        raise NotImplementedError
+
+    def to_matrix(self):
+        """Equivalent len(items) x (len(agents)+1) allocation matrix
+
+        Returns:
+            np.ndarray: allocation matrix, last column holds remaining capacities
+        """
+        X = np.zeros(self.shape, dtype=int)
+        item_idxs, agent_idxs = self.nonzero()
+        X[item_idxs, agent_idxs] = 1
+        X[:, -1] = self.capacity
+        return X
+
+
+class MatrixAllocation(BaseAllocation):
+    """Item-major allocation matrix with capacities in the last column"""
+
+    def __init__(self, X: type[np.ndarray]):
+        """
+        Args:
+            X (type[np.ndarray]): len(items) x (len(agents)+1) allocation matrix
+        """
+        super().__init__(X.shape[0], X.shape[1] - 1, X[:, -1])
+        self.X = X
+
+    def get(self, item_index: int, agent_index: int):
+        return int(self.X[item_index, agent_index])
+
+    def set(self, item_index: int, agent_index: int, value: int):
+        self.X[item_index, agent_index] = value
+
+    def bundle_indexes(self, agent_index: int):
+        return np.flatnonzero(self.X[:, agent_index]).tolist()
+
+    def owners(self, item_index: int):
+        return np.flatnonzero(self.X[item_index, :-1]).tolist()
+
+    def nonzero(self):
+        return np.nonzero(self.X[:, :-1])
+
+    def add_agent(self):
+        self.X = np.insert(self.X, self.num_agents, 0, axis=1)
+        self.capacity = self.X[:, -1]
+        self.num_agents += 1
+
+    def to_matrix(self):
+        return self.X
+
+
+class DenseAllocation(BaseAllocation):
+    """Compact agent-major allocation matrix
+
+    Each agent's bundle is a contiguous row of one byte entries, so reading a bundle
+    does not require strided access.
+    """
+
+    def __init__(
+        self, num_items: int, num_agents: int, capacity: np.ndarray, dtype=np.int8
+    ):
+        """
+        Args:
+            num_items (int): number of items
+            num_agents (int): number of agents
+            capacity (np.ndarray): remaining capacity of every item
+            dtype (optional): entry type, np.int8 or bool. Defaults to np.int8.
+        """
+        super().__init__(num_items, num_agents, np.array(capacity, dtype=np.int64))
+        self.A = np.zeros([num_agents, num_items], dtype=dtype)
+
+    def get(self, item_index: int, agent_index: int):
+        return int(self.A[agent_index, item_index])
+
+    def set(self, item_index: int, agent_index: int, value: int):
+        self.A[agent_index, item_index] = value
+
+    def bundle_indexes(self, agent_index: int):
+        return np.flatnonzero(self.A[agent_index]).tolist()
+
+    def owners(self, item_index: int):
+        return np.flatnonzero(self.A[:, item_index]).tolist()
+
+    def nonzero(self):
+        agent_idxs, item_idxs = np.nonzero(self.A)
+        return item_idxs, agent_idxs
+
+    def add_agent(self):
+        self.A = np.vstack([self.A, np.zeros([1, self.num_items], dtype=self.A.dtype)])
+        self.num_agents += 1
+
+
+class SparseAllocation(BaseAllocation):
+    """Allocation stored as sets of items per agent and sets of agents per item
+
+    Memory grows with the number of allocated items rather than with
+    len(items) x len(agents).
+    """
+
+    def __init__(self, num_items: int, num_agents: int, capacity: np.ndarray):
+        """
+        Args:
+            num_items (int): number of items
+            num_agents (int): number of agents
+            capacity (np.ndarray): remaining capacity of every item
+        """
+        super().__init__(num_items, num_agents, np.array(capacity, dtype=np.int64))
+        self._bundles = [set() for _ in range(num_agents)]
+        self._owners = [set() for _ in range(num_items)]
+
+    def get(self, item_index: int, agent_index: int):
+        return int(item_index in self._bundles[agent_index])
+
+    def set(self, item_index: int, agent_index: int, value: int):
+        if value:
+            self._bundles[agent_index].add(item_index)
+            self._owners[item_index].add(agent_index)
+        else:
+            self._bundles[agent_index].discard(item_index)
+            self._owners[item_index].discard(agent_index)
+
+    def bundle_indexes(self, agent_index: int):
+        return sorted(self._bundles[agent_index])
+
+    def owners(self, item_index: int):
+        return sorted(self._owners[item_index])
+
+    def nonzero(self):
+        pairs = sorted(
+            (item_index, agent_index)
+            for agent_index, bundle in enumerate(self._bundles)
+            for item_index in bundle
+        )
+        item_idxs = np.array([pair[0] for pair in pairs], dtype=np.int64)
+        agent_idxs = np.array([pair[1] for pair in pairs], dtype=np.int64)
+        return item_idxs, agent_idxs
+
+    def add_agent(self):
+        self._bundles.append(set())
+        self.num_agents += 1
@@ -178,6 +178,19 @@ class ConstraintSatifactionValuation(MemoableValuation):
 
         return len(indep)
 
+    def signature(self):
+        """Hashable description of the valuation
+
+        Valuations with equal signatures assign the same value to every bundle, so they can share one memo.
+
+        Returns:
+            tuple: type of the valuation and signatures of its constraints
+        """
+        return (
+            type(self).__name__,
+            tuple(constraint.signature() for constraint in self.constraints),
+        )
+
     def compile(self):
         """Compile constraints list into single constraint
 
@@ -210,9 +223,19 @@ class UniqueItemsValuation:
             return self.independent
         elif name == "value":
             return self.value
+        elif name == "valuation":
+            raise AttributeError(name)
         else:
             return getattr(self.valuation, name)
 
+    def signature(self):
+        """Hashable description of the valuation, see ConstraintSatifactionValuation.signature
+
+        Returns:
+            tuple: type of the adapter and signature of the underlying valuation
+        """
+        return (type(self).__name__, self.valuation.signature())
+
     def independent(self, bundle: List[BaseItem]):
         """Do the unique items in this bundle receive maximal value
 
@@ -1,16 +1,19 @@
 import os
+from collections import defaultdict
 from typing import List
 
 import numpy as np
+import pandas as pd
 import pytest
 
+from fair.agent import LegacyStudent
 from fair.constraint import (
     CourseTimeConstraint,
     LinearConstraint,
     MutualExclusivityConstraint,
     PreferenceConstraint,
 )
-from fair.feature import Course, Section, Slot, Weekday
+from fair.feature import Course, Section, Slot, Weekday, slots_for_time_range
 from fair.item import ScheduleItem
 from fair.simulation import RenaissanceMan
 from fair.valuation import ConstraintSatifactionValuation
@@ -331,3 +334,103 @@ def student3(
 @pytest.fixture
 def bernoullis():
     return np.array([[1, 0, 1], [0, 1, 1]])
+
+
+@pytest.fixture
+def fall2023_schedule(excel_schedule_path_with_cats: str):
+    with open(excel_schedule_path_with_cats, "rb") as fd:
+        df = pd.read_excel(fd)
+
+    course = Course(df["Catalog"].astype(str).unique().tolist())
+    slot = Slot.from_time_ranges(df["Mtg Time"].dropna().unique(), "15T")
+    weekday = Weekday()
+    section = Section(df["Section"].dropna().unique().tolist())
+    features = [course, slot, weekday, section]
+
+    # every section has a single seat so that students compete for them
+    schedule = []
+    for idx, (_, row) in enumerate(df.iterrows()):
+        values = [
+            str(row["Catalog"]),
+            slots_for_time_range(row["Mtg Time"], slot.times),
+            tuple([day.strip() for day in row["zc.days"].split(" ")]),
+            row["Section"],
+        ]
+        schedule.append(
+            ScheduleItem(
+                features,
+                values,
+                index=idx,
+                capacity=1,
+                category=row["Categories"],
+            )
+        )
+
+    return schedule
+
+
+@pytest.fixture
+def fall2023_students(fall2023_schedule: List[ScheduleItem]):
+    course, slot, weekday, _ = fall2023_schedule[0].features
+    topic_map = defaultdict(set)
+    for item in fall2023_schedule:
+        topic_map[item.category].add(item.value(course))
+    topics = sorted([sorted(list(courses)) for courses in topic_map.values()])
+
+    global_constraints = [
+        CourseTimeConstraint.from_items(fall2023_schedule, slot, weekday),
+        MutualExclusivityConstraint.from_items(fall2023_schedule, course),
+    ]
+
+    students = []
+    for i in range(30):
+        student = RenaissanceMan(
+            topics,
+            [min(len(topic), 5) for topic in topics],
+            1,
+            5,
+            course,
+            global_constraints,
+            fall2023_schedule,
+            seed=i,
+        )
+        legacy_student = LegacyStudent(student, student.preferred_courses, course)
+        legacy_student.student.valuation.valuation = (
+            legacy_student.student.valuation.compile()
+        )
+        students.append(legacy_student)
+
+    return students
+
+
+@pytest.fixture
+def department_students(fall2023_schedule: list[ScheduleItem]):
+    course, slot, weekday, _ = fall2023_schedule[0].features
+    topic_map = defaultdict(set)
+    for item in fall2023_schedule:
+        topic_map[item.category].add(item.value(course))
+    topics = sorted([sorted(list(courses)) for courses in topic_map.values()])
+
+    global_constraints = [
+        CourseTimeConstraint.from_items(fall2023_schedule, slot, weekday),
+        MutualExclusivityConstraint.from_items(fall2023_schedule, course),
+    ]
+
+    # every student only wants courses from one of three topics
+    students = []
+    for i in range(30):
+        max_quantities = [0] * len(topics)
+        max_quantities[i % 3] = min(len(topics[i % 3]), 5)
+        student = RenaissanceMan(
+            topics,
+            max_quantities,
+            1,
+            5,
+            course,
+            global_constraints,
+            fall2023_schedule,
+            seed=i,
+        )
+        students.append(LegacyStudent(student, student.preferred_courses, course))
+
+    return students
@@ -1,6 +1,9 @@
+import copy
+
 from fair.agent import (
     LegacyStudent,
     Student,
+    deduplicate_agents,
     exchange_contribution,
     marginal_contribution,
 )
@@ -84,3 +87,16 @@ def test_get_desired_item_indexes(schedule, course):
     computed_desired = leg_student.get_desired_items_indexes(schedule)
 
     assert actual_desired == computed_desired
+
+
+def test_deduplicate_agents(fall2023_students: list[LegacyStudent]):
+    course = fall2023_students[0].course
+    students = fall2023_students[:3] + copy.deepcopy(
+        fall2023_students[:3], {id(course): course}
+    )
+    agent_types = deduplicate_agents(students)
+
+    assert agent_types == [0, 1, 2, 0, 1, 2]
+    for i in range(3):
+        assert students[i + 3].student.valuation is students[i].student.valuation
+    assert students[0].student.valuation is not students[1].student.valuation
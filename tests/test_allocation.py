@@ -1,13 +1,33 @@
-from fair.agent import LegacyStudent
+import copy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from fair.agent import LegacyStudent, deduplicate_agents
 from fair.allocation import (
     serial_dictatorship,
     general_yankee_swap,
     general_yankee_swap_E,
+    general_yankee_swap_E_events,
+    get_bundle_from_allocation_matrix,
+    get_utility_vector,
+    initialize_allocation_matrix,
+    initialize_exchange_graph,
+    initialize_exchange_graph_E,
     round_robin,
+    yankee_swap_step,
 )
+from fair.checkpoint import load_checkpoint
 from fair.feature import Course
+from fair.graph import EdgeStore
 from fair.item import ScheduleItem
+from fair.metrics import leximin
+from fair.priority import AgentPriorityQueue
+from fair.profiling import AllocationProfiler
 from fair.simulation import RenaissanceMan
+from fair.state import AllocationState
 
 
 def test_general_yankee_swap(
@@ -58,6 +78,63 @@ def test_general_yankee_swap_E(
     assert set(courses2) <= set(renaissance2.preferred_courses)
 
 
+def test_general_yankee_swap_plot_exchange_graph(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    plt.switch_backend("Agg")
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+
+    for algorithm in [general_yankee_swap, general_yankee_swap_E]:
+        X, _, _ = algorithm(students, schedule)
+        X_plot, _, _ = algorithm(students, schedule, plot_exchange_graph=True)
+        assert (X == X_plot).all()
+        plt.close("all")
+
+
+def test_yankee_swap_step(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    M = len(fall2023_students)
+    for E, algorithm in [
+        (EdgeStore(), general_yankee_swap_E),
+        (None, general_yankee_swap),
+    ]:
+        X = initialize_allocation_matrix(fall2023_schedule, fall2023_students)
+        state = AllocationState(X, fall2023_schedule)
+        G = initialize_exchange_graph(len(fall2023_schedule))
+        gain_vector = np.zeros([M])
+        utility_vector = np.zeros([M], dtype=int)
+        players = AgentPriorityQueue(gain_vector)
+        agents_involved_arr = []
+        while len(players) > 0:
+            G, E, _, agents_involved = yankee_swap_step(
+                state,
+                G,
+                E,
+                fall2023_students,
+                fall2023_schedule,
+                players.peek(),
+                players,
+                gain_vector,
+                utility_vector,
+            )
+            agents_involved_arr.append(len(agents_involved))
+
+        # the engines are this step in a loop
+        X_engine, _, agents_involved_engine = algorithm(
+            fall2023_students, fall2023_schedule
+        )
+        assert np.array_equal(X, X_engine)
+        assert agents_involved_arr == agents_involved_engine
+        assert (utility_vector == X[:, :-1].sum(axis=0)).all()
+
+
 def test_round_robin_swap(
     renaissance1: RenaissanceMan,
     renaissance2: RenaissanceMan,
@@ -104,3 +181,357 @@ def test_serial_dictatorship_swap(
     courses2 = [schedule[i].value(course) for i in range(len(alloc2)) if alloc2[i] == 1]
     assert set(courses1) <= set(renaissance1.preferred_courses)
     assert set(courses2) <= set(renaissance2.preferred_courses)
+
+
+def test_general_yankee_swap_E_array_backend(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X_nx, _, agents_nx = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+    X_arr, _, agents_arr = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, backend="array"
+    )
+
+    # backends must agree on every transfer
+    assert (X_nx == X_arr).all()
+    assert agents_nx == agents_arr
+
+
+def test_general_yankee_swap_E_incremental_backend_utilities(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X_nx, _, _, utilities_nx = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, return_utilities=True
+    )
+    X_inc, _, _, utilities_inc = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        backend="incremental",
+        return_utilities=True,
+    )
+
+    # ties between shortest paths differ, so only the utility profile is preserved
+    assert (utilities_nx == utilities_inc).all()
+    assert (
+        get_utility_vector(X_inc, fall2023_students, fall2023_schedule) == utilities_inc
+    ).all()
+
+
+def test_general_yankee_swap_E_bipartite_backend(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X_lazy, _, agents_lazy = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, backend="lazy"
+    )
+    profiler = AllocationProfiler()
+    X_bip, _, agents_bip = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, backend="bipartite", profiler=profiler
+    )
+
+    # the layered graph finds the transfer paths of the search on item edges
+    assert (X_lazy == X_bip).all()
+    assert agents_lazy == agents_bip
+    assert profiler.summary()["counters"]["nodes_expanded"]["total"] > 0
+
+    # ties are broken by item index, so only utilities are those of networkx
+    X_nx, _, _ = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+    assert (
+        get_utility_vector(X_bip, fall2023_students, fall2023_schedule)
+        == get_utility_vector(X_nx, fall2023_students, fall2023_schedule)
+    ).all()
+
+    with pytest.raises(ValueError):
+        initialize_exchange_graph(len(fall2023_schedule), "bipartite")
+
+
+def test_general_yankee_swap_E_bulk_retire(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, _, agents_involved = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+    for backend in ["networkx", "array"]:
+        X_bulk, time_steps, agents_involved_bulk = general_yankee_swap_E(
+            fall2023_students, fall2023_schedule, backend=backend, bulk_retire=True
+        )
+
+        # retiring early only reorders the failed iterations
+        assert (X == X_bulk).all()
+        assert len(time_steps) == len(agents_involved)
+        assert sorted(agents_involved_bulk) == sorted(agents_involved)
+        assert [n for n in agents_involved_bulk if n > 0] == [
+            n for n in agents_involved if n > 0
+        ]
+
+
+def test_general_yankee_swap_E_retire_saturated(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    profiler = AllocationProfiler()
+    X, _, agents_involved = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, profiler=profiler
+    )
+    profiler_saturated = AllocationProfiler()
+    X_saturated, _, agents_involved_saturated = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        retire_saturated=True,
+        profiler=profiler_saturated,
+    )
+
+    # saturated players are retired without a search, which only reorders the failed iterations
+    assert (X == X_saturated).all()
+    assert sorted(agents_involved_saturated) == sorted(agents_involved)
+    assert [n for n in agents_involved_saturated if n > 0] == [
+        n for n in agents_involved if n > 0
+    ]
+    counters = profiler.summary()["counters"]
+    counters_saturated = profiler_saturated.summary()["counters"]
+    assert counters_saturated["saturated"]["total"] > 0
+    assert (
+        counters_saturated["marginal_contribution_calls"]["total"]
+        < counters["marginal_contribution_calls"]["total"]
+    )
+
+
+def test_general_yankee_swap_E_batches(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    events = list(
+        general_yankee_swap_E_events(
+            fall2023_students, fall2023_schedule, backend="array"
+        )
+    )
+    for batch_size in [2, 8]:
+        profiler = AllocationProfiler()
+        events_batch = list(
+            general_yankee_swap_E_events(
+                fall2023_students,
+                fall2023_schedule,
+                backend="array",
+                batch_size=batch_size,
+                verify_batches=True,
+                profiler=profiler,
+            )
+        )
+
+        # speculation saves searches, not iterations: every committed path is the sequential one
+        assert [(e.agent, e.path_length, e.agents_involved) for e in events] == [
+            (e.agent, e.path_length, e.agents_involved) for e in events_batch
+        ]
+        assert (events[-1].X == events_batch[-1].X).all()
+        counters = profiler.summary()["counters"]
+        assert counters["speculative_paths_used"]["total"] > 0
+        assert (
+            counters["speculative_searches"]["total"]
+            >= counters["speculative_paths_used"]["total"]
+        )
+
+    with pytest.raises(ValueError):
+        general_yankee_swap_E(fall2023_students, fall2023_schedule, batch_size=8)
+
+
+def test_general_yankee_swap_E_events(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+    capsys,
+):
+    X, time_steps, agents_involved = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule
+    )
+    assert capsys.readouterr().out == ""
+
+    events = list(general_yankee_swap_E_events(fall2023_students, fall2023_schedule))
+
+    assert [event.agents_involved for event in events] == agents_involved
+    assert (events[-1].X == X).all()
+    for event in events:
+        if event.path_length == 0:
+            assert event.agents_involved == 0
+            assert event.gain == float("-inf")
+        else:
+            assert 1 <= event.agents_involved <= event.path_length
+
+    # stopping early leaves a partial allocation
+    for event in general_yankee_swap_E_events(fall2023_students, fall2023_schedule):
+        if event.iteration == 10:
+            break
+    assert event.X[:, :-1].sum() == len([n for n in agents_involved[:11] if n > 0])
+
+
+def test_general_yankee_swap_E_utilities(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, _, _, utility_vector = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        return_utilities=True,
+        verify_utilities=True,
+    )
+
+    assert (
+        utility_vector == get_utility_vector(X, fall2023_students, fall2023_schedule)
+    ).all()
+    assert leximin(X, fall2023_students, fall2023_schedule, utility_vector) == leximin(
+        X, fall2023_students, fall2023_schedule
+    )
+
+
+def test_initialize_exchange_graph_E(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+    tmp_path,
+):
+    path = str(tmp_path / "checkpoint.npz")
+    general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        checkpoint_path=path,
+        checkpoint_every=40,
+    )
+    checkpoint = load_checkpoint(path)
+
+    # building in bulk finds the edges maintained during the run
+    G, E = initialize_exchange_graph_E(
+        checkpoint["X"], fall2023_students, fall2023_schedule
+    )
+    assert set(G.edges) == set(checkpoint["G"].edges)
+    for edge in G.edges:
+        if "t" not in edge:
+            assert set(E.agents(*edge)) == set(checkpoint["E"].agents(*edge))
+
+
+def test_general_yankee_swap_E_warm_start(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, _, agents_involved = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+    X_warm, _, agents_involved_warm = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        initial_allocation=initialize_allocation_matrix(
+            fall2023_schedule, fall2023_students
+        ),
+    )
+    assert (X == X_warm).all()
+    assert agents_involved == agents_involved_warm
+
+    # a second wave of students joins the first
+    first_wave = len(fall2023_students) // 2
+    X_first, _, _ = general_yankee_swap_E(
+        fall2023_students[:first_wave], fall2023_schedule, storage="dense"
+    )
+    X_second, time_steps, _ = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        initial_allocation=X_first,
+        initial_players=range(first_wave, len(fall2023_students)),
+        verify_utilities=True,
+    )
+    capacity = [item.capacity for item in fall2023_schedule]
+    assert (X_second[:, :-1].sum(axis=1) + X_second[:, -1] == capacity).all()
+    assert X_second[:, first_wave:-1].sum() > 0
+    assert len(time_steps) == X_second[:, first_wave:-1].sum() + (
+        len(fall2023_students) - first_wave
+    )
+
+
+def test_general_yankee_swap_E_executor(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, _, agents_involved = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+
+    # exchanges found concurrently are applied in the sequential order
+    for pool in [ThreadPoolExecutor(max_workers=2), ProcessPoolExecutor(max_workers=2)]:
+        with pool as executor:
+            X_parallel, _, agents_involved_parallel = general_yankee_swap_E(
+                fall2023_students,
+                fall2023_schedule,
+                executor=executor,
+                parallel_threshold=2,
+            )
+        assert (X == X_parallel).all()
+        assert agents_involved == agents_involved_parallel
+
+
+def test_general_yankee_swap_E_agent_types(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    def unique_calls(students):
+        valuations = {id(s.student.valuation): s.student.valuation for s in students}
+        return sum(
+            v.valuation._unique_value_ct + v.valuation._unique_independent_ct
+            for v in valuations.values()
+        )
+
+    course = fall2023_students[0].course
+
+    students = fall2023_students + copy.deepcopy(
+        fall2023_students, {id(course): course}
+    )
+    for student in students:
+        student.student.valuation.valuation.reset()
+    X, _, agents_involved = general_yankee_swap_E(students, fall2023_schedule)
+    calls = unique_calls(students)
+
+    students = fall2023_students + copy.deepcopy(
+        fall2023_students, {id(course): course}
+    )
+    for student in students:
+        student.student.valuation.valuation.reset()
+    agent_types = deduplicate_agents(students)
+    assert len(set(agent_types)) == len(fall2023_students)
+    X_typed, _, agents_involved_typed = general_yankee_swap_E(
+        students, fall2023_schedule, agent_types=agent_types
+    )
+
+    # sharing valuations among identical students changes costs, not the allocation
+    assert (X == X_typed).all()
+    assert agents_involved == agents_involved_typed
+    assert unique_calls(students) < calls
+
+
+def test_general_yankee_swap_E_lazy_backend(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    profiler = AllocationProfiler()
+    X, _, agents_involved, utility_vector = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        backend="lazy",
+        profiler=profiler,
+        return_utilities=True,
+        verify_utilities=True,
+    )
+    profiler_eager = AllocationProfiler()
+    X_eager, _, agents_involved_eager = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        backend="bipartite",
+        profiler=profiler_eager,
+    )
+
+    # building edges on demand gives the allocation of eager maintenance
+    assert np.array_equal(X, X_eager)
+    assert agents_involved == agents_involved_eager
+    counters = profiler.summary()["counters"]
+    counters_eager = profiler_eager.summary()["counters"]
+    assert counters["edge_cache_hits"]["total"] > 0
+    assert counters["edge_cache_misses"]["total"] > 0
+    assert (
+        counters["exchange_contribution_calls"]["total"]
+        < counters_eager["exchange_contribution_calls"]["total"]
+    )
+
+    # ties are broken by item order rather than edge order, so only utilities match networkx
+    _, _, _, utility_vector_nx = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, return_utilities=True
+    )
+    assert (utility_vector == utility_vector_nx).all()
@@ -0,0 +1,101 @@
+import numpy as np
+
+from fair.agent import LegacyStudent
+from fair.allocation import (
+    general_yankee_swap_E,
+    get_bundle_from_allocation_matrix,
+    round_robin,
+    serial_dictatorship,
+)
+from fair.anytime import solve_anytime
+from fair.budget import AllocationBudget
+from fair.item import ScheduleItem
+
+
+def assert_feasible(X, agents, items):
+    capacity = [item.capacity for item in items]
+    assert (X[:, :-1].sum(axis=1) + X[:, -1] == capacity).all()
+    assert (X[:, -1] >= 0).all()
+    for agent_index, agent in enumerate(agents):
+        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
+        assert agent.valuation(bundle) == len(bundle)
+
+
+def test_allocation_budget():
+    budget = AllocationBudget(max_iterations=2)
+    assert not budget.exhausted()
+    budget.next_iteration()
+    budget.next_iteration()
+    assert budget.exhausted()
+    budget.stop([3, 1])
+    assert budget.stopped and budget.active == [1, 3]
+
+    budget.start()
+    assert not budget.stopped and budget.iterations == 0
+    assert AllocationBudget(time_limit=0).exhausted()
+    assert not AllocationBudget().exhausted()
+
+
+def test_general_yankee_swap_E_budget(
+    fall2023_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    X_full, time_steps, _ = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+
+    # a budget that is never reached changes nothing
+    budget = AllocationBudget(max_iterations=len(time_steps) + 1)
+    X, _, _ = general_yankee_swap_E(fall2023_students, fall2023_schedule, budget=budget)
+    assert (X == X_full).all()
+    assert not budget.stopped and budget.iterations == len(time_steps)
+
+    budget = AllocationBudget(max_iterations=10)
+    X, time_steps, _, _, utility_vector = general_yankee_swap_E(
+        fall2023_students,
+        fall2023_schedule,
+        budget=budget,
+        return_selection_times=True,
+        return_utilities=True,
+    )
+    assert budget.stopped and len(time_steps) == 10
+    assert len(budget.active) > 0
+    assert utility_vector.sum() == X[:, :-1].sum() == 10
+    assert_feasible(X, fall2023_students, fall2023_schedule)
+
+
+def test_solve_anytime(
+    fall2023_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    for algorithm in [general_yankee_swap_E, round_robin, serial_dictatorship]:
+        result = algorithm(fall2023_students, fall2023_schedule)
+        X_full = result[0] if isinstance(result, tuple) else result
+
+        X, stats = solve_anytime(algorithm, fall2023_students, fall2023_schedule)
+        assert (X == X_full).all()
+        assert stats["completed"] and stats["active_fraction"] == 0
+
+        X, stats = solve_anytime(
+            algorithm, fall2023_students, fall2023_schedule, max_iterations=5
+        )
+        assert not stats["completed"] and stats["iterations"] == 5
+        assert 0 < stats["active_fraction"] <= 1
+        assert_feasible(X, fall2023_students, fall2023_schedule)
+        assert (stats["utility_vector"] == X[:, :-1].sum(axis=0)).all()
+
+        # the fallback only adds items to the allocation reached
+        X_fallback, stats = solve_anytime(
+            algorithm,
+            fall2023_students,
+            fall2023_schedule,
+            max_iterations=5,
+            fallback=True,
+        )
+        assert stats["fallback_items"] > 0
+        assert (X_fallback[:, :-1] >= X[:, :-1]).all()
+        assert X_fallback[:, :-1].sum() == X[:, :-1].sum() + stats["fallback_items"]
+        assert_feasible(X_fallback, fall2023_students, fall2023_schedule)
+
+    X, stats = solve_anytime(
+        general_yankee_swap_E, fall2023_students, fall2023_schedule, max_iterations=0
+    )
+    assert not X[:, :-1].any()
+    assert stats["active_fraction"] == 1
+    assert not np.any(stats["utility_vector"])
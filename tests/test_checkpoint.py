@@ -0,0 +1,66 @@
+from fair.agent import LegacyStudent
+from fair.allocation import general_yankee_swap_E, get_utility_vector
+from fair.checkpoint import load_checkpoint
+from fair.item import ScheduleItem
+from fair.profiling import AllocationProfiler
+
+
+def test_general_yankee_swap_E_resume(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+    tmp_path,
+):
+    for backend, storage in [
+        ("networkx", "matrix"),
+        ("array", "dense"),
+        ("incremental", "sparse"),
+        ("bipartite", "matrix"),
+        ("lazy", "dense"),
+    ]:
+        path = str(tmp_path / f"{backend}.npz")
+        X, time_steps, agents_involved = general_yankee_swap_E(
+            fall2023_students,
+            fall2023_schedule,
+            backend=backend,
+            storage=storage,
+            checkpoint_path=path,
+            checkpoint_every=40,
+        )
+        X = X if storage == "matrix" else X.to_matrix()
+
+        # the last checkpoint was taken part way through the run
+        checkpoint = load_checkpoint(path)
+        assert checkpoint["count"] == 80
+        assert checkpoint["backend"] == backend
+        assert checkpoint["storage"] == storage
+        assert agents_involved[:80] == checkpoint["agents_involved_arr"]
+
+        checkpoint_X = checkpoint["X"]
+        if storage != "matrix":
+            checkpoint_X = checkpoint_X.to_matrix()
+        assert (
+            checkpoint["utility_vector"]
+            == get_utility_vector(checkpoint_X, fall2023_students, fall2023_schedule)
+        ).all()
+
+        # utilities are restored rather than recomputed from the bundles
+        profiler = AllocationProfiler()
+        X_resumed, time_steps_resumed, agents_involved_resumed, utility_vector = (
+            general_yankee_swap_E(
+                fall2023_students,
+                fall2023_schedule,
+                resume_from=path,
+                profiler=profiler,
+                return_utilities=True,
+            )
+        )
+        X_resumed = X_resumed if storage == "matrix" else X_resumed.to_matrix()
+
+        assert (X == X_resumed).all()
+        assert agents_involved == agents_involved_resumed
+        assert len(time_steps) == len(time_steps_resumed)
+        assert (
+            utility_vector
+            == get_utility_vector(X, fall2023_students, fall2023_schedule)
+        ).all()
+        assert "valuation_calls" not in profiler.summary()["counters"]
@@ -0,0 +1,67 @@
+from fair.agent import LegacyStudent
+from fair.allocation import (
+    general_yankee_swap_E,
+    get_utility_vector,
+    initialize_exchange_graph_E,
+    round_robin,
+)
+from fair.compression import compress_items, find_item_classes, solve_compressed
+from fair.item import ScheduleItem
+from fair.metrics import leximin
+
+
+def test_find_item_classes(
+    fall2023_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    classes = find_item_classes(fall2023_students, fall2023_schedule)
+
+    assert sorted(sum(classes, [])) == list(range(len(fall2023_schedule)))
+    assert len(classes) < len(fall2023_schedule)
+    course, slot, weekday, _ = fall2023_schedule[0].features
+    for members in classes:
+        # only the section number differs within a class
+        keys = {
+            tuple(fall2023_schedule[i].value(f) for f in [course, slot, weekday])
+            for i in members
+        }
+        assert len(keys) == 1
+
+
+def test_solve_compressed(
+    fall2023_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    agents, items, classes = compress_items(fall2023_students, fall2023_schedule)
+    assert len(items) == len(classes)
+    assert sum(item.capacity for item in items) == sum(
+        item.capacity for item in fall2023_schedule
+    )
+
+    results = {}
+    for algorithm in [general_yankee_swap_E, round_robin]:
+        result = algorithm(agents, items)
+        X_compressed = result[0] if isinstance(result, tuple) else result
+        X, stats = solve_compressed(algorithm, fall2023_students, fall2023_schedule)
+        assert stats["classes"] == len(classes)
+
+        # every agent keeps the value of its compressed bundle
+        capacity = [item.capacity for item in fall2023_schedule]
+        assert (X[:, :-1].sum(axis=1) + X[:, -1] == capacity).all()
+        assert (X[:, -1] >= 0).all()
+        assert (
+            get_utility_vector(X, fall2023_students, fall2023_schedule)
+            == get_utility_vector(X_compressed, agents, items)
+        ).all()
+        results[algorithm] = X, X_compressed
+
+    # Yankee swap is just as fair on the compressed items, with a smaller exchange graph
+    X, X_compressed = results[general_yankee_swap_E]
+    X_full, _, _ = general_yankee_swap_E(fall2023_students, fall2023_schedule)
+    assert leximin(X, fall2023_students, fall2023_schedule) == leximin(
+        X_full, fall2023_students, fall2023_schedule
+    )
+    G_full, _ = initialize_exchange_graph_E(
+        X_full, fall2023_students, fall2023_schedule
+    )
+    G, _ = initialize_exchange_graph_E(X_compressed, agents, items)
+    assert G.number_of_nodes() < G_full.number_of_nodes()
+    assert G.number_of_edges() < G_full.number_of_edges()
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from fair.agent import LegacyStudent
+from fair.allocation import general_yankee_swap_E, round_robin, serial_dictatorship
+from fair.decomposition import allocate_by_components, find_components
+from fair.item import ScheduleItem
+
+
+def test_find_components(
+    department_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    components = find_components(department_students, fall2023_schedule)
+
+    assert sorted(sum(components, [])) == list(range(len(department_students)))
+    assert len(components) >= 3
+    desired = [
+        set().union(
+            *[
+                department_students[i].get_desired_items_indexes(fall2023_schedule)
+                for i in component
+            ]
+        )
+        for component in components
+    ]
+    for i in range(len(desired)):
+        for j in range(i + 1, len(desired)):
+            assert desired[i].isdisjoint(desired[j])
+
+
+def test_allocate_by_components(
+    department_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    for algorithm, kwargs in [
+        (general_yankee_swap_E, {}),
+        (general_yankee_swap_E, {"backend": "array"}),
+        (serial_dictatorship, {}),
+    ]:
+        result = algorithm(department_students, fall2023_schedule, **kwargs)
+        X = result[0] if isinstance(result, tuple) else result
+        X_stitched = allocate_by_components(
+            algorithm, department_students, fall2023_schedule, **kwargs
+        )
+        assert (X == X_stitched).all()
+
+    # dropping a player skips the next one, who may belong to another component
+    X = round_robin(department_students, fall2023_schedule)
+    with ThreadPoolExecutor() as executor:
+        X_stitched = allocate_by_components(
+            round_robin, department_students, fall2023_schedule, executor=executor
+        )
+    assert not (X == X_stitched).all()
+    capacity = [item.capacity for item in fall2023_schedule]
+    assert (X_stitched[:, :-1].sum(axis=1) + X_stitched[:, -1] == capacity).all()
+    assert (X_stitched[:, -1] >= 0).all()
@@ -0,0 +1,237 @@
+import networkx as nx
+import numpy as np
+
+from fair.graph import (
+    ArrayExchangeGraph,
+    BipartiteExchangeGraph,
+    EdgeStore,
+    LazyExchangeGraph,
+)
+
+
+def test_array_exchange_graph_matches_networkx():
+    rng = np.random.default_rng(0)
+    N = 12
+    for _ in range(20):
+        G = nx.DiGraph()
+        G.add_nodes_from(range(N))
+        G.add_node("t")
+        H = ArrayExchangeGraph(N)
+        for i in range(N):
+            G.add_edge(i, "t")
+
+        # same random sequence of edge insertions and deletions
+        for u, v in rng.integers(0, N, size=(60, 2)):
+            if u == v:
+                continue
+            if G.has_edge(u, v):
+                G.remove_edge(u, v)
+                H.remove_edge(u, v)
+            else:
+                G.add_edge(u, v)
+                H.add_edge(u, v)
+        for i in rng.choice(N, 8, replace=False):
+            G.remove_edge(i, "t")
+            H.remove_edge(i, H.sink)
+
+        G.add_node("s")
+        for i in rng.choice(N, 3, replace=False):
+            G.add_edge("s", i)
+            H.add_edge(H.source, i)
+
+        assert H.number_of_edges() == G.number_of_edges()
+        labels = {H.source: "s", H.sink: "t"}
+        path = H.shortest_path(H.source, H.sink)
+        try:
+            expected = nx.shortest_path(G, "s", "t")
+        except nx.NetworkXNoPath:
+            expected = None
+        if expected is None:
+            assert path is None
+        else:
+            assert [labels.get(node, node) for node in path] == expected
+
+        H.remove_node(H.source)
+        assert H.successors(H.source).size == 0
+
+
+def test_array_exchange_graph_large():
+    # adjacency is kept per node, so memory follows the edges rather than N squared
+    N = 20000
+    H = ArrayExchangeGraph(N)
+    for i in range(N - 1):
+        H.remove_edge(i, H.sink)
+        H.add_edge(i, i + 1)
+    H.add_edge(H.source, N - 3)
+    assert H.number_of_edges() == N + 1
+    assert H.successors(0).tolist() == [1]
+    assert H.predecessors(H.sink).tolist() == [N - 1]
+    assert H.shortest_path(H.source, H.sink) == [H.source, N - 3, N - 2, N - 1, H.sink]
+
+    G = ArrayExchangeGraph.from_arrays(H.to_arrays())
+    assert G.number_of_edges() == H.number_of_edges()
+    assert G.successors(H.source).tolist() == [N - 3]
+
+
+def test_edge_store():
+    E = EdgeStore()
+
+    # first supporter makes the edge live, the rest only add to it
+    assert E.add(0, 1, 5)
+    assert not E.add(0, 1, 2)
+    assert E.add(0, 2, 5)
+    assert E.add(3, 1, 5)
+    assert E.agents(0, 1) == [5, 2]
+    assert E.supports(0, 2, 5) and not E.supports(0, 2, 2)
+
+    # removing an agent's edges from one item only touches those edges
+    assert E.remove_agent(5, 0) == [(0, 2)]
+    assert E.agents(0, 1) == [2]
+    assert E.edges_of(5) == [(3, 1)]
+    assert E.remove(0, 1, 2)
+    assert (0, 1) not in E
+    assert len(E) == 1
+
+
+def test_bipartite_exchange_graph():
+    E = EdgeStore()
+    G = BipartiteExchangeGraph(4, E)
+    for i in range(3):
+        G.remove_edge(i, G.sink)
+
+    # item edges follow the edge store, holdings are (item, agent) pairs
+    E.add(0, 1, 7)
+    E.add(0, 2, 3)
+    E.add(1, 3, 3)
+    E.add(2, 3, 5)
+    E.add(2, 3, 4)
+    assert list(E.edges()) == [(0, 1), (0, 2), (1, 3), (2, 3)]
+    assert G.has_edge(0, 1) and not G.has_edge(1, 0)
+    assert G.successors(0) == [1, 2]
+    assert G.giver(2, 3) == 4
+    assert G.number_of_nodes() == 4 + 2 + 5
+    assert G.number_of_edges() == 1 + 5 + 5
+    assert G.items_reaching_sink() == {0, 1, 2, 3}
+
+    # ties go to the lowest item on the first layer reached
+    G.add_edges_from([(G.source, 0)])
+    assert G.shortest_path(G.source, G.sink) == [G.source, 0, 1, 3, G.sink]
+    G.remove_node(G.source)
+    assert G.shortest_path(G.source, G.sink) is None
+
+    E.remove_agent(3)
+    assert G.successors(0) == [1]
+    assert G.items_reaching_sink() == {2, 3}
+    assert set(G.to_networkx().edges) >= {(2, (2, 4)), ((2, 5), 3), (3, "t")}
+    H = BipartiteExchangeGraph.from_arrays(G.to_arrays(), E)
+    assert H.items_reaching_sink() == G.items_reaching_sink()
+
+
+def test_lazy_exchange_graph():
+    owners = {0: [3, 7], 1: [3], 2: [4, 5], 3: []}
+    edges = {0: {1: 7, 2: 3}, 1: {3: 3}, 2: {3: 4}, 3: {}}
+    built = []
+
+    def exchanges(item_index):
+        built.append(item_index)
+        return edges[item_index]
+
+    G = LazyExchangeGraph(4)
+    G.bind(lambda item_index: owners[item_index], exchanges)
+    for i in range(3):
+        G.remove_edge(i, G.sink)
+
+    # edges are built as the search expands items, and the sink is checked first
+    G.add_edges_from([(G.source, 0)])
+    assert G.shortest_path(G.source, G.sink) == [G.source, 0, 1, 3, G.sink]
+    assert built == [0, 1, 2]
+    assert G.giver(0, 2) == 3 and G.giver(2, 3) == 4
+    G.remove_node(G.source)
+
+    # only items with an owner whose bundle changed are built again
+    G.advance(3)
+    edges[0] = {1: 7}
+    assert G.successors(0) == [1] and G.successors(2) == [3]
+    assert built == [0, 1, 2, 0]
+    assert G.items_reaching_sink() == {0, 1, 2, 3}
+    assert G.number_of_edges() == 1 + 3
+
+    H = LazyExchangeGraph.from_arrays(G.to_arrays())
+    assert H._sink_tails == G._sink_tails and H._entries == {}
+
+
+def test_array_exchange_graph_distance_repair():
+    rng = np.random.default_rng(1)
+    N = 15
+    H = ArrayExchangeGraph(N, track_distances=True)
+    for _ in range(30):
+        # a batch of random edge changes, as after one transfer path
+        for u, v in rng.integers(0, N + 1, size=(10, 2)):
+            v = H.sink if v == N else v
+            if u == v:
+                continue
+            if H.has_edge(u, v):
+                H.remove_edge(u, v)
+            else:
+                H.add_edge(u, v)
+
+        # repaired labels agree with a full reverse search
+        H.track_distances = False
+        expected = H.distances()
+        H.track_distances = True
+        assert (H.distances() == expected).all()
+
+        for i in rng.choice(N, 3, replace=False):
+            H.add_edge(H.source, i)
+        path = H.shortest_path(H.source, H.sink)
+        H.track_distances = False
+        bidirectional = H.shortest_path(H.source, H.sink)
+        H.track_distances = True
+        if bidirectional is None:
+            assert path is None
+        else:
+            assert len(path) == len(bidirectional)
+            assert all(H.has_edge(u, v) for u, v in zip(path[:-1], path[1:]))
+        H.remove_node(H.source)
+
+    assert len(H.repair_touched) > 0
+
+
+def test_array_exchange_graph_footprint():
+    G = ArrayExchangeGraph(4)
+    G.remove_edge(1, G.sink)
+    G.add_edge(1, 0)
+    G.add_edge(G.source, 1)
+    path, footprint = G.shortest_path(G.source, G.sink, footprint=True)
+    assert path == [G.source, 1, 0, G.sink]
+
+    # edges away from the explored part of the graph keep the path valid
+    G.add_edge(2, 3)
+    assert G.is_unchanged(footprint)
+    G.remove_edge(0, G.sink)
+    assert not G.is_unchanged(footprint)
+
+    rng = np.random.default_rng(2)
+    N = 12
+    H = ArrayExchangeGraph(N)
+    for _ in range(200):
+        source_edges = rng.choice(N, 3, replace=False)
+        for i in source_edges:
+            H.add_edge(H.source, i)
+        path, footprint = H.shortest_path(H.source, H.sink, footprint=True)
+        H.remove_node(H.source)
+        for u, v in zip(rng.integers(0, N, size=3), rng.integers(0, N + 1, size=3)):
+            v = H.sink if v == N else v
+            if u == v:
+                continue
+            if H.has_edge(u, v):
+                H.remove_edge(u, v)
+            else:
+                H.add_edge(u, v)
+
+        # a footprint that still holds means searching again gives the same path
+        if H.is_unchanged(footprint):
+            for i in source_edges:
+                H.add_edge(H.source, i)
+            assert H.shortest_path(H.source, H.sink) == path
+            H.remove_node(H.source)
@@ -0,0 +1,133 @@
+import pytest
+
+from fair.agent import LegacyStudent
+from fair.allocation import (
+    general_yankee_swap_E,
+    get_utility_vector,
+    initialize_exchange_graph_E,
+)
+from fair.item import ScheduleItem
+from fair.online import (
+    AgentAdded,
+    AgentWithdrawn,
+    CapacityChange,
+    ItemRemoved,
+    OnlineYankeeSwap,
+)
+
+
+def test_online_yankee_swap(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, _, _ = general_yankee_swap_E(fall2023_students[:-1], fall2023_schedule)
+    online = OnlineYankeeSwap(fall2023_students[:-1], fall2023_schedule)
+    assert (online.X == X).all()
+
+    owned = [i for i in range(len(fall2023_schedule)) if X[i, :-1].sum() > 0]
+    events = [
+        AgentWithdrawn(0),
+        CapacityChange(owned[0], 3),
+        ItemRemoved(owned[1]),
+        AgentAdded(fall2023_students[-1]),
+        CapacityChange(owned[2], 0),
+    ]
+    for event in events:
+        latency = online.process(event)
+        assert latency >= 0
+
+        # the repaired state agrees with one rebuilt from scratch
+        X = online.X
+        G, E = initialize_exchange_graph_E(X, online.agents, fall2023_schedule)
+        assert set(G.edges) == set(online.G.edges)
+        for edge in G.edges:
+            if "t" not in edge:
+                assert set(E.agents(*edge)) == set(online.E.agents(*edge))
+        assert (
+            online.utility_vector
+            == get_utility_vector(X, online.agents, fall2023_schedule).tolist()
+        )
+        assert (X[:, -1] >= 0).all()
+
+    assert len(online.latencies) == len(events)
+    assert X.shape[1] == len(fall2023_students) + 1
+    assert X[:, 0].sum() == 0
+    assert X[owned[0], :-1].sum() + X[owned[0], -1] == 3
+    assert X[owned[1]].sum() == 0 and X[owned[2]].sum() == 0
+    assert online.utility_vector[-1] == X[:, -2].sum()
+
+
+def test_online_yankee_swap_lazy_backend(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    online = OnlineYankeeSwap(fall2023_students[:-1], fall2023_schedule)
+    lazy = OnlineYankeeSwap(fall2023_students[:-1], fall2023_schedule, backend="lazy")
+    owned = [i for i in range(len(fall2023_schedule)) if lazy.X[i, :-1].sum() > 0]
+    events = [
+        AgentWithdrawn(0),
+        CapacityChange(owned[0], 3),
+        AgentAdded(fall2023_students[-1]),
+    ]
+    for event in events:
+        online.process(event)
+        lazy.process(event)
+
+        # edges built on demand are those of a graph rebuilt from scratch
+        G, _ = initialize_exchange_graph_E(lazy.X, lazy.agents, fall2023_schedule)
+        assert set(G.edges) == set(lazy.G.to_networkx().edges)
+        assert lazy.utility_vector == online.utility_vector
+
+
+def test_online_yankee_swap_invalid_events(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    students = fall2023_students[:10]
+    online = OnlineYankeeSwap(
+        students[:-1],
+        fall2023_schedule,
+        criteria="WeightedLeximin",
+        weights=[1.0] * (len(students) - 1),
+    )
+    X = online.X.copy()
+
+    # rejected events leave the state untouched
+    owned = [i for i in range(len(fall2023_schedule)) if X[i, :-1].sum() > 0]
+    with pytest.raises(ValueError):
+        online.change_capacity(owned[0], -1)
+    with pytest.raises(ValueError):
+        online.add_agent(students[-1])
+    assert (online.X == X).all()
+    assert len(online.agents) == len(online.weights) == len(students) - 1
+
+    online.add_agent(students[-1], 2.0)
+    assert online.weights[-1] == 2.0
+
+
+def test_online_yankee_swap_weighted_events(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    students = fall2023_students[:10]
+    weights = [1.0 + i % 3 for i in range(len(students))]
+    online = OnlineYankeeSwap(
+        students[:-2],
+        fall2023_schedule,
+        criteria="WeightedLeximin",
+        weights=weights[:-2],
+    )
+
+    events = [
+        AgentAdded(students[-2], weights[-2]),
+        AgentWithdrawn(0),
+        AgentAdded(students[-1], weights[-1]),
+    ]
+    latencies = list(online.process_events(events))
+    assert len(latencies) == len(events) and min(latencies) >= 0
+    assert online.weights == weights
+    assert (
+        online.utility_vector
+        == get_utility_vector(online.X, online.agents, fall2023_schedule).tolist()
+    )
+    assert online.utility_vector[-1] > 0
@@ -0,0 +1,62 @@
+from fair.agent import LegacyStudent
+from fair.allocation import general_yankee_swap_E, round_robin, serial_dictatorship
+from fair.item import ScheduleItem
+from fair.presolve import presolve, solve_presolved
+from fair.profiling import AllocationProfiler
+
+
+def test_presolve(
+    department_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    kept, free_items, stats = presolve(department_students, fall2023_schedule)
+
+    desired = [
+        set(student.get_desired_items_indexes(fall2023_schedule))
+        for student in department_students
+    ]
+    assert kept == [i for i in range(len(desired)) if len(desired[i]) > 0]
+    assert stats["agents_dropped"] == len(department_students) - len(kept) > 0
+    assert stats["items_undesired"] == len(fall2023_schedule) - len(
+        set().union(*desired)
+    )
+    for item_index in free_items:
+        demand = sum(item_index in d for d in desired)
+        assert fall2023_schedule[item_index].capacity >= demand
+    assert stats["items_free"] == len(free_items) > 0
+
+
+def test_solve_presolved(
+    department_students: list[LegacyStudent], fall2023_schedule: list[ScheduleItem]
+):
+    for algorithm, kwargs in [
+        (general_yankee_swap_E, {}),
+        (general_yankee_swap_E, {"backend": "array"}),
+        (serial_dictatorship, {}),
+    ]:
+        result = algorithm(department_students, fall2023_schedule, **kwargs)
+        X = result[0] if isinstance(result, tuple) else result
+        X_presolved, _ = solve_presolved(
+            algorithm, department_students, fall2023_schedule, **kwargs
+        )
+        assert (X == X_presolved).all()
+
+    # edges leaving free items are never built
+    profiler = AllocationProfiler()
+    general_yankee_swap_E(department_students, fall2023_schedule, profiler=profiler)
+    profiler_presolved = AllocationProfiler()
+    solve_presolved(
+        general_yankee_swap_E,
+        department_students,
+        fall2023_schedule,
+        profiler=profiler_presolved,
+    )
+    calls = profiler.summary()["counters"]["oracle_calls"]["total"]
+    calls_presolved = profiler_presolved.summary()["counters"]["oracle_calls"]["total"]
+    assert calls_presolved < calls
+
+    # round robin skips the agent after one that drops out
+    X = round_robin(department_students, fall2023_schedule)
+    X_presolved, _ = solve_presolved(
+        round_robin, department_students, fall2023_schedule
+    )
+    assert not (X == X_presolved).all()
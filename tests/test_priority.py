@@ -0,0 +1,32 @@
+import numpy as np
+
+from fair.priority import AgentPriorityQueue
+
+
+def test_agent_priority_queue_matches_argmax():
+    rng = np.random.default_rng(0)
+    gain_vector = np.zeros([20])
+    queue = AgentPriorityQueue(gain_vector)
+
+    while len(queue) > 0:
+        agent_index = queue.peek()
+        assert agent_index == np.argmax(gain_vector)
+        if rng.random() < 0.2:
+            queue.remove(agent_index)
+            gain_vector[agent_index] = float("-inf")
+        else:
+            # few distinct values so that ties are common
+            gain = float(rng.choice([-3, -2, -1, float("inf")]))
+            gain_vector[agent_index] = gain
+            queue.update(agent_index, gain)
+
+    assert agent_index not in queue
+
+
+def test_agent_priority_queue_ties():
+    queue = AgentPriorityQueue([0, -1, 0, 0, -1])
+    queue.update(0, -1)
+
+    assert queue.peek_ties(5) == [2, 3]
+    assert queue.peek_ties(1) == [2]
+    assert queue.peek() == 2
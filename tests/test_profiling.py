@@ -0,0 +1,39 @@
+from fair.agent import LegacyStudent
+from fair.allocation import general_yankee_swap_E
+from fair.item import ScheduleItem
+from fair.profiling import AllocationProfiler
+
+
+def test_allocation_profiler(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    X, time_steps, agents_involved = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, backend="array"
+    )
+    profiler = AllocationProfiler()
+    X_prof, _, agents_involved_prof = general_yankee_swap_E(
+        fall2023_students, fall2023_schedule, backend="array", profiler=profiler
+    )
+    summary = profiler.summary()
+
+    # instrumentation does not change the run
+    assert (X == X_prof).all()
+    assert agents_involved == agents_involved_prof
+
+    assert summary["iterations"] == len(time_steps)
+    for name in ["selection", "add_agent", "search", "update_allocation", "oracle"]:
+        assert len(summary["phases"][name]["per_iteration"]) == len(time_steps)
+        assert summary["phases"][name]["total"] >= 0
+    counters = summary["counters"]
+    assert counters["oracle_calls"]["total"] > 0
+    assert counters["nodes_expanded"]["total"] >= len(time_steps)
+    assert counters["edges_added"]["total"] > 0
+    for per_iteration, n in zip(
+        counters["edges_added"]["per_iteration"], agents_involved
+    ):
+        assert n > 0 or per_iteration == 0
+
+    disabled = AllocationProfiler(enabled=False)
+    general_yankee_swap_E(fall2023_students, fall2023_schedule, profiler=disabled)
+    assert disabled.summary() == {"iterations": 0, "phases": {}, "counters": {}}
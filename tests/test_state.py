@@ -0,0 +1,41 @@
+import numpy as np
+
+from fair.allocation import (
+    get_bundle_from_allocation_matrix,
+    get_bundle_indexes_from_allocation_matrix,
+    initialize_allocation_matrix,
+)
+from fair.item import ScheduleItem
+from fair.simulation import RenaissanceMan
+from fair.state import AllocationState
+
+
+def test_allocation_state(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+):
+    agents = [renaissance1, renaissance2]
+    X = initialize_allocation_matrix(schedule, agents)
+    X[1, 0] = 1
+    X[3, 1] = 1
+    state = AllocationState(X, schedule)
+
+    assert state.bundle_indexes(0) == [1]
+    assert state.owners(3) == [1]
+
+    state.allocate(4, 0)
+    state.assign(3, 0)
+    state.release(3, 1)
+
+    # indexes agree with a full scan of the matrix, which is updated in place
+    for agent_index in range(len(agents)):
+        assert state.bundle_indexes(
+            agent_index
+        ) == get_bundle_indexes_from_allocation_matrix(X, agent_index)
+        assert state.bundle(agent_index) == get_bundle_from_allocation_matrix(
+            X, schedule, agent_index
+        )
+    for item_index in range(len(schedule)):
+        assert state.owners(item_index) == np.nonzero(X[item_index, :-1])[0].tolist()
+    assert state.remaining(4) == schedule[4].capacity - 1
@@ -0,0 +1,68 @@
+import numpy as np
+
+from fair.agent import LegacyStudent
+from fair.allocation import (
+    general_yankee_swap_E,
+    get_bundle_from_allocation_matrix,
+    round_robin,
+    serial_dictatorship,
+)
+from fair.envy import EF_count
+from fair.item import ScheduleItem
+from fair.metrics import leximin, utilitarian_welfare
+from fair.storage import DenseAllocation, MatrixAllocation, SparseAllocation
+
+
+def test_storage_round_trip(schedule: list[ScheduleItem]):
+    capacity = np.array([item.capacity for item in schedule])
+    X = np.zeros([len(schedule), 3], dtype=int)
+    X[:, -1] = capacity
+    storages = [
+        MatrixAllocation(X),
+        DenseAllocation(len(schedule), 2, capacity),
+        SparseAllocation(len(schedule), 2, capacity),
+    ]
+    for storage in storages:
+        storage.set(0, 1, 1)
+        storage.set(3, 1, 1)
+        storage.set(3, 0, 1)
+        storage.set(0, 1, 0)
+        storage.capacity[3] -= 2
+
+        assert storage.bundle_indexes(1) == [3]
+        assert storage.owners(3) == [0, 1]
+        assert storage.get(3, 0) == 1 and storage.get(0, 1) == 0
+        assert (storage.to_matrix() == storages[0].to_matrix()).all()
+
+
+def test_algorithms_accept_storage(
+    fall2023_students: list[LegacyStudent],
+    fall2023_schedule: list[ScheduleItem],
+):
+    for algorithm in [serial_dictatorship, round_robin, general_yankee_swap_E]:
+        results = [
+            algorithm(fall2023_students, fall2023_schedule, storage=storage)
+            for storage in ["matrix", "dense", "sparse"]
+        ]
+        Xs = [X[0] if isinstance(X, tuple) else X for X in results]
+        X_matrix, X_dense, X_sparse = Xs
+
+        assert isinstance(X_dense, DenseAllocation)
+        assert isinstance(X_sparse, SparseAllocation)
+        assert (X_dense.to_matrix() == X_matrix).all()
+        assert (X_sparse.to_matrix() == X_matrix).all()
+
+        # metrics read bundles from any storage
+        for X in Xs:
+            assert get_bundle_from_allocation_matrix(
+                X, fall2023_schedule, 3
+            ) == get_bundle_from_allocation_matrix(X_matrix, fall2023_schedule, 3)
+            assert utilitarian_welfare(
+                X, fall2023_students, fall2023_schedule
+            ) == utilitarian_welfare(X_matrix, fall2023_students, fall2023_schedule)
+            assert leximin(X, fall2023_students, fall2023_schedule) == leximin(
+                X_matrix, fall2023_students, fall2023_schedule
+            )
+    assert EF_count(X_sparse, fall2023_students, fall2023_schedule) == EF_count(
+        X_matrix, fall2023_students, fall2023_schedule
+    )